@@ -0,0 +1,30 @@
+// app/api/faq/[id]/related/route.ts
+import { NextRequest, NextResponse } from "next/server";
+import { prisma } from "@/app/lib/prisma";
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: { id: string } }
+) {
+  const faqId = parseInt(params.id, 10);
+  if (isNaN(faqId)) {
+    return NextResponse.json({ error: "Invalid ID" }, { status: 400 });
+  }
+
+  try {
+    // Precomputed by kb_ref/related_faqs.py
+    const related = await prisma.related_faq.findMany({
+      where: { source_type: "faq", source_id: faqId },
+      orderBy: { rank: "asc" },
+      include: { faq: true },
+    });
+
+    return NextResponse.json(related.map((item) => ({ ...item.faq, score: item.score })));
+  } catch (error) {
+    console.error("Error fetching related FAQs:", error);
+    return NextResponse.json(
+      { error: "Failed to fetch related FAQs." },
+      { status: 500 }
+    );
+  }
+}
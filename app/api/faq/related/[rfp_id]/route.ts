@@ -13,15 +13,46 @@ export async function GET(
   const rfpId = parseInt(params.rfp_id, 10);
 
   try {
-    const relatedFaqs = await prisma.faq.findMany({
-      where: {
-        metadata: {
-          path: ["source_rfp_id"],
-          equals: rfpId,
+    const [materialized, linked] = await Promise.all([
+      // Precomputed by kb_ref/related_faqs.py: one primary-key range read
+      prisma.related_faq.findMany({
+        where: { source_type: "rfp_qa", source_id: rfpId },
+        orderBy: { rank: "asc" },
+        include: { faq: true },
+      }),
+      // Explicit links, including FAQs created since the table was last rebuilt
+      prisma.faq.findMany({
+        where: {
+          OR: [
+            { rfpQaId: rfpId },
+            {
+              metadata: {
+                path: ["source_rfp_id"],
+                equals: rfpId,
+              },
+            },
+            // FAQs drafted for a whole cluster of paraphrased RFP questions
+            {
+              metadata: {
+                path: ["source_rfp_ids"],
+                array_contains: [rfpId],
+              },
+            },
+          ],
         },
-      },
-      orderBy: { id: "asc" },
-    });
+        orderBy: { id: "asc" },
+      }),
+    ]);
+
+    // Explicit links first, then the rest of the materialized ranking, each FAQ once
+    const scores = new Map(materialized.map((related) => [related.faq_id, related.score]));
+    const linkedIds = new Set(linked.map((faq) => faq.id));
+    const relatedFaqs = [
+      ...linked.map((faq) => ({ ...faq, score: scores.get(faq.id) ?? null })),
+      ...materialized
+        .filter((related) => !linkedIds.has(related.faq_id))
+        .map((related) => ({ ...related.faq, score: related.score })),
+    ];
 
     return NextResponse.json(relatedFaqs);
   } catch (error) {
@@ -1,5 +1,7 @@
 import { NextResponse } from 'next/server';
 import { OpenAI } from 'openai';
+import { execFile } from 'child_process';
+import path from 'path';
 import { formatKbSubtitle, formatKbBody } from '@/lib/formatUtils';
 import { generateKbUrl, shouldUpdateKbUrl } from '@/lib/urlUtils';
 
@@ -7,9 +9,89 @@ const openai = new OpenAI({
   apiKey: process.env.OPENAI_API_KEY,
 });
 
+// Queue shared with `kb_processor.py --worker`
+const KB_QUEUE_PATH = process.env.KB_QUEUE_PATH || path.join(process.cwd(), 'kb_ref', 'kb_jobs.sqlite');
+const PYTHON_BIN = process.env.PYTHON_BIN || 'python3';
+
+// Hand the entry to the background kb_processor workers instead of rewriting it inline
+function enqueueKbJob(payload: Record<string, string>, priority: number): Promise<number> {
+  return new Promise((resolve, reject) => {
+    const child = execFile(
+      PYTHON_BIN,
+      [
+        path.join(process.cwd(), 'kb_ref', 'job_queue.py'),
+        '--queue', KB_QUEUE_PATH,
+        'enqueue', payload.article_url,
+        '--priority', String(priority),
+        '--payload', '-',
+      ],
+      (error, stdout) => {
+        if (error) {
+          reject(error);
+          return;
+        }
+        resolve(JSON.parse(stdout).job_id);
+      }
+    );
+    child.stdin?.end(JSON.stringify(payload));
+  });
+}
+
+// Warm kb_processor service (`kb_processor.py --serve`), e.g. http://127.0.0.1:8765
+const KB_SERVICE_URL = process.env.KB_SERVICE_URL;
+
+// Run the full research + QC pipeline on the warm service and relay its progress
+// events, formatting the final result the same way as the single-shot path
+async function streamPipeline(entry: Record<string, string>): Promise<Response> {
+  const upstream = await fetch(`${KB_SERVICE_URL}/process`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(entry),
+  });
+
+  if (!upstream.ok || !upstream.body) {
+    throw new Error(`KB service returned ${upstream.status}`);
+  }
+
+  const decoder = new TextDecoder();
+  const encoder = new TextEncoder();
+  let buffered = '';
+
+  const formatEvent = (line: string) => {
+    const event = JSON.parse(line);
+    if (event.event === 'result') {
+      event.subtitle = formatKbSubtitle(event.subtitle.trim());
+      event.body = formatKbBody(event.body.trim());
+      event.keywords = Array.isArray(event.keywords) ? event.keywords.join(', ') : event.keywords;
+      event.article_url = shouldUpdateKbUrl(entry.article_url)
+        ? generateKbUrl(entry.category, entry.title)
+        : entry.article_url;
+    }
+    return encoder.encode(JSON.stringify(event) + '\n');
+  };
+
+  const events = upstream.body.pipeThrough(new TransformStream<Uint8Array, Uint8Array>({
+    transform(chunk, controller) {
+      buffered += decoder.decode(chunk, { stream: true });
+      const lines = buffered.split('\n');
+      buffered = lines.pop() || '';
+      for (const line of lines) {
+        if (line.trim()) controller.enqueue(formatEvent(line));
+      }
+    },
+    flush(controller) {
+      if (buffered.trim()) controller.enqueue(formatEvent(buffered));
+    },
+  }));
+
+  return new Response(events, {
+    headers: { 'Content-Type': 'application/x-ndjson', 'Cache-Control': 'no-cache' },
+  });
+}
+
 export async function POST(request: Request) {
   try {
-    const { title, subtitle, body, category, keywords, prompt, article_url } = await request.json();
+    const { title, subtitle, body, category, keywords, prompt, article_url, enqueue, priority, pipeline } = await request.json();
 
     if (!title || !category) {
       return NextResponse.json(
@@ -18,6 +100,38 @@ export async function POST(request: Request) {
       );
     }
 
+    if (enqueue) {
+      if (!article_url) {
+        return NextResponse.json(
+          { error: 'Article URL is required to queue an entry' },
+          { status: 400 }
+        );
+      }
+
+      const jobId = await enqueueKbJob(
+        {
+          article_url,
+          article_title: title,
+          article_subtitle: subtitle || '',
+          article_body: body || '',
+          category,
+          keywords: keywords || ''
+        },
+        Number(priority) || 0
+      );
+      return NextResponse.json({ job_id: jobId, status: 'queued' }, { status: 202 });
+    }
+
+    if (pipeline && KB_SERVICE_URL) {
+      return await streamPipeline({
+        title,
+        subtitle: subtitle || '',
+        body: body || '',
+        category,
+        article_url: article_url || ''
+      });
+    }
+
     // Use the provided prompt template or fall back to a default
     const formattedPrompt = (prompt || '').replace(
       /{(\w+)}/g,
@@ -0,0 +1,105 @@
+"""
+Import-time benchmark for kb_processor.py.
+Imports the module in fresh interpreters with `python -X importtime`, reports
+the median cold-start time and the slowest top-level imports, and exits
+non-zero if a provider SDK or search backend is imported eagerly again or the
+import exceeds the time budget.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Modules that must only load once a run actually needs them
+LAZY_MODULES = [
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_google_genai",
+    "langchain_community.utilities",
+    "duckduckgo_search",
+    "ddgs",
+    "dotenv",
+    # Sibling modules needed only by some CLI modes
+    "scheduler",
+    "estimator",
+    "profiler",
+    "kb_service",
+    "blob_store",
+    "sharding",
+    "job_queue",
+]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+def measure_import(module: str = "kb_processor") -> Tuple[int, Dict[str, int], List[Tuple[int, str]]]:
+    """Import module in a fresh interpreter
+
+    Returns (total microseconds, cumulative microseconds per imported module,
+    the module's direct imports as (microseconds, name)).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = {}
+    lines = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        cumulative[name] = int(cumulative_us)
+        lines.append((len(indent), int(cumulative_us), name))
+
+    # A module's imports are listed before its own line, one level deeper. Nesting is
+    # measured from the module's line, wherever the interpreter's startup imports put it.
+    direct = []
+    position = next((i for i in range(len(lines) - 1, -1, -1) if lines[i][2] == module), None)
+    if position is not None:
+        depth = lines[position][0]
+        for indent, cumulative_us, name in reversed(lines[:position]):
+            if indent <= depth:
+                break
+            if indent == depth + 2:
+                direct.append((cumulative_us, name))
+    return cumulative.get(module, 0), cumulative, direct
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark kb_processor import time')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreter runs (default: 5)')
+    parser.add_argument('--max-ms', type=float,
+                       help='Fail when the median import time exceeds this many milliseconds')
+    parser.add_argument('--top', type=int, default=10, help='Slowest direct imports to list (default: 10)')
+
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        total, cumulative, direct = measure_import()
+        totals.append(total)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"kb_processor import: median {median_ms:.0f} ms over {args.runs} runs "
+          f"(min {min(totals) / 1000:.0f} ms, max {max(totals) / 1000:.0f} ms)")
+    print("Slowest top-level imports (last run):")
+    for microseconds, name in sorted(direct, reverse=True)[:args.top]:
+        print(f"  {microseconds / 1000:8.1f} ms  {name}")
+
+    failures = [f"{name} is imported eagerly" for name in LAZY_MODULES if name in cumulative]
+    if args.max_ms is not None and median_ms > args.max_ms:
+        failures.append(f"median import time {median_ms:.0f} ms exceeds budget of {args.max_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Content-addressed store for research payloads.
+Search results and research sections that repeat across entries are stored
+once and referenced from each row, instead of being embedded in every row's
+research_results.
+"""
+
+import hashlib
+import json
+import sqlite3
+import zlib
+from typing import Any, Dict
+from context_budget import SEARCH_RESULT_KEYS
+
+# Marker key for a reference to a stored blob
+REF_KEY = "$blob"
+
+# Search result fields that result_id covers and the blob holds; the rest (query,
+# timestamp, source_type) differ between entries and stay inline next to the reference
+SHARED_RESULT_FIELDS = ("domain", "content")
+
+# Parsed research sections produced by ResearchAgent._parse_research_results
+RESEARCH_SECTIONS = [
+    "direct_connections", "architectural_patterns", "feature_relationships",
+    "evolution_context", "technical_value",
+]
+
+def result_id(result: dict) -> str:
+    """Identify a search result by its domain and a hash of its content"""
+    content_hash = hashlib.md5(result["content"].encode()).hexdigest()
+    return f"{result['domain']}:{content_hash}"
+
+def section_id(name: str, section: Any) -> str:
+    """Identify a research section by its name and a hash of its canonical JSON"""
+    canonical = json.dumps(section, sort_keys=True, separators=(',', ':'))
+    return f"section:{name}:{hashlib.md5(canonical.encode()).hexdigest()}"
+
+class BlobStore:
+    def __init__(self, path: str):
+        """Open (or create) the SQLite-backed blob store"""
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                id TEXT PRIMARY KEY,
+                payload BLOB NOT NULL
+            )
+        """)
+        self.conn.commit()
+        # Ids already written this run; skips redundant inserts
+        self._known = set()
+
+    def put(self, blob_id: str, payload: Any) -> Dict[str, str]:
+        """Store a payload once under blob_id and return a reference to it"""
+        if blob_id not in self._known:
+            data = zlib.compress(json.dumps(payload, separators=(',', ':')).encode())
+            self.conn.execute(
+                "INSERT OR IGNORE INTO blobs (id, payload) VALUES (?, ?)",
+                (blob_id, data)
+            )
+            self._known.add(blob_id)
+        return {REF_KEY: blob_id}
+
+    def get(self, blob_id: str) -> Any:
+        """Load a stored payload"""
+        row = self.conn.execute("SELECT payload FROM blobs WHERE id = ?", (blob_id,)).fetchone()
+        if row is None:
+            raise KeyError(blob_id)
+        return json.loads(zlib.decompress(row[0]))
+
+    def intern_result(self, result: dict) -> dict:
+        """Store a search result's domain and content once; keep its per-entry fields inline"""
+        reference = self.put(result_id(result), {field: result[field] for field in SHARED_RESULT_FIELDS})
+        reference.update((key, value) for key, value in result.items() if key not in SHARED_RESULT_FIELDS)
+        return reference
+
+    def intern_research(self, research: dict) -> dict:
+        """Replace search results and research sections with blob references"""
+        if not isinstance(research, dict):
+            return research
+        interned = dict(research)
+
+        sections = research.get("sections")
+        if isinstance(sections, dict):
+            interned["sections"] = {
+                name: self.put(section_id(name, value), value) if name in RESEARCH_SECTIONS else value
+                for name, value in sections.items()
+            }
+
+        # Raw search results kept by ResearchAgent.research; the same result often comes back for many entries
+        for key in SEARCH_RESULT_KEYS:
+            if isinstance(research.get(key), list):
+                interned[key] = [
+                    self.intern_result(result)
+                    if isinstance(result, dict) and all(field in result for field in SHARED_RESULT_FIELDS)
+                    else result
+                    for result in research[key]
+                ]
+
+        self.conn.commit()
+        return interned
+
+    def resolve(self, value: Any) -> Any:
+        """Expand blob references anywhere inside value
+
+        Fields stored inline next to a reference are laid over the blob's payload.
+        """
+        if isinstance(value, dict):
+            if REF_KEY in value:
+                inline = {key: self.resolve(item) for key, item in value.items() if key != REF_KEY}
+                return {**self.get(value[REF_KEY]), **inline}
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        return value
+
+    def close(self):
+        """Commit and close the store"""
+        self.conn.commit()
+        self.conn.close()
+
+# Example usage:
+"""
+store = BlobStore("research_blobs.sqlite")
+row_research = store.intern_research(research_results)   # small, reference-only
+full_research = store.resolve(row_research)               # original payload
+"""
@@ -0,0 +1,197 @@
+"""
+Token budgeting for the research context sent to the LLM.
+Research results and raw search snippets are serialized without indentation,
+near-duplicate snippets and items are dropped, and what remains is ranked by
+relevance to the intent analysis and cut to a per-prompt token budget. The
+highest-value evidence survives the trim.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Set
+
+# Default budgets, in tokens
+DEFAULT_CONTEXT_BUDGET = 2000  # Research context per content-generation prompt
+DEFAULT_SEARCH_BUDGET = 3000   # Search results per research prompt
+
+# Base weight of each research section, before relevance to the intent is added
+SECTION_PRIORITY = {
+    "connection_summary": 1.0,
+    "direct_connections": 0.8,
+    "technical_value": 0.6,
+    "feature_relationships": 0.5,
+    "architectural_patterns": 0.4,
+    "evolution_context": 0.3,
+}
+
+# Raw search result lists that ResearchAgent.research keeps next to the parsed sections
+SEARCH_RESULT_KEYS = ("docs_results", "blog_results", "additional_results")
+
+# Word-shingle overlap above which two snippets count as duplicates
+DUPLICATE_OVERLAP = 0.8
+
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-]+")
+SNIPPET_SPLIT = re.compile(r"(?<=[.!?])\s+|\s*\.\.\.\s*|\n+")
+
+@lru_cache(maxsize=1)
+def _encoder():
+    """tiktoken encoder, or None when tiktoken or its encoding files are unavailable"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, or estimate at ~4 characters per token"""
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def compact_json(value: Any) -> str:
+    """Serialize without indentation or padding"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens"""
+    encoder = _encoder()
+    if encoder is not None:
+        tokens = encoder.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoder.decode(tokens[:max(0, max_tokens)])
+    return text[:max(0, max_tokens) * 4]
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+def intent_terms(intent_analysis: dict) -> Set[str]:
+    """Collect the words of every string in the intent analysis"""
+    terms = set()
+
+    def collect(value):
+        if isinstance(value, str):
+            terms.update(word for word in _words(value) if len(word) > 2)
+        elif isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                collect(item)
+
+    collect(intent_analysis or {})
+    return terms
+
+def relevance(text: str, terms: Set[str]) -> float:
+    """Share of the text's distinct words that the intent mentions, damped for length"""
+    words = set(_words(text))
+    if not words or not terms:
+        return 0.0
+    return len(words & terms) / (len(words) ** 0.5)
+
+def _shingles(text: str, size: int = 4) -> Set[tuple]:
+    words = _words(text)
+    if len(words) <= size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def dedupe(texts: List[str]) -> List[int]:
+    """Return the positions of texts to keep, dropping any that mostly repeat an earlier one"""
+    kept, kept_shingles = [], []
+    for position, text in enumerate(texts):
+        shingles = _shingles(text)
+        if not shingles:
+            continue
+        if any(len(shingles & other) / len(shingles) >= DUPLICATE_OVERLAP for other in kept_shingles):
+            continue
+        kept.append(position)
+        kept_shingles.append(shingles)
+    return kept
+
+def budget_research(research_results: dict, intent_analysis: dict,
+                    max_tokens: int = DEFAULT_CONTEXT_BUDGET) -> str:
+    """Compact research results to at most max_tokens, keeping the most relevant items
+
+    Sections that are lists are split into items; items are deduplicated across
+    sections, scored by section priority plus relevance to the intent, and
+    admitted best-first while they fit. Kept items stay in their original order.
+    """
+    sections = research_results.get("sections") if isinstance(research_results, dict) else None
+    if not isinstance(sections, dict):
+        # Nothing structured to rank (e.g. a failed research run): drop the raw search
+        # results, which the research prompt already saw, and cut the rest to fit
+        if isinstance(research_results, dict):
+            research_results = {key: value for key, value in research_results.items()
+                                if key not in SEARCH_RESULT_KEYS}
+        return truncate_tokens(compact_json(research_results), max_tokens)
+
+    terms = intent_terms(intent_analysis)
+    items = []  # (section, position within section, value, serialized)
+    for name, value in sections.items():
+        values = value if isinstance(value, list) else [value]
+        for position, item in enumerate(values):
+            items.append((name, position, item, item if isinstance(item, str) else compact_json(item)))
+
+    unique = [items[position] for position in dedupe([item[3] for item in items])]
+    ranked = sorted(
+        unique,
+        key=lambda item: SECTION_PRIORITY.get(item[0], 0.2) + relevance(item[3], terms),
+        reverse=True,
+    )
+
+    # Allow for the JSON punctuation that wraps each kept item
+    remaining = max_tokens - count_tokens(compact_json({name: [] for name in sections}))
+    kept = set()
+    for name, position, _, serialized in ranked:
+        cost = count_tokens(serialized) + 1
+        if cost <= remaining:
+            kept.add((name, position))
+            remaining -= cost
+
+    pruned: Dict[str, Any] = {}
+    for name, position, item, _ in items:
+        if (name, position) not in kept:
+            continue
+        if isinstance(sections[name], list):
+            pruned.setdefault(name, []).append(item)
+        else:
+            pruned[name] = item
+    return compact_json({"sections": pruned})
+
+def budget_search_results(results: List[dict], intent_analysis: dict,
+                          max_tokens: int = DEFAULT_SEARCH_BUDGET) -> str:
+    """Turn raw search results into deduplicated, relevance-ranked snippets within max_tokens"""
+    if not results:
+        return "[]"
+    terms = intent_terms(intent_analysis)
+
+    snippets = []  # (result position, snippet)
+    for position, result in enumerate(results):
+        content = result.get("content", "") if isinstance(result, dict) else str(result)
+        snippets += [(position, text.strip()) for text in SNIPPET_SPLIT.split(content) if text.strip()]
+
+    unique = [snippets[position] for position in dedupe([snippet for _, snippet in snippets])]
+    ranked = sorted(unique, key=lambda snippet: relevance(snippet[1], terms), reverse=True)
+
+    remaining = max_tokens
+    kept = set()
+    for snippet in ranked:
+        cost = count_tokens(snippet[1]) + 1
+        if cost <= remaining:
+            kept.add(snippet)
+            remaining -= cost
+
+    # One entry per source, snippets in their original order
+    budgeted = []
+    for position, result in enumerate(results):
+        kept_snippets = [text for source, text in unique if source == position and (source, text) in kept]
+        if kept_snippets:
+            source = result.get("domain", "") if isinstance(result, dict) else ""
+            budgeted.append({"source": source, "content": " ".join(kept_snippets)})
+    return compact_json(budgeted)
+
+# Example usage:
+"""
+research_output = budget_research(research_results, intent_analysis, max_tokens=1500)
+docs_context = budget_search_results(docs_results, intent_analysis, max_tokens=1000)
+"""
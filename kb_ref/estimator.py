@@ -0,0 +1,212 @@
+"""
+Offline cost and time estimate for a KB processing run.
+Every stage prompt is rendered for every row and tokenized locally. Model
+outputs that later stages consume (intent analysis, search results, research
+context, the generated entry) are sized from past run statistics, or from the
+configured budgets when there is no history yet. Generation and QC are scaled
+by the observed iterations per entry, and everything by the observed error
+rate, since failed entries get re-run. Web searches per entry and their
+latency also come from past runs, falling back to the configured number of
+search domains. Nothing here touches the network.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict
+import pandas as pd
+from context_budget import count_tokens
+from prompt_assembly import SEARCH_STAGE, PromptCacheStats, StagePrompt
+
+# USD per million tokens: (input, cached input, output)
+PROVIDER_PRICES = {
+    "openai": ("gpt-4o", 2.50, 1.25, 10.00),
+    "anthropic": ("claude-3.5-haiku", 0.80, 0.08, 4.00),
+    "google": ("gemini-pro", 0.50, 0.50, 1.50),
+}
+
+# Assumptions used until a stage has run at least once
+DEFAULT_OUTPUT_TOKENS = {"intent_analysis": 700, "research": 1200, "generation": 900, "quality_control": 600}
+DEFAULT_CALL_SECONDS = {"intent_analysis": 8.0, "research": 15.0, "generation": 20.0, "quality_control": 10.0}
+DEFAULT_ITERATIONS = 1.5  # Generation/QC rounds per entry
+DEFAULT_SEARCH_SECONDS = 1.0  # DuckDuckGo latency per search, before rate limiting
+
+STAGES = ["intent_analysis", "research", "generation", "quality_control"]
+
+def load_run_stats(path: str) -> dict:
+    """Read accumulated run statistics; an empty history if the file does not exist"""
+    if not path or not os.path.exists(path):
+        return {"runs": 0, "entries": 0, "errors": 0, "stages": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def record_run_stats(path: str, stats: PromptCacheStats, entries: int, errors: int):
+    """Add one run's per-stage counters and entry outcomes to the history file
+
+    The read-modify-write happens under an exclusive lock, so concurrent
+    workers and shards all get counted.
+    """
+    if not entries:
+        return
+    import fcntl  # POSIX only
+
+    with open(path, "a+", encoding="utf-8") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            content = f.read()
+            history = json.loads(content) if content.strip() else load_run_stats(None)
+            history["runs"] += 1
+            history["entries"] += entries
+            history["errors"] += errors
+            for stage, counts in stats.stages.items():
+                totals = history["stages"].setdefault(stage, {})
+                for name, value in counts.items():
+                    totals[name] = totals.get(name, 0) + value
+            f.seek(0)
+            f.truncate()
+            json.dump(history, f, indent=2)
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+@dataclass
+class StageEstimate:
+    calls: float = 0.0
+    input_tokens: float = 0.0
+    cached_tokens: float = 0.0
+    output_tokens: float = 0.0
+    seconds: float = 0.0
+
+@dataclass
+class RunEstimate:
+    provider: str
+    entries: int
+    concurrency: int
+    stages: Dict[str, StageEstimate] = field(default_factory=dict)
+    search_calls: int = 0
+    search_seconds: float = 0.0
+    retry_rate: float = 0.0
+    iterations: float = DEFAULT_ITERATIONS
+    from_history: bool = False
+
+    @property
+    def cost(self) -> float:
+        _, input_price, cached_price, output_price = PROVIDER_PRICES[self.provider]
+        total = 0.0
+        for stage in self.stages.values():
+            total += ((stage.input_tokens - stage.cached_tokens) * input_price
+                      + stage.cached_tokens * cached_price + stage.output_tokens * output_price)
+        return total / 1_000_000
+
+    @property
+    def wall_seconds(self) -> float:
+        """Stages within an entry run one after another; entries spread over the workers"""
+        serial = sum(stage.seconds for stage in self.stages.values()) + self.search_seconds
+        return serial / max(1, min(self.concurrency, self.entries or 1))
+
+    def summary(self) -> str:
+        model = PROVIDER_PRICES[self.provider][0]
+        basis = "past run statistics" if self.from_history else "default assumptions (no run history yet)"
+        lines = [
+            f"Estimate for {self.entries} entries on {self.provider} {model}, concurrency {self.concurrency}",
+            f"  based on {basis}: {self.iterations:.2f} generation/QC rounds per entry, "
+            f"{self.retry_rate:.0%} re-run rate",
+            f"  {'stage':<16} {'calls':>7} {'input tok':>11} {'cached':>9} {'output tok':>11}",
+        ]
+        for name, stage in self.stages.items():
+            lines.append(f"  {name:<16} {stage.calls:>7.1f} {stage.input_tokens:>11,.0f} "
+                         f"{stage.cached_tokens:>9,.0f} {stage.output_tokens:>11,.0f}")
+        input_tokens = sum(stage.input_tokens for stage in self.stages.values())
+        output_tokens = sum(stage.output_tokens for stage in self.stages.values())
+        minutes, seconds = divmod(int(round(self.wall_seconds)), 60)
+        hours, minutes = divmod(minutes, 60)
+        lines += [
+            f"  search calls     {self.search_calls:>7}",
+            f"Projected tokens: {input_tokens + output_tokens:,.0f} "
+            f"({input_tokens:,.0f} input, {output_tokens:,.0f} output)",
+            f"Projected cost: ${self.cost:,.2f}",
+            f"Projected wall clock: {hours}h {minutes:02d}m {seconds:02d}s",
+        ]
+        return "\n".join(lines)
+
+def _per_call(history: dict, stage: str, name: str, default: float) -> float:
+    counts = history["stages"].get(stage) or {}
+    return counts[name] / counts["calls"] if counts.get("calls") else default
+
+def _text(value) -> str:
+    return "" if pd.isna(value) else str(value)
+
+def estimate_run(df: pd.DataFrame, prompts: Dict[str, StagePrompt], provider: str, history: dict,
+                 searches_per_entry: int, search_pause: float, context_budget: int, search_budget: int,
+                 max_iterations: int, concurrency: int = 1, entries: int = None) -> RunEstimate:
+    """Project tokens, cost and wall-clock time for processing entries rows
+
+    df holds the rows whose prompts are rendered: all of them, or an even sample
+    when entries is larger, in which case input tokens are scaled up to entries.
+    """
+    run_entries = len(df) if entries is None else entries
+    sample_scale = run_entries / len(df) if len(df) else 0.0
+    entries = history["entries"]
+    retry_rate = history["errors"] / entries if entries else 0.0
+    generation_calls = (history["stages"].get("generation") or {}).get("calls")
+    iterations = generation_calls / entries if entries and generation_calls else DEFAULT_ITERATIONS
+    iterations = min(iterations, max_iterations)
+    scale = {"intent_analysis": 1.0, "research": 1.0, "generation": iterations, "quality_control": iterations}
+
+    # Sizes of model outputs and budgeted context that the prompts will carry
+    output_tokens = {stage: _per_call(history, stage, "output_tokens", DEFAULT_OUTPUT_TOKENS[stage])
+                     for stage in STAGES}
+    filled = {
+        "intent_analysis": 0,
+        "research": output_tokens["intent_analysis"] + search_budget,
+        "generation": output_tokens["intent_analysis"] + context_budget,
+        "quality_control": output_tokens["intent_analysis"] + output_tokens["generation"],
+    }
+    empty = dict.fromkeys(["intent_analysis", "research_output", "primary_focus", "scope_considerations",
+                           "hedgehog_research_areas", "verification_needs", "docs_results",
+                           "blog_results", "additional_results", "keywords"], "")
+
+    estimate = RunEstimate(provider, run_entries, concurrency, retry_rate=retry_rate, iterations=iterations,
+                           from_history=bool(entries))
+    for stage in STAGES:
+        prompt = prompts[stage]
+        instruction_tokens = count_tokens(prompt.instructions)
+        input_tokens = 0
+        for title, subtitle, body in zip(df["Article title"], df["Article subtitle"], df["Article body"]):
+            values = dict(empty, title=_text(title))
+            if stage == "intent_analysis":
+                values.update(subtitle=_text(subtitle), body=_text(body))
+            else:
+                # QC sees the generated entry, which filled accounts for
+                values.update(subtitle="", body="")
+            input_tokens += instruction_tokens + count_tokens(prompt.inputs.format(**values)) + filled[stage]
+        input_tokens *= sample_scale
+
+        counts = history["stages"].get(stage) or {}
+        cached_ratio = counts["cached_tokens"] / counts["input_tokens"] if counts.get("input_tokens") else 0.0
+        factor = scale[stage] * (1 + retry_rate)
+        estimate.stages[stage] = StageEstimate(
+            calls=run_entries * factor,
+            input_tokens=input_tokens * factor,
+            cached_tokens=input_tokens * factor * cached_ratio,
+            output_tokens=run_entries * factor * output_tokens[stage],
+            seconds=run_entries * factor * _per_call(history, stage, "seconds", DEFAULT_CALL_SECONDS[stage]),
+        )
+
+    # searches_per_entry is what the research path is configured to make; past runs say what it did
+    searches = (history["stages"].get(SEARCH_STAGE) or {}).get("calls")
+    if entries and searches is not None:
+        searches_per_entry = searches / entries
+    estimate.search_calls = int(round(run_entries * searches_per_entry * (1 + retry_rate)))
+    search_seconds = _per_call(history, SEARCH_STAGE, "seconds", DEFAULT_SEARCH_SECONDS)
+    estimate.search_seconds = estimate.search_calls * (search_seconds + search_pause)
+    return estimate
+
+# Example usage:
+"""
+history = load_run_stats("kb_run_stats.json")
+estimate = estimate_run(df.head(3), prompts, "openai", history, searches_per_entry=7, search_pause=0.5,
+                        context_budget=2000, search_budget=3000, max_iterations=3, concurrency=4)
+print(estimate.summary())
+"""
@@ -0,0 +1,188 @@
+"""
+Streaming converter between HubSpot KB CSV exports and the kb_entries schema.
+Rows are read, validated and written one at a time, so exports with hundreds
+of thousands of multi-line HTML bodies convert in bounded memory.
+"""
+
+import argparse
+import csv
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from kb_db import KB_ENTRY_COLUMNS
+
+# HubSpot export column order
+HUBSPOT_HEADERS = list(KB_ENTRY_COLUMNS.values())
+
+# kb_entries columns written on import, including the app's internal fields
+KB_ENTRIES_HEADERS = list(KB_ENTRY_COLUMNS) + ["internal_status", "visibility"]
+
+# Enums enforced by the app layer (see prisma/schema.prisma)
+CATEGORIES = ["Glossary", "FAQs", "Getting started", "Troubleshooting", "General", "Reports", "Integrations"]
+STATUSES = ["DRAFT", "PUBLISHED"]
+
+# HubSpot uses language codes, the app stores language names
+LANGUAGE_NAMES = {
+    "en": "English",
+    "en-us": "English",
+    "en-gb": "English",
+    "de": "German",
+    "es": "Spanish",
+    "fr": "French",
+    "it": "Italian",
+    "ja": "Japanese",
+    "ko": "Korean",
+    "nl": "Dutch",
+    "pt": "Portuguese",
+    "pt-br": "Portuguese",
+    "zh": "Chinese",
+    "zh-cn": "Chinese",
+}
+DEFAULT_LANGUAGE = "English"
+
+@dataclass
+class ConversionError:
+    line: int  # Line in the input file where the row starts
+    title: str
+    error: str
+
+def normalize_language(language: str) -> Optional[str]:
+    """Map a HubSpot language code or name to the name stored in kb_entries."""
+    language = (language or "").strip()
+    if not language:
+        return DEFAULT_LANGUAGE
+    code = language.lower().replace("_", "-")
+    if code in LANGUAGE_NAMES:
+        return LANGUAGE_NAMES[code]
+    for name in LANGUAGE_NAMES.values():
+        if name.lower() == code:
+            return name
+    return None
+
+def map_hubspot_status(status: str) -> Tuple[str, str]:
+    """Map a HubSpot status to the app's (internal_status, visibility)."""
+    if status == "PUBLISHED":
+        return "Approved", "Public"
+    return "Draft", "Private"
+
+def _read_rows(input_file) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (start line, row) pairs from a CSV file object."""
+    # Article bodies routinely exceed the csv module's default field limit
+    csv.field_size_limit(sys.maxsize)
+    reader = csv.DictReader(input_file)
+    start_line = reader.line_num + 1
+    for row in reader:
+        yield start_line, row
+        start_line = reader.line_num + 1
+
+def hubspot_to_kb_entries(rows: Iterable[Tuple[int, Dict[str, str]]],
+                          errors: List[ConversionError]) -> Iterator[Dict[str, object]]:
+    """Convert HubSpot export rows to kb_entries rows, skipping invalid ones."""
+    seen_urls = set()
+    for line, row in rows:
+        entry = {column: (row.get(header) or "").strip() for column, header in KB_ENTRY_COLUMNS.items()}
+        title = entry["article_title"]
+
+        # Skip blank rows, as the app's importer does
+        if not title and not entry["article_body"] and not entry["category"]:
+            continue
+
+        problems = [f"missing {field}" for field in ("article_title", "article_body", "category", "article_url")
+                    if not entry[field]]
+        if entry["category"] and entry["category"] not in CATEGORIES:
+            problems.append(f"invalid category \"{entry['category']}\"")
+
+        entry["status"] = entry["status"].upper() or "DRAFT"
+        if entry["status"] not in STATUSES:
+            problems.append(f"invalid status \"{entry['status']}\"")
+
+        language = normalize_language(entry["article_language"])
+        if language is None:
+            problems.append(f"unknown language \"{entry['article_language']}\"")
+        entry["article_language"] = language
+
+        if entry["article_url"] in seen_urls:
+            problems.append(f"duplicate article URL {entry['article_url']}")
+
+        if problems:
+            errors.append(ConversionError(line, title, "; ".join(problems)))
+            continue
+
+        seen_urls.add(entry["article_url"])
+        entry["knowledge_base_name"] = entry["knowledge_base_name"] or "KB"
+        entry["archived"] = "true" if entry["archived"].lower() == "true" else "false"
+        entry["internal_status"], entry["visibility"] = map_hubspot_status(entry["status"])
+        yield entry
+
+def kb_entries_to_hubspot(rows: Iterable[Tuple[int, Dict[str, str]]],
+                          errors: List[ConversionError]) -> Iterator[Dict[str, str]]:
+    """Convert kb_entries rows to HubSpot export rows, skipping invalid ones."""
+    for line, row in rows:
+        title = row.get("article_title") or ""
+        category = row.get("category") or ""
+        if category not in CATEGORIES:
+            errors.append(ConversionError(line, title, f"invalid category \"{category}\""))
+            continue
+
+        language = normalize_language(row.get("article_language") or "")
+        if language is None:
+            errors.append(ConversionError(line, title, f"unknown language \"{row.get('article_language')}\""))
+            continue
+
+        status = (row.get("status") or "DRAFT").upper()
+        if status not in STATUSES:
+            errors.append(ConversionError(line, title, f"invalid status \"{status}\""))
+            continue
+
+        hubspot_row = {header: row.get(column) or "" for column, header in KB_ENTRY_COLUMNS.items()}
+        hubspot_row["Knowledge base name"] = hubspot_row["Knowledge base name"] or "KB"
+        hubspot_row["Article language"] = language
+        hubspot_row["Status"] = status
+        hubspot_row["Archived"] = "true" if str(row.get("archived")).lower() in ("true", "t", "1") else "false"
+        yield hubspot_row
+
+def convert(direction: str, input_path: str, output_path: str) -> Tuple[int, List[ConversionError]]:
+    """Stream-convert input_path to output_path; returns (rows written, errors)."""
+    errors: List[ConversionError] = []
+    if direction == "import":
+        converter, headers = hubspot_to_kb_entries, KB_ENTRIES_HEADERS
+    else:
+        converter, headers = kb_entries_to_hubspot, HUBSPOT_HEADERS
+
+    written = 0
+    with open(input_path, newline="", encoding="utf-8-sig") as input_file, \
+            open(output_path, "w", newline="", encoding="utf-8") as output_file:
+        # Match the app's export: every field quoted, CRLF line endings
+        writer = csv.DictWriter(output_file, fieldnames=headers,
+                                quoting=csv.QUOTE_ALL, lineterminator="\r\n")
+        writer.writeheader()
+        for row in converter(_read_rows(input_file), errors):
+            writer.writerow(row)
+            written += 1
+    return written, errors
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert between HubSpot KB CSV exports and the kb_entries schema')
+    parser.add_argument('direction', choices=['import', 'export'],
+                       help='import: HubSpot CSV -> kb_entries CSV; export: kb_entries CSV -> HubSpot CSV')
+    parser.add_argument('input_file', help='Input CSV file')
+    parser.add_argument('output_file', help='Output CSV file')
+    parser.add_argument('--errors', help='Write rejected rows to this CSV file')
+
+    args = parser.parse_args()
+
+    written, errors = convert(args.direction, args.input_file, args.output_file)
+
+    if args.errors:
+        with open(args.errors, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(["line", "title", "error"])
+            for error in errors:
+                writer.writerow([error.line, error.title, error.error])
+
+    print(f"Converted {written} rows, rejected {len(errors)}")
+    for error in errors[:20]:
+        print(f"  line {error.line} ({error.title or 'untitled'}): {error.error}")
+
+if __name__ == "__main__":
+    main()
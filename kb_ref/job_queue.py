@@ -0,0 +1,256 @@
+"""
+SQLite-backed job queue for long-running KB processor workers.
+Jobs name an article URL plus an operation. Workers lease the highest-priority
+available job, and a lease that runs out makes the job available again. An
+article that is queued again while a worker holds it gets a follow-up job, which
+waits for the running one to finish. Failed jobs are retried with exponential backoff and moved to the dead letter state
+once they exhaust their attempts. Any number of worker processes can drain one
+queue file concurrently with no external broker.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Operations a worker knows how to run
+OPERATIONS = ["process"]
+
+# Job lifecycle states
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    article_url TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, available_at);
+DROP INDEX IF EXISTS jobs_pending_article;
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_queued_article
+    ON jobs (article_url, operation) WHERE status = 'queued';
+"""
+
+@dataclass
+class Job:
+    id: int
+    article_url: str
+    operation: str
+    payload: Dict
+    priority: int
+    attempts: int
+    max_attempts: int
+
+class JobQueue:
+    def __init__(self, path: str, retry_backoff: float = 30, max_backoff: float = 3600):
+        """Open (or create) the queue database"""
+        self.path = path
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(QUEUE_SCHEMA)
+
+    def enqueue(self, article_url: str, operation: str = "process", payload: Dict = None,
+                priority: int = 0, max_attempts: int = 3) -> int:
+        """Add a job and return its id
+
+        An entry already waiting for the same operation is not queued twice;
+        its priority is raised instead and its payload replaced when one is given.
+        An entry a worker is running gets a follow-up job instead, so the new
+        payload is not lost when the running job completes.
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unsupported operation: {operation}")
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT id FROM jobs WHERE article_url = ? AND operation = ? AND status = ?",
+                (article_url, operation, QUEUED)
+            ).fetchone()
+            if row:
+                job_id = row[0]
+                self.conn.execute(
+                    "UPDATE jobs SET priority = MAX(priority, ?), payload = COALESCE(?, payload), "
+                    "updated_at = ? WHERE id = ?",
+                    (priority, json.dumps(payload) if payload is not None else None, now, job_id)
+                )
+            else:
+                job_id = self.conn.execute(
+                    "INSERT INTO jobs (article_url, operation, payload, priority, max_attempts, "
+                    "available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (article_url, operation, json.dumps(payload or {}), priority, max_attempts, now, now, now)
+                ).lastrowid
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: float = 900) -> Optional[Job]:
+        """Claim the highest-priority available job for lease_seconds, or None if there is none"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Workers that died mid-job leave expired leases; a queued follow-up carries a newer
+            # payload, so it replaces the retry
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, last_error = 'lease expired; superseded', "
+                "updated_at = ? WHERE status = ? AND lease_expires_at <= ? AND EXISTS (SELECT 1 FROM jobs "
+                "newer WHERE newer.article_url = jobs.article_url AND newer.operation = jobs.operation "
+                "AND newer.status = ?)",
+                (DONE, now, LEASED, now, QUEUED)
+            )
+            # Otherwise an expired lease counts as a failed attempt
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, last_error = 'lease expired', updated_at = ? "
+                "WHERE status = ? AND lease_expires_at <= ? AND attempts >= max_attempts",
+                (DEAD, now, LEASED, now)
+            )
+            row = self.conn.execute(
+                "SELECT id, article_url, operation, payload, priority, attempts, max_attempts FROM jobs "
+                "WHERE ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?)) "
+                # A follow-up waits until no worker holds a live lease on the same article
+                "AND NOT EXISTS (SELECT 1 FROM jobs running WHERE running.article_url = jobs.article_url "
+                "AND running.operation = jobs.operation AND running.status = ? AND running.lease_expires_at > ?) "
+                "ORDER BY priority DESC, available_at, id LIMIT 1",
+                (QUEUED, now, LEASED, now, LEASED, now)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                (LEASED, worker_id, now + lease_seconds, now, row[0])
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return Job(id=row[0], article_url=row[1], operation=row[2], payload=json.loads(row[3]),
+                   priority=row[4], attempts=row[5] + 1, max_attempts=row[6])
+
+    def extend_lease(self, job: Job, worker_id: str, lease_seconds: float = 900) -> bool:
+        """Push out the lease on a job this worker still holds"""
+        now = time.time()
+        cursor = self.conn.execute(
+            "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+            (now + lease_seconds, now, job.id, LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job: Job, worker_id: str) -> bool:
+        """Mark a leased job done; False if the lease was lost to another worker"""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = ?, lease_owner = NULL, last_error = NULL, updated_at = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (DONE, time.time(), job.id, LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job: Job, worker_id: str, error: str) -> bool:
+        """Schedule a retry with exponential backoff, or dead-letter the job once out of attempts
+
+        A queued follow-up for the same article replaces the retry, and the job is closed as done.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if job.attempts >= job.max_attempts:
+                status, available_at = DEAD, now
+            else:
+                delay = min(self.retry_backoff * 2 ** (job.attempts - 1), self.max_backoff)
+                status, available_at = QUEUED, now + delay
+                follow_up = self.conn.execute(
+                    "SELECT 1 FROM jobs WHERE article_url = ? AND operation = ? AND status = ?",
+                    (job.article_url, job.operation, QUEUED)
+                ).fetchone()
+                if follow_up:
+                    status, error = DONE, f"{error}; superseded"
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, lease_owner = NULL, lease_expires_at = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (status, available_at, error, now, job.id, LEASED, worker_id)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def requeue_dead(self) -> int:
+        """Give dead-lettered jobs a fresh set of attempts, once per article and operation"""
+        now = time.time()
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? "
+            "WHERE id IN (SELECT MAX(id) FROM jobs WHERE status = ? GROUP BY article_url, operation) "
+            "AND NOT EXISTS (SELECT 1 FROM jobs pending WHERE pending.article_url = jobs.article_url "
+            "AND pending.operation = jobs.operation AND pending.status IN (?, ?))",
+            (QUEUED, now, now, DEAD, QUEUED, LEASED)
+        )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Count jobs in each state"""
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        for status, count in self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def close(self):
+        """Close the queue database"""
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the KB processor job queue')
+    parser.add_argument('--queue', default='kb_jobs.sqlite', help='Queue database file (default: kb_jobs.sqlite)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Queue a job for an article')
+    enqueue_parser.add_argument('article_url')
+    enqueue_parser.add_argument('--operation', choices=OPERATIONS, default='process')
+    enqueue_parser.add_argument('--priority', type=int, default=0, help='Higher runs first (default: 0)')
+    enqueue_parser.add_argument('--max-attempts', type=int, default=3)
+    enqueue_parser.add_argument('--payload', help="JSON entry fields to process, or '-' to read them from stdin")
+
+    subparsers.add_parser('stats', help='Show job counts by state')
+    subparsers.add_parser('requeue-dead', help='Retry dead-lettered jobs')
+
+    args = parser.parse_args()
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == 'enqueue':
+            payload = None
+            if args.payload:
+                payload = json.loads(sys.stdin.read() if args.payload == '-' else args.payload)
+            job_id = queue.enqueue(args.article_url, args.operation, payload, args.priority, args.max_attempts)
+            print(json.dumps({"job_id": job_id}))
+        elif args.command == 'stats':
+            print(json.dumps(queue.stats()))
+        else:
+            print(f"Requeued {queue.requeue_dead()} jobs")
+    finally:
+        queue.close()
+
+if __name__ == "__main__":
+    main()
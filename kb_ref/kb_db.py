@@ -0,0 +1,200 @@
+"""
+Direct kb_entries database access for the KB processor.
+Reads entries through a server-side cursor and writes processed results back
+with batched upserts keyed on article_url (multi-row INSERTs on PostgreSQL),
+avoiding CSV round-trips. Works
+against the app's PostgreSQL database or a SQLite stand-in for local testing.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# kb_entries columns and the HubSpot export headers used by the processor
+KB_ENTRY_COLUMNS = {
+    "knowledge_base_name": "Knowledge base name",
+    "article_title": "Article title",
+    "article_subtitle": "Article subtitle",
+    "article_language": "Article language",
+    "article_url": "Article URL",
+    "article_body": "Article body",
+    "category": "Category",
+    "subcategory": "Subcategory",
+    "keywords": "Keywords",
+    "last_modified_date": "Last modified date",
+    "status": "Status",
+    "archived": "Archived",
+}
+
+# Columns a processing run updates; everything else is left as the app set it
+UPSERT_COLUMNS = ["article_title", "article_subtitle", "article_body", "keywords"]
+
+# Mirrors prisma/migrations/*_add_kb_entries_table for the SQLite stand-in
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kb_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    knowledge_base_name TEXT NOT NULL DEFAULT 'KB',
+    article_title TEXT NOT NULL,
+    article_subtitle TEXT,
+    article_language TEXT NOT NULL DEFAULT 'English',
+    article_url TEXT NOT NULL UNIQUE,
+    article_body TEXT NOT NULL,
+    category TEXT NOT NULL,
+    subcategory TEXT,
+    keywords TEXT,
+    last_modified_date TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'DRAFT',
+    archived BOOLEAN NOT NULL DEFAULT 0,
+    internal_status TEXT NOT NULL DEFAULT 'Draft',
+    visibility TEXT NOT NULL DEFAULT 'Private',
+    notes TEXT,
+    metadata TEXT DEFAULT '{}',
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT NOT NULL
+)
+"""
+
+class KbDatabase:
+    def __init__(self, database_url: str):
+        """Connect to postgresql://... or sqlite:///path databases."""
+        self.database_url = database_url
+        if database_url.startswith("sqlite:///"):
+            self.dialect = "sqlite"
+            self.conn = sqlite3.connect(database_url[len("sqlite:///"):])
+            self.conn.execute(SQLITE_SCHEMA)
+            self.placeholder = "?"
+        elif database_url.startswith(("postgresql://", "postgres://")):
+            import psycopg2  # Only needed when talking to PostgreSQL
+
+            self.dialect = "postgresql"
+            self.conn = psycopg2.connect(database_url)
+            self.placeholder = "%s"
+        else:
+            raise ValueError(f"Unsupported database URL: {database_url}")
+
+    def read_entries(self, batch_size: int = 500,
+                     include_archived: bool = False) -> Iterator[Dict[str, str]]:
+        """Stream kb_entries rows keyed by their HubSpot export headers."""
+        columns = list(KB_ENTRY_COLUMNS)
+        query = f"SELECT {', '.join(columns)} FROM kb_entries"
+        if not include_archived:
+            query += " WHERE NOT archived"
+        query += " ORDER BY id"
+
+        if self.dialect == "postgresql":
+            # Named cursors are server-side: rows arrive batch_size at a time
+            cursor = self.conn.cursor(name="kb_entries_reader")
+            cursor.itersize = batch_size
+        else:
+            cursor = self.conn.cursor()
+            cursor.arraysize = batch_size
+
+        try:
+            cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {KB_ENTRY_COLUMNS[column]: value for column, value in zip(columns, row)}
+        finally:
+            cursor.close()
+
+    def upsert_entries(self, entries: Iterable[Tuple[Dict[str, str], Dict]],
+                       batch_size: int = 500) -> int:
+        """Upsert (row, metadata) pairs on article_url, merging metadata.
+
+        Rows use HubSpot export headers, as in the processor's DataFrame.
+        last_modified_date only moves when the title, subtitle, body or
+        keywords change, and rows whose content and metadata are unchanged
+        are not touched at all. Returns the number of rows sent.
+        """
+        p = self.placeholder
+        columns = (
+            ["article_url", "category", "last_modified_date", "updated_at", "metadata"]
+            + UPSERT_COLUMNS
+        )
+        if self.dialect == "postgresql":
+            metadata_value = f"CAST({p} AS JSONB)"
+            merged_metadata = "COALESCE(kb_entries.metadata, '{}'::jsonb) || EXCLUDED.metadata"
+            distinct = "IS DISTINCT FROM"
+        else:
+            metadata_value = p
+            merged_metadata = "json_patch(COALESCE(kb_entries.metadata, '{}'), excluded.metadata)"
+            distinct = "IS NOT"
+
+        content_changed = " OR ".join(
+            f"kb_entries.{column} {distinct} EXCLUDED.{column}" for column in UPSERT_COLUMNS
+        )
+        values = [metadata_value if column == "metadata" else p for column in columns]
+        updates = [f"{column} = EXCLUDED.{column}" for column in UPSERT_COLUMNS]
+        updates += [
+            f"last_modified_date = CASE WHEN {content_changed} "
+            "THEN EXCLUDED.last_modified_date ELSE kb_entries.last_modified_date END",
+            "updated_at = EXCLUDED.updated_at",
+            f"metadata = {merged_metadata}",
+        ]
+        upsert = (
+            f"ON CONFLICT (article_url) DO UPDATE SET {', '.join(updates)} "
+            f"WHERE {content_changed} OR kb_entries.metadata {distinct} {merged_metadata}"
+        )
+        insert = f"INSERT INTO kb_entries ({', '.join(columns)}) VALUES "
+        if self.dialect == "postgresql":
+            # execute_values sends each batch as one multi-row INSERT instead of a round trip per row
+            from psycopg2.extras import execute_values
+
+            template = f"({', '.join(values)})"
+
+            def write(cursor, batch):
+                execute_values(cursor, f"{insert}%s {upsert}", batch, template=template, page_size=batch_size)
+        else:
+            statement = f"{insert}({', '.join(values)}) {upsert}"
+
+            def write(cursor, batch):
+                cursor.executemany(statement, batch)
+
+        written = 0
+        batch: List[tuple] = []
+        cursor = self.conn.cursor()
+        try:
+            for row, metadata in entries:
+                now = datetime.now().isoformat()
+                batch.append(
+                    (row[KB_ENTRY_COLUMNS["article_url"]],
+                     row.get(KB_ENTRY_COLUMNS["category"]) or "General",
+                     now, now, json.dumps(metadata))
+                    + tuple(_clean(row.get(KB_ENTRY_COLUMNS[column])) for column in UPSERT_COLUMNS)
+                )
+                if len(batch) >= batch_size:
+                    write(cursor, batch)
+                    written += len(batch)
+                    batch = []
+            if batch:
+                write(cursor, batch)
+                written += len(batch)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return written
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+def _clean(value) -> Optional[str]:
+    """Map pandas missing values to NULL."""
+    if value is None or value != value:  # NaN is the only value not equal to itself
+        return None
+    return value
+
+# Example usage:
+"""
+db = KbDatabase("sqlite:///kb_entries.db")
+for entry in db.read_entries():
+    print(entry["Article title"])
+db.upsert_entries([(row, {"kb_processor": {"processing_status": "processed"}})])
+"""
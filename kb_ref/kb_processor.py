@@ -1,30 +1,51 @@
 import pandas as pd
-from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
-from langchain.chains import LLMChain
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import PromptTemplate
 import os
 from datetime import datetime
-from dotenv import load_dotenv
 import re
 import argparse
 import json
 import time
-import hashlib
 import uuid
+import signal
+import socket
+import copy
+from collections import Counter
+from typing import TYPE_CHECKING
+from kb_db import KbDatabase, KB_ENTRY_COLUMNS
+from prompt_assembly import SEARCH_STAGE, PromptCacheStats, PromptRunner, StagePrompt
+from context_budget import (
+    DEFAULT_CONTEXT_BUDGET, DEFAULT_SEARCH_BUDGET, SEARCH_RESULT_KEYS, budget_research, budget_search_results
+)
+# Sibling modules that only some modes need (scheduler, estimator, profiler, job queue,
+# blob store, sharding, service) are imported where they are used
+if TYPE_CHECKING:
+    from job_queue import Job, JobQueue
+    from scheduler import RunLimits
 
-# Load environment variables
-load_dotenv()
+# Search domains
+DOCS_SEARCH_DOMAINS = [
+    "docs.githedgehog.com",
+    "githedgehog.com/docs",
+    "github.com/hedgehog"
+]
+BLOG_SEARCH_DOMAINS = [
+    "githedgehog.com/blog",
+    "githedgehog.com/news",
+    "githedgehog.com/resources"
+]
 
-# Define the prompt templates
-INTENT_ANALYSIS_PROMPT = """You are an expert technical analyst evaluating knowledge base entries. Your task is to analyze the intent and context of terms to ensure accurate representation.
+# Pause after each search, in seconds
+SEARCH_RATE_LIMIT = 0.5
 
-CONTENT TO ANALYZE:
-Title: {title}
-Subtitle: {subtitle}
-Body: {body}
+# Searches per entry: docs and blog domains for the title plus one open-ended additional search
+SEARCHES_PER_ENTRY = len(DOCS_SEARCH_DOMAINS) + len(BLOG_SEARCH_DOMAINS) + 1
+
+# QC passes allowed per entry before it is accepted as max_iterations_reached
+MAX_ITERATIONS = 3
+
+# Define the prompt templates
+# Static instructions come first and per-entry inputs last, so providers can cache the prefix
+INTENT_ANALYSIS_PROMPT = StagePrompt(stage="intent_analysis", instructions="""You are an expert technical analyst evaluating knowledge base entries. Your task is to analyze the intent and context of terms to ensure accurate representation. The content to analyze follows these instructions.
 
 ANALYSIS REQUIREMENTS:
 1. Term Classification
@@ -70,14 +91,12 @@ OUTPUT FORMAT:
         "hedgehog_aspects_to_research": ["string"]
     }
 }
-</analysis>"""
-
-CONTENT_GENERATION_PROMPT = """You are an expert technical educator enhancing Hedgehog's knowledge base. Create content that flows naturally without explicit sections or headers.
-
-CONTEXT:
+</analysis>""", inputs="""CONTENT TO ANALYZE:
 Title: {title}
-Research Results: {research_output}
-Intent Analysis: {intent_analysis}
+Subtitle: {subtitle}
+Body: {body}""")
+
+CONTENT_GENERATION_PROMPT = StagePrompt(stage="generation", instructions="""You are an expert technical educator enhancing Hedgehog's knowledge base. Create content that flows naturally without explicit sections or headers. The context for the entry follows these instructions.
 
 REQUIREMENTS:
 
@@ -129,16 +148,12 @@ Format your response exactly like this:
 <keywords>
 [Comma-separated technical keywords]
 </keywords>
-</entry>"""
-
-QUALITY_CONTROL_PROMPT = """You are a technical documentation expert validating a KB entry. Evaluate the content against our quality standards, paying special attention to proper scope, narrative flow, and Hedgehog integration.
-
-CONTENT TO EVALUATE:
+</entry>""", inputs="""CONTEXT:
 Title: {title}
-Subtitle: {subtitle}
-Body: {body}
-Keywords: {keywords}
-Intent Analysis: {intent_analysis}
+Research Results: {research_output}
+Intent Analysis: {intent_analysis}""")
+
+QUALITY_CONTROL_PROMPT = StagePrompt(stage="quality_control", instructions="""You are a technical documentation expert validating a KB entry. Evaluate the content against our quality standards, paying special attention to proper scope, narrative flow, and Hedgehog integration. The content to evaluate follows these instructions.
 
 EVALUATION CRITERIA:
 
@@ -205,22 +220,14 @@ OUTPUT FORMAT:
     "notes": "string"
 }
 </validation_result>
-</evaluation>"""
-
-RESEARCH_PROMPT = """You are an expert technical researcher focusing on finding meaningful connections between technical concepts and Hedgehog's architecture, features, and capabilities.
-
-CONTEXT:
+</evaluation>""", inputs="""CONTENT TO EVALUATE:
 Title: {title}
-Intent Analysis: {intent_analysis}
-Primary Focus: {primary_focus}
-Scope Considerations: {scope_considerations}
-Hedgehog Research Areas: {hedgehog_research_areas}
-Verification Needs: {verification_needs}
+Subtitle: {subtitle}
+Body: {body}
+Keywords: {keywords}
+Intent Analysis: {intent_analysis}""")
 
-SEARCH RESULTS:
-Documentation Results: {docs_results}
-Blog Results: {blog_results}
-Additional Results: {additional_results}
+RESEARCH_PROMPT = StagePrompt(stage="research", instructions="""You are an expert technical researcher focusing on finding meaningful connections between technical concepts and Hedgehog's architecture, features, and capabilities. The context and search results follow these instructions.
 
 RESEARCH TASKS:
 
@@ -304,20 +311,28 @@ OUTPUT FORMAT:
 <connection_summary>
 [Concise summary of the most relevant and confident connections found]
 </connection_summary>
-</research_results>"""
+</research_results>""", inputs="""CONTEXT:
+Title: {title}
+Intent Analysis: {intent_analysis}
+Primary Focus: {primary_focus}
+Scope Considerations: {scope_considerations}
+Hedgehog Research Areas: {hedgehog_research_areas}
+Verification Needs: {verification_needs}
+
+SEARCH RESULTS:
+Documentation Results: {docs_results}
+Blog Results: {blog_results}
+Additional Results: {additional_results}""")
 
 class IntentAnalysisAgent:
-    def __init__(self, llm):
-        self.llm = llm
-        self.prompt = PromptTemplate(
-            input_variables=["title", "subtitle", "body"],
-            template=INTENT_ANALYSIS_PROMPT
-        )
-        self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
+    def __init__(self, runner: PromptRunner):
+        self.runner = runner
+        self.prompt = INTENT_ANALYSIS_PROMPT
     
     def analyze(self, title: str, subtitle: str, body: str) -> dict:
         """Analyze the intent and context of a KB entry"""
-        response = self.chain.run(
+        response = self.runner.run(
+            self.prompt,
             title=title,
             subtitle=subtitle,
             body=body
@@ -333,19 +348,20 @@ class IntentAnalysisAgent:
         return None
 
 class ResearchAgent:
-    def __init__(self, llm):
-        self.llm = llm
-        self.search = DuckDuckGoSearchAPIWrapper()
-        self.prompt = PromptTemplate(
-            input_variables=[
-                "title", "intent_analysis", "primary_focus", 
-                "scope_considerations", "hedgehog_research_areas",
-                "verification_needs", "docs_results", "blog_results",
-                "additional_results"
-            ],
-            template=RESEARCH_PROMPT
-        )
-        self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
+    def __init__(self, runner: PromptRunner, search_budget: int = DEFAULT_SEARCH_BUDGET):
+        self.runner = runner
+        # Token budget for all search results in one research prompt
+        self.search_budget = search_budget
+        self._search = None
+        self.prompt = RESEARCH_PROMPT
+
+    @property
+    def search(self):
+        """DuckDuckGo search wrapper, imported and created on first search"""
+        if self._search is None:
+            from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+            self._search = DuckDuckGoSearchAPIWrapper()
+        return self._search
 
     def _get_architectural_patterns(self, term: str) -> list:
         """Identify relevant architectural patterns for Hedgehog architecture"""
@@ -406,21 +422,22 @@ class ResearchAgent:
         
         return [f"{term} {pattern}" for pattern in base_patterns]
 
+    def _run_search(self, query: str) -> str:
+        """Run one web search, recording it (excluding the rate-limit pause) in the runner's stats"""
+        started = time.monotonic()
+        try:
+            return self.search.run(query)
+        finally:
+            self.runner.stats.record(SEARCH_STAGE, None, time.monotonic() - started)
+
     def _execute_search(self, query: str) -> list:
         """Execute a search with error handling and rate limiting"""
         try:
-            # Define search domains
-            domains = [
-                "docs.githedgehog.com",
-                "githedgehog.com/docs",
-                "github.com/hedgehog"
-            ]
-            
             results = []
-            for domain in domains:
+            for domain in DOCS_SEARCH_DOMAINS:
                 try:
                     # Add domain-specific search
-                    domain_results = self.search.run(f"site:{domain} {query}")
+                    domain_results = self._run_search(f"site:{domain} {query}")
                     
                     # Process and structure results
                     if domain_results:
@@ -433,7 +450,7 @@ class ResearchAgent:
                         })
                     
                     # Basic rate limiting
-                    time.sleep(0.5)
+                    time.sleep(SEARCH_RATE_LIMIT)
                     
                 except Exception as domain_error:
                     print(f"Error searching {domain}: {str(domain_error)}")
@@ -448,18 +465,11 @@ class ResearchAgent:
     def _execute_blog_search(self, query: str) -> list:
         """Execute a blog search with error handling"""
         try:
-            # Define blog-specific domains
-            blog_domains = [
-                "githedgehog.com/blog",
-                "githedgehog.com/news",
-                "githedgehog.com/resources"
-            ]
-            
             results = []
-            for domain in blog_domains:
+            for domain in BLOG_SEARCH_DOMAINS:
                 try:
                     # Add domain-specific search
-                    blog_results = self.search.run(f"site:{domain} {query}")
+                    blog_results = self._run_search(f"site:{domain} {query}")
                     
                     # Process and structure results
                     if blog_results:
@@ -472,7 +482,7 @@ class ResearchAgent:
                         })
                     
                     # Basic rate limiting
-                    time.sleep(0.5)
+                    time.sleep(SEARCH_RATE_LIMIT)
                     
                 except Exception as domain_error:
                     print(f"Error searching {domain}: {str(domain_error)}")
@@ -484,12 +494,39 @@ class ResearchAgent:
             print(f"Blog search error for query '{query}': {str(e)}")
             return []
 
+    def _search_docs(self, title: str, primary_focus: str = None) -> list:
+        """Search the documentation and code domains, narrowed by the intent's primary focus"""
+        return self._execute_search(f"{title} {primary_focus}" if primary_focus else title)
+
+    def _search_blog(self, title: str) -> list:
+        """Search the blog, news and resources domains"""
+        return self._execute_blog_search(title)
+
+    def _search_additional(self, title: str, domain: str = None) -> list:
+        """One open web search for Hedgehog in the term's technical domain"""
+        query = " ".join(part for part in (title, domain, "Hedgehog") if part)
+        try:
+            content = self._run_search(query)
+            time.sleep(SEARCH_RATE_LIMIT)
+        except Exception as e:
+            print(f"Additional search error for query '{query}': {str(e)}")
+            return []
+        if not content:
+            return []
+        return [{
+            "query": query,
+            "domain": "web",
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            "source_type": "additional"
+        }]
+
     def _get_result_id(self, result: dict) -> str:
         """Generate a unique identifier for a search result"""
         try:
             # Create unique ID based on domain and content hash
-            content_hash = hashlib.md5(result["content"].encode()).hexdigest()
-            return f"{result['domain']}:{content_hash}"
+            from blob_store import result_id
+            return result_id(result)
         except Exception as e:
             print(f"Error generating result ID: {str(e)}")
             return str(uuid.uuid4())  # Fallback to random UUID
@@ -554,20 +591,32 @@ class ResearchAgent:
             blog_results = self._search_blog(title)
             additional_results = self._search_additional(title, params.get("domain"))
             
-            # Run research chain
-            result = self.chain.run({
-                "title": title,
-                "intent_analysis": intent_analysis,
-                "primary_focus": params.get("primary_focus"),
-                "scope_considerations": params.get("scope_considerations"),
-                "hedgehog_research_areas": params.get("hedgehog_research_areas"),
-                "verification_needs": params.get("verification_needs"),
-                "docs_results": docs_results,
-                "blog_results": blog_results,
-                "additional_results": additional_results
-            })
-            
-            return self._parse_research_results(result)
+            # Deduplicate, rank and trim the raw snippets; the budget is shared by the three result sets
+            share = self.search_budget // 3
+            
+            # Run research prompt
+            result = self.runner.run(
+                self.prompt,
+                title=title,
+                intent_analysis=intent_analysis,
+                primary_focus=params.get("primary_focus"),
+                scope_considerations=params.get("scope_considerations"),
+                hedgehog_research_areas=params.get("hedgehog_research_areas"),
+                verification_needs=params.get("verification_needs"),
+                docs_results=budget_search_results(docs_results, intent_analysis, share),
+                blog_results=budget_search_results(blog_results, intent_analysis, share),
+                additional_results=budget_search_results(additional_results, intent_analysis, share)
+            )
+            
+            # Keep the raw results with the research; rows keep them only when a blob store
+            # can save each distinct one once
+            research_results = self._parse_research_results(result)
+            research_results.update(
+                docs_results=docs_results,
+                blog_results=blog_results,
+                additional_results=additional_results
+            )
+            return research_results
             
         except Exception as e:
             return {
@@ -590,17 +639,14 @@ class ResearchAgent:
             return {}
 
 class ContentGenerationAgent:
-    def __init__(self, llm):
-        self.llm = llm
-        self.prompt = PromptTemplate(
-            input_variables=["title", "research_output", "intent_analysis"],
-            template=CONTENT_GENERATION_PROMPT
-        )
-        self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
+    def __init__(self, runner: PromptRunner):
+        self.runner = runner
+        self.prompt = CONTENT_GENERATION_PROMPT
     
     def generate(self, title: str, research_output: str, intent_analysis: dict) -> tuple[str, str, list]:
         """Generate content based on research and intent analysis"""
-        response = self.chain.run(
+        response = self.runner.run(
+            self.prompt,
             title=title,
             research_output=research_output,
             intent_analysis=json.dumps(intent_analysis, indent=2)
@@ -630,24 +676,21 @@ class ContentGenerationAgent:
         return subtitle, body, keywords
 
 class QualityControlAgent:
-    def __init__(self, llm):
-        self.llm = llm
-        self.prompt = PromptTemplate(
-            input_variables=["title", "subtitle", "body", "keywords", "intent_analysis"],
-            template=QUALITY_CONTROL_PROMPT
-        )
-        self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
+    def __init__(self, runner: PromptRunner):
+        self.runner = runner
+        self.prompt = QUALITY_CONTROL_PROMPT
 
     def evaluate(self, title: str, subtitle: str, body: str, keywords: list, intent_analysis: dict):
         """Evaluate content quality and provide detailed feedback"""
         try:
-            result = self.chain.run({
-                "title": title,
-                "subtitle": subtitle,
-                "body": body,
-                "keywords": keywords,
-                "intent_analysis": intent_analysis
-            })
+            result = self.runner.run(
+                self.prompt,
+                title=title,
+                subtitle=subtitle,
+                body=body,
+                keywords=keywords,
+                intent_analysis=intent_analysis
+            )
             
             # Parse the evaluation result
             evaluation = self._parse_evaluation(result)
@@ -699,10 +742,52 @@ class QualityControlAgent:
         
         return "\n".join(notes)
 
+# Processing metadata columns holding large JSON strings
+METADATA_BLOB_COLUMNS = ['research_results', 'intent_analysis', 'quality_scores', 'recommendations']
+
+# Columns process_batch writes back, in the order of its per-row result records
+BATCH_RESULT_COLUMNS = ['Article subtitle', 'Article body', 'processing_status', 'validation_issues',
+                        'processing_timestamp'] + METADATA_BLOB_COLUMNS
+BATCH_RESULT_POSITIONS = {column: position for position, column in enumerate(BATCH_RESULT_COLUMNS)}
+
+def load_entries(input_file: str = None, database_url: str = None, shard: str = None,
+                 shard_by: str = 'hash') -> pd.DataFrame:
+    """Load entries from kb_entries or a CSV export, keeping only this process's shard"""
+    if database_url:
+        # Read kb_entries directly instead of going through a CSV export
+        db = KbDatabase(database_url)
+        try:
+            df = pd.DataFrame(list(db.read_entries()), columns=list(KB_ENTRY_COLUMNS.values()))
+        finally:
+            db.close()
+    elif input_file:
+        df = pd.read_csv(input_file)
+    else:
+        # Queue workers can run on entries supplied entirely by job payloads
+        df = pd.DataFrame(columns=list(KB_ENTRY_COLUMNS.values()))
+    
+    if shard:
+        from sharding import parse_shard, select_shard
+        shard_index, shard_count = parse_shard(shard)
+        df = select_shard(df, shard_index, shard_count, shard_by)
+    return df
+
 class KnowledgeBaseProcessor:
-    def __init__(self, input_file: str, provider: str = 'openai'):
+    def __init__(self, input_file: str = None, provider: str = 'openai', database_url: str = None,
+                 blob_store_path: str = None, shard: str = None, shard_by: str = 'hash',
+                 context_budget: int = DEFAULT_CONTEXT_BUDGET, search_budget: int = DEFAULT_SEARCH_BUDGET):
         self.input_file = input_file
-        self.df = pd.read_csv(input_file)
+        self.database_url = database_url
+        self.provider = provider
+        self.search_budget = search_budget
+        # Token budget for the research context in each content-generation prompt
+        self.context_budget = context_budget
+        # Store shared research payloads once and keep only references in rows
+        self.blob_store = None
+        if blob_store_path:
+            from blob_store import BlobStore
+            self.blob_store = BlobStore(blob_store_path)
+        self.df = load_entries(input_file, database_url, shard, shard_by)
         
         # Initialize LLM based on provider
         self.llm = self._initialize_llm(provider)
@@ -716,25 +801,61 @@ class KnowledgeBaseProcessor:
         self.df['quality_scores'] = ''
         self.df['recommendations'] = ''
         
-        # Initialize agents
-        self.intent_analyzer = IntentAnalysisAgent(self.llm)
-        self.researcher = ResearchAgent(self.llm)
-        self.content_generator = ContentGenerationAgent(self.llm)
-        self.quality_controller = QualityControlAgent(self.llm)
+        # Every agent sends its prompts through one runner, which tallies prompt-cache hits per stage
+        self.prompt_stats = PromptCacheStats()
+        self._initialize_agents()
+        # Wall and CPU time per pipeline stage, reported by --profile
+        from profiler import StageTimes
+        self.stage_times = StageTimes()
+        # Worker mode: final status of each job, and where its entry lives in self.df
+        self.job_statuses = Counter()
+        self._loaded_rows = None
+        self._scratch_row = None
+    
+    def _initialize_agents(self):
+        """Create the prompt runner and the four pipeline agents on self.llm"""
+        self.prompt_runner = PromptRunner(self.llm, self.provider, self.prompt_stats)
+        self.intent_analyzer = IntentAnalysisAgent(self.prompt_runner)
+        self.researcher = ResearchAgent(self.prompt_runner, self.search_budget)
+        self.content_generator = ContentGenerationAgent(self.prompt_runner)
+        self.quality_controller = QualityControlAgent(self.prompt_runner)
+    
+    def clone(self) -> 'KnowledgeBaseProcessor':
+        """A processor for another thread: its own LLM client, agents and search wrapper
+        
+        The entries, blob store, prompt stats and stage times are shared; the
+        stats objects are thread-safe, the rest is only read by process_entry.
+        """
+        clone = copy.copy(self)
+        clone.llm = self._initialize_llm(self.provider)
+        clone._initialize_agents()
+        return clone
     
     def _initialize_llm(self, provider: str):
-        """Initialize the appropriate LLM based on provider"""
+        """Initialize the appropriate LLM based on provider
+        
+        Provider SDKs and .env loading are imported here rather than at module
+        level, so a run only pays the import cost of the provider it uses.
+        """
+        from dotenv import load_dotenv
+        
+        # Load environment variables (API keys)
+        load_dotenv()
+        
         if provider == 'openai':
+            from langchain_openai import ChatOpenAI
             return ChatOpenAI(
                 temperature=0.3,
                 model="gpt-4o"
             )
         elif provider == 'anthropic':
+            from langchain_anthropic import ChatAnthropic
             return ChatAnthropic(
                 temperature=0.3,
                 model="claude-3.5-haiku"
             )
         elif provider == 'google':
+            from langchain_google_genai import ChatGoogleGenerativeAI
             return ChatGoogleGenerativeAI(
                 temperature=0.3,
                 model="gemini-pro"
@@ -742,36 +863,55 @@ class KnowledgeBaseProcessor:
         else:
             raise ValueError(f"Unsupported provider: {provider}")
 
-    def process_entry(self, title: str, current_body: str, current_subtitle: str, context: str) -> tuple[str, str, list, dict]:
-        """Process a single entry with intent analysis, research, content generation, and quality control"""
-        max_iterations = 3
+    def process_entry(self, title: str, current_body: str, current_subtitle: str, context: str,
+                      progress=None) -> tuple[str, str, list, dict]:
+        """Process a single entry with intent analysis, research, content generation, and quality control
+        
+        progress, if given, is called as progress(stage, **details) as each step finishes.
+        """
+        max_iterations = MAX_ITERATIONS
+        notify = progress or (lambda stage, **details: None)
         
         # Step 1: Intent Analysis
-        intent_analysis = self.intent_analyzer.analyze(title, current_subtitle, current_body)
+        with self.stage_times.measure("intent_analysis"):
+            intent_analysis = self.intent_analyzer.analyze(title, current_subtitle, current_body)
         if not intent_analysis:
             return None, None, [], "Failed to analyze intent"
+        notify("intent_analysis", intent_analysis=intent_analysis)
         
         # Step 2: Research
-        research_results = self.researcher.research(title, intent_analysis)
+        with self.stage_times.measure("research"):
+            research_results = self.researcher.research(title, intent_analysis)
         if not research_results:
             return None, None, [], "Failed to gather research"
+        notify("research", status=research_results.get("status"),
+               sections=list(research_results.get("sections", {}) or {}))
+        
+        # Compact, deduplicate and trim the research once; every iteration reuses it
+        with self.stage_times.measure("context_budget"):
+            research_output = budget_research(research_results, intent_analysis, self.context_budget)
         
         for iteration in range(max_iterations):
             # Step 3: Content Generation
-            subtitle, body, keywords = self.content_generator.generate(
-                title=title,
-                research_output=json.dumps(research_results, indent=2),
-                intent_analysis=intent_analysis
-            )
+            with self.stage_times.measure("generation"):
+                subtitle, body, keywords = self.content_generator.generate(
+                    title=title,
+                    research_output=research_output,
+                    intent_analysis=intent_analysis
+                )
+            notify("generation", iteration=iteration + 1)
             
             # Step 4: Quality Control
-            qa_results = self.quality_controller.evaluate(
-                title=title,
-                subtitle=subtitle,
-                body=body,
-                keywords=keywords,
-                intent_analysis=intent_analysis
-            )
+            with self.stage_times.measure("quality_control"):
+                qa_results = self.quality_controller.evaluate(
+                    title=title,
+                    subtitle=subtitle,
+                    body=body,
+                    keywords=keywords,
+                    intent_analysis=intent_analysis
+                )
+            notify("quality_control", iteration=iteration + 1, status=qa_results["status"],
+                   scores=qa_results.get("evaluation"))
             
             if qa_results["status"] == "pass":
                 return subtitle, body, keywords, {
@@ -794,66 +934,416 @@ class KnowledgeBaseProcessor:
         return None, None, [], "Failed to produce acceptable entry"
 
     def process_batch(self, start_idx: int, batch_size: int = 5):
-        """Process a batch of entries"""
+        """Process a batch of entries
+        
+        Inputs are read as plain arrays up front, each entry's results are kept
+        in a per-row record, and the records are written back to the frame in
+        one assignment.
+        """
         end_idx = min(start_idx + batch_size, len(self.df))
+        if end_idx <= start_idx:
+            return
+        
+        titles = self.df['Article title'].to_numpy()[start_idx:end_idx]
+        bodies = self.df['Article body'].to_numpy()[start_idx:end_idx]
+        subtitles = self.df['Article subtitle'].to_numpy()[start_idx:end_idx]
+        
+        # Start from the current values so columns an entry doesn't produce keep their contents
+        records = self.df[BATCH_RESULT_COLUMNS].iloc[start_idx:end_idx].to_numpy(dtype=object)
+        for record, title, current_body, current_subtitle in zip(records, titles, bodies, subtitles):
+            for column, value in self._entry_results(title, current_body, current_subtitle).items():
+                record[BATCH_RESULT_POSITIONS[column]] = value
+        
+        with self.stage_times.measure("write_back"):
+            self.df.iloc[start_idx:end_idx, self.df.columns.get_indexer(BATCH_RESULT_COLUMNS)] = records
+
+    def _entry_results(self, title: str, current_body: str, current_subtitle: str) -> dict:
+        """Process one entry and return the result columns to update"""
+        try:
+            # Process entry
+            subtitle, body, keywords, metadata = self.process_entry(
+                title=title,
+                current_body=current_body,
+                current_subtitle=current_subtitle,
+                context=""  # No longer needed as research is handled by ResearchAgent
+            )
+            
+            if subtitle and body:
+                research_results = metadata.get('research_results', {})
+                if self.blob_store:
+                    research_results = self.blob_store.intern_research(research_results)
+                elif isinstance(research_results, dict):
+                    research_results = {key: value for key, value in research_results.items()
+                                        if key not in SEARCH_RESULT_KEYS}
+                results = {
+                    'Article subtitle': subtitle,
+                    'Article body': body,
+                    'processing_status': 'processed',
+                    'intent_analysis': json.dumps(metadata.get('intent_analysis', {})),
+                    'research_results': json.dumps(research_results),
+                    'quality_scores': json.dumps(metadata.get('quality_scores', {})),
+                    'recommendations': json.dumps(metadata.get('recommendations', [])),
+                }
+            else:
+                results = {
+                    'processing_status': 'failed',
+                    'validation_issues': metadata if isinstance(metadata, str) else json.dumps(metadata),
+                }
+            
+            results['processing_timestamp'] = datetime.now().isoformat()
+            return results
+            
+        except Exception as e:
+            return {'processing_status': 'error', 'validation_issues': str(e)}
+
+    def process_scheduled(self, order: list, limits: 'RunLimits') -> int:
+        """Process rows in the given order until done or until the next entry would overrun limits
+        
+        Returns the number of entries processed; limits.stop_reason says why a run stopped early.
+        """
+        for idx in order:
+            if not limits.allows_next():
+                print(f"Stopping at {limits.stop_reason}: processed {limits.entries} of {len(order)} entries")
+                break
+            started, tokens_before = time.monotonic(), self.prompt_stats.total_tokens()
+            self.process_batch(idx, 1)
+            limits.record(time.monotonic() - started, self.prompt_stats.total_tokens() - tokens_before)
+        return limits.entries
+
+    def save_results(self, output_file: str):
+        """Save the processed results"""
+        if output_file.endswith('.parquet'):
+            self._save_parquet(output_file)
+        else:
+            self.df.to_csv(output_file, index=False, quoting=1)  # QUOTE_ALL for consistent formatting
+
+    def append_result(self, output_file: str, idx: int):
+        """Append one row to a CSV output that several worker processes share
+        
+        Writers take an exclusive lock on the file, so rows never interleave; the
+        header is written by whichever writer finds the file empty. A later row for
+        the same Article URL supersedes an earlier one.
+        """
+        import fcntl  # POSIX only; needed just for shared worker output
         
-        for idx in range(start_idx, end_idx):
+        with open(output_file, 'a', newline='', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
             try:
-                # Get current entry
-                title = self.df.iloc[idx]['Article title']
-                current_body = self.df.iloc[idx]['Article body']
-                current_subtitle = self.df.iloc[idx]['Article subtitle']
-                
-                # Process entry
-                subtitle, body, keywords, metadata = self.process_entry(
-                    title=title,
-                    current_body=current_body,
-                    current_subtitle=current_subtitle,
-                    context=""  # No longer needed as research is handled by ResearchAgent
-                )
-                
-                if subtitle and body:
-                    # Update fields
-                    self.df.at[idx, 'Article subtitle'] = subtitle
-                    self.df.at[idx, 'Article body'] = body
-                    self.df.at[idx, 'processing_status'] = 'processed'
-                    self.df.at[idx, 'intent_analysis'] = json.dumps(metadata.get('intent_analysis', {}))
-                    self.df.at[idx, 'research_results'] = json.dumps(metadata.get('research_results', {}))
-                    self.df.at[idx, 'quality_scores'] = json.dumps(metadata.get('quality_scores', {}))
-                    self.df.at[idx, 'recommendations'] = json.dumps(metadata.get('recommendations', []))
-                else:
-                    self.df.at[idx, 'processing_status'] = 'failed'
-                    self.df.at[idx, 'validation_issues'] = metadata
-                
-                self.df.at[idx, 'processing_timestamp'] = datetime.now().isoformat()
+                f.seek(0, os.SEEK_END)
+                self.df.loc[[idx]].to_csv(f, index=False, header=f.tell() == 0, quoting=1)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _save_parquet(self, output_file: str):
+        """Save article fields as typed Parquet columns, with the JSON metadata stored alongside
+        
+        The large JSON blobs go to a separate zstd-compressed <name>.metadata.parquet
+        keyed by article URL, so readers of the article columns never load them.
+        """
+        from sharding import SOURCE_ROW_COLUMN
+        
+        articles = self.df.drop(columns=METADATA_BLOB_COLUMNS)
+        articles = articles.astype({
+            column: 'string' for column in articles.columns
+            if column not in ('Last modified date', 'Archived', 'processing_timestamp', SOURCE_ROW_COLUMN)
+        })
+        articles['Last modified date'] = pd.to_datetime(articles['Last modified date'], utc=True, errors='coerce')
+        articles['processing_timestamp'] = pd.to_datetime(articles['processing_timestamp'], errors='coerce')
+        articles['Archived'] = articles['Archived'].astype(str).str.lower() == 'true'
+        articles.to_parquet(output_file, index=False, compression='snappy')
+        
+        metadata = self.df.loc[self.df['processing_status'] != '', ['Article URL'] + METADATA_BLOB_COLUMNS]
+        metadata.astype('string').to_parquet(
+            output_file[:-len('.parquet')] + '.metadata.parquet',
+            index=False,
+            compression='zstd'
+        )
+
+    def save_to_database(self, database_url: str, indices: list = None) -> int:
+        """Upsert processed entries (optionally only among the given rows) into kb_entries, keyed on article_url
+        
+        Failed and errored rows are not written; their content didn't change.
+        """
+        rows = self.df.loc[indices] if indices is not None else self.df
+        processed = rows[rows['processing_status'] == 'processed']
+        
+        def entries():
+            for _, row in processed.iterrows():
+                yield row.to_dict(), {"kb_processor": self._build_metadata(row)}
+        
+        db = KbDatabase(database_url)
+        try:
+            return db.upsert_entries(entries())
+        finally:
+            db.close()
+
+    def _build_metadata(self, row) -> dict:
+        """Collect a row's processing results for the kb_entries metadata column"""
+        metadata = {
+            'processing_status': row['processing_status'],
+            'validation_issues': row['validation_issues'],
+            'processing_timestamp': row['processing_timestamp'],
+        }
+        # These columns hold JSON strings; store them as structured JSON
+        for column in ['intent_analysis', 'research_results', 'quality_scores', 'recommendations']:
+            metadata[column] = json.loads(row[column]) if row[column] else None
+        # The app can't follow blob references, so kb_entries gets the full research
+        if self.blob_store:
+            metadata['research_results'] = self.blob_store.resolve(metadata['research_results'])
+        return metadata
+
+    def run_worker(self, queue: 'JobQueue', worker_id: str, output_file: str = None,
+                   lease_seconds: float = 900, poll_interval: float = 5, max_jobs: int = None) -> int:
+        """Process queued jobs until stopped (SIGINT/SIGTERM) or max_jobs is reached
+        
+        Each finished entry is written straight back to the database and/or
+        appended to the CSV output file, which any number of workers can
+        share. Entries supplied only by a job payload reuse one scratch row, so
+        the DataFrame does not grow with the number of jobs. Each job's final
+        status is tallied in self.job_statuses. Returns the number of jobs handled.
+        """
+        stopping = []
+        
+        def request_stop(signum, frame):
+            # Finish the current job and exit; an abandoned lease would only be retried later
+            print(f"Worker {worker_id} stopping after the current job")
+            stopping.append(signum)
+        
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+        
+        handled = 0
+        while not stopping and (max_jobs is None or handled < max_jobs):
+            job = queue.lease(worker_id, lease_seconds)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+            
+            try:
+                idx = self._row_for_job(job)
+                self.process_batch(idx, 1)
+                status = self.df.at[idx, 'processing_status']
+                self.job_statuses[status] += 1
+                if status != 'processed':
+                    queue.fail(job, worker_id, str(self.df.at[idx, 'validation_issues']))
+                    continue
                 
+                if self.database_url:
+                    self.save_to_database(self.database_url, [idx])
+                if output_file:
+                    self.append_result(output_file, idx)
+                if not queue.complete(job, worker_id):
+                    print(f"Lease on job {job.id} expired before it finished; it will be retried")
             except Exception as e:
-                self.df.at[idx, 'processing_status'] = 'error'
-                self.df.at[idx, 'validation_issues'] = str(e)
+                print(f"Error running job {job.id}: {str(e)}")
+                self.job_statuses['error'] += 1
+                queue.fail(job, worker_id, str(e))
+            finally:
+                handled += 1
+        
+        return handled
 
-    def save_results(self, output_file: str):
-        """Save the processed results"""
-        self.df.to_csv(output_file, index=False, quoting=1)  # QUOTE_ALL for consistent formatting
+    def _row_for_job(self, job: 'Job') -> int:
+        """Find (or add) the DataFrame row for a job, applying any entry fields from its payload"""
+        fields = {
+            header: job.payload[column]
+            for column, header in KB_ENTRY_COLUMNS.items()
+            if column in job.payload
+        }
+        fields['Article URL'] = job.article_url
+        
+        if self._loaded_rows is None:
+            # Rows loaded at startup, by URL (first occurrence); built once rather than scanned per job
+            self._loaded_rows = {}
+            for idx, url in zip(self.df.index, self.df['Article URL']):
+                self._loaded_rows.setdefault(url, idx)
+        
+        idx = self._loaded_rows.get(job.article_url)
+        if idx is None:
+            if 'Article title' not in fields:
+                raise ValueError(f"No entry found for {job.article_url}")
+            if self._scratch_row is None:
+                # Added once; every payload-only job after that overwrites it
+                self._scratch_row = len(self.df)
+                self.df = pd.concat([self.df, pd.DataFrame([fields])], ignore_index=True)
+            idx = self._scratch_row
+            for header in KB_ENTRY_COLUMNS.values():
+                if header not in fields:
+                    self.df.at[idx, header] = None
+        
+        for header, value in fields.items():
+            self.df.at[idx, header] = value
+        # Clear results left over from an earlier attempt
+        for column in ['processing_status', 'validation_issues', 'processing_timestamp'] + METADATA_BLOB_COLUMNS:
+            self.df.at[idx, column] = ''
+        return idx
 
 def main():
     parser = argparse.ArgumentParser(description='Process knowledge base entries with different LLM providers')
-    parser.add_argument('input_file', help='Input CSV file')
-    parser.add_argument('output_file', help='Output CSV file')
+    parser.add_argument('input_file', nargs='?', help='Input CSV file')
+    parser.add_argument('output_file', nargs='?',
+                       help='Output file: CSV, or Parquet when it ends in .parquet '
+                            '(JSON metadata is then written to <name>.metadata.parquet)')
+    parser.add_argument('--db', dest='database_url',
+                       help='Read from and write back to kb_entries in this database '
+                            '(postgresql://... or sqlite:///path) instead of CSV files')
+    parser.add_argument('--blob-store',
+                       help='Store research payloads once in this SQLite file and keep only '
+                            'references in each row\'s research_results')
     parser.add_argument('-p', '--provider', 
                        choices=['openai', 'anthropic', 'google'],
                        default='openai',
                        help='LLM provider to use (default: openai)')
+    parser.add_argument('--shard', metavar='I/N',
+                       help='Process only shard I of N (e.g. 0/4); merge the outputs with sharding.py')
+    parser.add_argument('--shard-by', choices=['hash', 'range'], default='hash',
+                       help='Partition by a stable hash of the article URL or by contiguous '
+                            'row ranges (default: hash)')
+    parser.add_argument('--worker', metavar='QUEUE',
+                       help='Run as a long-lived worker draining jobs from this SQLite queue '
+                            '(see job_queue.py)')
+    parser.add_argument('--worker-id', default=f'{socket.gethostname()}:{os.getpid()}',
+                       help='Lease owner name for this worker (default: host:pid)')
+    parser.add_argument('--lease-seconds', type=float, default=900,
+                       help='How long a job stays claimed before another worker may retry it (default: 900)')
+    parser.add_argument('--max-jobs', type=int, help='Exit after handling this many jobs')
+    parser.add_argument('--context-budget', type=int, default=DEFAULT_CONTEXT_BUDGET,
+                       help=f'Max tokens of research context per generation prompt (default: {DEFAULT_CONTEXT_BUDGET})')
+    parser.add_argument('--search-budget', type=int, default=DEFAULT_SEARCH_BUDGET,
+                       help=f'Max tokens of search results per research prompt (default: {DEFAULT_SEARCH_BUDGET})')
+    parser.add_argument('--schedule', action='store_true',
+                       help='Process every row, highest priority first (implied by the options below)')
+    parser.add_argument('--priority-weights', metavar='NAME=W,...',
+                       help='Override priority weights: quality, staleness, status, length, cache '
+                            '(default: quality=0.4,staleness=0.25,status=0.15,length=0.1,cache=0.1)')
+    parser.add_argument('--audit', help='qc_audit.py report whose local scores drive the quality priority')
+    parser.add_argument('--previous', help='Output of an earlier run; entries it processed since their '
+                                           'last edit are deprioritized')
+    parser.add_argument('--deadline', type=float, metavar='SECONDS',
+                       help='Stop starting new entries once an average entry would overrun this many seconds')
+    parser.add_argument('--token-budget', type=int,
+                       help='Stop starting new entries once an average entry would overrun this many tokens')
+    parser.add_argument('--estimate', action='store_true',
+                       help='Project tokens, cost and wall-clock time for the run without calling any model')
+    parser.add_argument('--concurrency', type=int, default=1,
+                       help='Entries processed in parallel (workers or shards) assumed by --estimate (default: 1)')
+    parser.add_argument('--estimate-sample', type=int, default=100, metavar='N',
+                       help='Rows --estimate renders and tokenizes, spread evenly over the rows the run '
+                            'would process; the projection is scaled to all of them (default: 100)')
+    parser.add_argument('--run-stats', metavar='PATH',
+                       help='JSON file of per-stage statistics: processing runs add to it and --estimate '
+                            'reads it (default: none; processing runs record nothing)')
+    parser.add_argument('--profile', metavar='PATH',
+                       help='Sample the run and write collapsed stacks to PATH (a flamegraph if it ends in .svg), '
+                            'then print wall/CPU/wait time per stage; with --serve, also served live at /stats')
+    parser.add_argument('--profile-interval', type=float,
+                       help='Seconds between profiler samples (default: 0.005)')
+    parser.add_argument('--serve', metavar='[HOST:]PORT',
+                       help='Run as a warm local HTTP service that streams pipeline progress '
+                            'for one entry per request (see kb_service.py)')
+    parser.add_argument('--max-concurrent', type=int, default=4,
+                       help='Entries the service processes at once (default: 4)')
     
     args = parser.parse_args()
+    if args.worker:
+        if not args.database_url and not args.output_file:
+            parser.error('--worker needs --db or an output_file to write results to')
+        if args.output_file and args.output_file.endswith('.parquet'):
+            parser.error('--worker appends finished entries to a CSV output_file; Parquet is not supported')
+    elif args.estimate:
+        if not args.database_url and not args.input_file:
+            parser.error('--estimate needs an input_file or --db')
+    elif not args.serve and not args.database_url and not (args.input_file and args.output_file):
+        parser.error('input_file and output_file are required unless --db is given')
+    if args.shard:
+        from sharding import parse_shard
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    scheduled = (args.schedule or args.priority_weights or args.audit or args.previous
+                 or args.deadline or args.token_budget)
+    if scheduled and not args.estimate:
+        from scheduler import PriorityWeights
+        try:
+            weights = PriorityWeights.parse(args.priority_weights)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    if args.estimate:
+        # Offline: no LLM client, no searches
+        from estimator import estimate_run, load_run_stats
+        df = load_entries(args.input_file, args.database_url, args.shard, args.shard_by)
+        prompts = {prompt.stage: prompt for prompt in
+                   (INTENT_ANALYSIS_PROMPT, RESEARCH_PROMPT, CONTENT_GENERATION_PROMPT, QUALITY_CONTROL_PROMPT)}
+        # The rows the run would process: all of them when sharded or scheduled, else the test batch
+        rows = df if args.shard or scheduled else df.head(3)
+        step = max(1, -(-len(rows) // max(1, args.estimate_sample)))
+        sample = rows.iloc[::step]
+        estimate = estimate_run(sample, prompts, args.provider, load_run_stats(args.run_stats),
+                                SEARCHES_PER_ENTRY, SEARCH_RATE_LIMIT, args.context_budget, args.search_budget,
+                                MAX_ITERATIONS, args.concurrency, entries=len(rows))
+        print(estimate.summary())
+        return
     
     # Initialize processor with specified provider
-    processor = KnowledgeBaseProcessor(args.input_file, args.provider)
+    processor = KnowledgeBaseProcessor(args.input_file, args.provider, args.database_url,
+                                       args.blob_store, args.shard, args.shard_by,
+                                       args.context_budget, args.search_budget)
     
-    # Process test batch
-    processor.process_batch(0, 3)
+    if args.profile:
+        from profiler import DEFAULT_INTERVAL, SamplingProfiler
+        profiler = SamplingProfiler(args.profile_interval or DEFAULT_INTERVAL, processor.stage_times)
+        profiler.start()
+    
+    if args.serve:
+        from kb_service import serve
+        serve(processor, args.serve, args.provider, args.max_concurrent, profiler if args.profile else None)
+    elif args.worker:
+        from job_queue import JobQueue
+        queue = JobQueue(args.worker)
+        try:
+            handled = processor.run_worker(queue, args.worker_id, args.output_file,
+                                           args.lease_seconds, max_jobs=args.max_jobs)
+            print(f"Worker {args.worker_id} handled {handled} jobs")
+        finally:
+            queue.close()
+    else:
+        if scheduled:
+            from scheduler import RunLimits, load_audit_scores, load_fresh_results, schedule
+            audit_scores = load_audit_scores(args.audit) if args.audit else None
+            fresh_results = load_fresh_results(args.previous) if args.previous else None
+            order = schedule(processor.df, weights, audit_scores, fresh_results)
+            processor.process_scheduled(order, RunLimits(args.deadline, args.token_budget))
+        else:
+            # A shard processes every row it owns; an unsharded run keeps the test batch
+            processor.process_batch(0, len(processor.df) if args.shard else 3)
+        
+        # Save results
+        with processor.stage_times.measure("save"):
+            if args.output_file:
+                processor.save_results(args.output_file)
+            if args.database_url:
+                processor.save_to_database(args.database_url)
     
-    # Save results
-    processor.save_results(args.output_file)
+    # Run summary
+    print(processor.prompt_stats.summary())
+    if args.profile:
+        profiler.stop()
+        profiler.write(args.profile)
+        print(processor.stage_times.summary())
+        print(f"Profile written to {args.profile} ({sum(profiler.samples.values())} samples)")
+    if args.run_stats and not args.serve:
+        from estimator import record_run_stats
+        # A worker reuses rows across jobs, so it tallies each job's outcome as it goes
+        status = (pd.Series(processor.job_statuses) if args.worker
+                  else processor.df['processing_status'].value_counts())
+        record_run_stats(args.run_stats, processor.prompt_stats,
+                         int(status.reindex(['processed', 'failed', 'error'], fill_value=0).sum()),
+                         int(status.get('error', 0)))
+    if processor.blob_store:
+        processor.blob_store.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
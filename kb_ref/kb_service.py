@@ -0,0 +1,182 @@
+"""
+Local HTTP service that keeps KnowledgeBaseProcessors warm between requests.
+A pool of max_concurrent processors, each with its own agents and LLM client,
+is built once at startup. Each request checks one out and runs the full
+intent -> research -> generation -> QC pipeline for one entry on it.
+Progress comes back as newline-delimited JSON events while the pipeline runs.
+
+    POST /process  {"title": ..., "subtitle": ..., "body": ...}
+    GET  /health
+    GET  /stats                  stage timings, plus folded profile stacks with --profile
+    GET  /stats/flamegraph.svg   the profile so far as a flamegraph (--profile only)
+"""
+
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bound on a request body; KB articles are far smaller
+MAX_REQUEST_BYTES = 5 * 1024 * 1024
+
+class KbServiceHandler(BaseHTTPRequestHandler):
+    # Set on the server by serve()
+    server: "KbServiceServer"
+
+    def do_GET(self):
+        processor, profiler = self.server.processor, self.server.profiler
+        if self.path == "/health":
+            self._send_json(200, {
+                "status": "ok",
+                "provider": self.server.provider,
+                "active": self.server.active,
+                "max_concurrent": self.server.max_concurrent,
+                "prompt_cache": processor.prompt_stats.stages,
+                "stage_times": processor.stage_times.snapshot(),
+            })
+        elif self.path == "/stats":
+            # A long-running service never reaches the end-of-run profile report, so it is served here
+            stats = {"stage_times": processor.stage_times.snapshot(),
+                     "summary": processor.stage_times.summary()}
+            if profiler:
+                samples = profiler.snapshot()
+                stats["profile"] = {"samples": sum(samples.values()), "folded": profiler.folded()}
+            self._send_json(200, stats)
+        elif self.path == "/stats/flamegraph.svg" and profiler:
+            from profiler import flamegraph_svg
+            self._send_body(200, "image/svg+xml", flamegraph_svg(profiler.snapshot()).encode())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/process":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            self._send_json(413, {"error": "Request body too large"})
+            return
+        try:
+            entry = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "Request body must be JSON"})
+            return
+        if not isinstance(entry, dict) or not entry.get("title"):
+            self._send_json(400, {"error": "Title is required"})
+            return
+
+        # Events stream until the connection closes (HTTP/1.0, no Content-Length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        started = time.monotonic()
+
+        def emit(event: str, **details):
+            line = json.dumps({"event": event, "elapsed": round(time.monotonic() - started, 3), **details},
+                              default=str)
+            self.wfile.write(line.encode() + b"\n")
+            self.wfile.flush()
+
+        try:
+            try:
+                processor = self.server.pool.get_nowait()
+            except queue.Empty:
+                emit("queued")
+                processor = self.server.pool.get()
+            try:
+                with self.server.lock:
+                    self.server.active += 1
+                emit("started")
+                subtitle, body, keywords, metadata = processor.process_entry(
+                    title=entry["title"],
+                    current_body=entry.get("body") or "",
+                    current_subtitle=entry.get("subtitle") or "",
+                    context="",
+                    progress=emit
+                )
+            finally:
+                with self.server.lock:
+                    self.server.active -= 1
+                self.server.pool.put(processor)
+
+            if subtitle and body:
+                emit("result", subtitle=subtitle, body=body, keywords=keywords,
+                     status=metadata.get("status"), quality_scores=metadata.get("quality_scores"),
+                     recommendations=metadata.get("recommendations"))
+            else:
+                emit("error", error=metadata)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; writing the next event aborts the pipeline early
+            print(f"Client disconnected while processing '{entry['title']}'")
+        except Exception as e:
+            print(f"Error processing '{entry['title']}': {str(e)}")
+            try:
+                emit("error", error=str(e))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def _send_json(self, status: int, payload: dict):
+        self._send_body(status, "application/json", json.dumps(payload).encode())
+
+    def _send_body(self, status: int, content_type: str, data: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+class KbServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, processor, provider: str, max_concurrent: int = 4, profiler=None):
+        super().__init__(address, KbServiceHandler)
+        self.processor = processor
+        # Running SamplingProfiler when started with --profile, served at /stats
+        self.profiler = profiler
+        self.provider = provider
+        self.max_concurrent = max_concurrent
+        # One processor per concurrent pipeline, so requests never share agents or clients;
+        # the pool size also keeps a burst of requests from flooding the LLM provider
+        self.pool = queue.Queue()
+        self.pool.put(processor)
+        for _ in range(max_concurrent - 1):
+            self.pool.put(processor.clone())
+        self.lock = threading.Lock()
+        self.active = 0
+
+def parse_address(address: str):
+    """Parse 'PORT' or 'HOST:PORT'; the host defaults to localhost only"""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def serve(processor, address: str = "127.0.0.1:8765", provider: str = "openai", max_concurrent: int = 4,
+          profiler=None):
+    """Serve the warm processor until interrupted"""
+    server = KbServiceServer(parse_address(address), processor, provider, max_concurrent, profiler)
+    host, port = server.server_address[:2]
+    print(f"KB service listening on http://{host}:{port} (provider: {provider})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("KB service stopping")
+    finally:
+        server.server_close()
+
+# Example usage:
+"""
+python kb_processor.py --serve 8765 -p anthropic
+
+curl -N -X POST http://127.0.0.1:8765/process \\
+     -d '{"title": "VPC peering", "subtitle": "", "body": ""}'
+{"event": "started", "elapsed": 0.0}
+{"event": "intent_analysis", "elapsed": 3.2, "intent_analysis": {...}}
+...
+{"event": "result", "elapsed": 41.7, "subtitle": "...", "body": "...", "keywords": [...], ...}
+"""
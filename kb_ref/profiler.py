@@ -0,0 +1,182 @@
+"""
+Low-overhead profiling for KB processing runs.
+A background thread samples every other thread's Python stack at a fixed
+interval and counts collapsed stacks, rooted at the pipeline stage the thread
+was in. The samples are written in the folded format that flamegraph.pl and
+speedscope read, or rendered directly as a flamegraph SVG. StageTimes records
+wall time, CPU time and the remainder spent waiting (network, rate-limit
+sleeps, disk) for each agent stage.
+"""
+
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from html import escape
+from typing import Dict
+
+DEFAULT_INTERVAL = 0.005  # Seconds between samples
+
+# Flamegraph layout, in pixels
+SVG_WIDTH = 1200
+SVG_ROW_HEIGHT = 16
+
+class StageTimes:
+    def __init__(self):
+        """Per-stage wall and CPU seconds, plus the stage each thread is currently in"""
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.active: Dict[int, str] = {}
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Time the enclosed block as one call of stage"""
+        thread = threading.get_ident()
+        outer = self.active.get(thread)
+        self.active[thread] = stage
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            if outer is None:
+                self.active.pop(thread, None)
+            else:
+                self.active[thread] = outer
+            with self._lock:
+                counts = self.stages.setdefault(stage, {"calls": 0, "wall": 0.0, "cpu": 0.0})
+                counts["calls"] += 1
+                counts["wall"] += wall
+                counts["cpu"] += cpu
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Copy of the per-stage counters; safe to call while stages are being measured"""
+        with self._lock:
+            return {stage: dict(counts) for stage, counts in self.stages.items()}
+
+    def summary(self) -> str:
+        """Wall / CPU / wait breakdown per stage"""
+        if not self.stages:
+            return "Stage times: nothing measured"
+        lines = [f"Stage times (seconds):\n  {'stage':<16} {'calls':>5} {'wall':>9} {'cpu':>9} {'wait':>9} {'wait %':>7}"]
+        for stage, counts in self.stages.items():
+            wait = max(0.0, counts["wall"] - counts["cpu"])
+            share = wait / counts["wall"] if counts["wall"] else 0.0
+            lines.append(f"  {stage:<16} {counts['calls']:>5} {counts['wall']:>9.2f} {counts['cpu']:>9.2f} "
+                         f"{wait:>9.2f} {share:>7.0%}")
+        return "\n".join(lines)
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    def __init__(self, interval: float = DEFAULT_INTERVAL, stage_times: StageTimes = None):
+        """Sample all other threads every interval seconds once started"""
+        self.interval = interval
+        self.stage_times = stage_times
+        self.samples: Counter = Counter()
+        # Guards samples against readers while the profiler runs (the service's /stats)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        for thread, frame in sys._current_frames().items():
+            if thread == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stage = self.stage_times.active.get(thread) if self.stage_times else None
+            stack.append(f"[{stage or 'other'}]")
+            with self._lock:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def snapshot(self) -> Counter:
+        """Copy of the samples so far; safe to call while sampling"""
+        with self._lock:
+            return Counter(self.samples)
+
+    def folded(self) -> str:
+        """Samples so far as folded stacks, one 'frame;frame;... count' line each"""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.snapshot().items()))
+
+    def write(self, path: str):
+        """Write folded stacks, or a flamegraph when path ends in .svg"""
+        content = flamegraph_svg(self.snapshot()) if path.endswith(".svg") else self.folded()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+def flamegraph_svg(samples: Counter, title: str = "KB processing") -> str:
+    """Render folded stacks as a static flamegraph, root at the bottom"""
+    # Build a frame tree: label -> [count, children]
+    root = [0, {}]
+    for stack, count in samples.items():
+        root[0] += count
+        node = root
+        for label in stack.split(";"):
+            node = node[1].setdefault(label, [0, {}])
+            node[0] += count
+
+    def depth(node) -> int:
+        return 1 + max((depth(child) for child in node[1].values()), default=0)
+
+    rows = depth(root) - 1
+    height = (rows + 2) * SVG_ROW_HEIGHT
+    scale = SVG_WIDTH / root[0] if root[0] else 0
+    rects = []
+
+    def draw(node, x: float, level: int):
+        for label, child in sorted(node[1].items()):
+            width = child[0] * scale
+            if width >= 0.5:
+                y = height - (level + 2) * SVG_ROW_HEIGHT
+                hue = 20 + zlib.crc32(label.split(" (")[0].encode()) % 40
+                text = escape(label if len(label) * 7 < width else label[:max(0, int(width / 7) - 2)] + "..")
+                rects.append(
+                    f'<g><title>{escape(label)} ({child[0]} samples, {child[0] / root[0]:.1%})</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{SVG_ROW_HEIGHT - 1}" '
+                    f'fill="hsl({hue},90%,60%)"/>'
+                    + (f'<text x="{x + 3:.1f}" y="{y + SVG_ROW_HEIGHT - 4}">{text}</text>' if width > 21 else "")
+                    + "</g>"
+                )
+                draw(child, x, level + 1)
+            x += width
+
+    draw(root, 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<text x="4" y="{SVG_ROW_HEIGHT - 4}">{escape(title)}: {root[0]} samples</text>'
+        + "".join(rects) + "</svg>\n"
+    )
+
+# Example usage:
+"""
+stage_times = StageTimes()
+profiler = SamplingProfiler(stage_times=stage_times)
+profiler.start()
+with stage_times.measure("research"):
+    run_research()
+profiler.stop()
+profiler.write("profile.svg")  # or profile.folded for flamegraph.pl / speedscope
+print(stage_times.summary())
+"""
@@ -0,0 +1,101 @@
+"""
+Prompt assembly laid out for provider-side prompt caching.
+Each stage's long static instructions form a byte-identical system-message
+prefix, and the per-entry data follows in the user message, so every call
+after the first can reuse the cached prefix. Cache hits are tallied per stage
+from the usage metadata the providers return.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+# How each provider caches a stable prefix:
+#   anthropic: explicit breakpoint, a cache_control block on the system prompt
+#   openai:    automatic for prefixes of 1024+ tokens, nothing to tag
+#   google:    implicit caching on Gemini 2.x models, nothing to tag
+EXPLICIT_CACHE_PROVIDERS = {"anthropic"}
+
+# Stats stage for web searches: one call each, latency but no tokens
+SEARCH_STAGE = "search"
+
+@dataclass(frozen=True)
+class StagePrompt:
+    stage: str
+    instructions: str  # Static; sent verbatim, never formatted
+    inputs: str        # Per-entry data, filled with str.format
+
+    def to_messages(self, provider: str, **values) -> list:
+        """Build [system prefix, per-entry user message] for the provider"""
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        if provider in EXPLICIT_CACHE_PROVIDERS:
+            system = SystemMessage(content=[{
+                "type": "text",
+                "text": self.instructions,
+                "cache_control": {"type": "ephemeral"},
+            }])
+        else:
+            system = SystemMessage(content=self.instructions)
+        return [system, HumanMessage(content=self.inputs.format(**values))]
+
+class PromptCacheStats:
+    def __init__(self):
+        """Per-stage call, input-token and cached-token counters"""
+        self._lock = threading.Lock()  # The service mode runs entries on several threads
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, usage: dict, seconds: float = 0.0):
+        """Add one call's usage metadata (langchain's AIMessage.usage_metadata) and latency"""
+        usage = usage or {}
+        details = usage.get("input_token_details") or {}
+        with self._lock:
+            counts = self.stages.setdefault(stage, {
+                "calls": 0, "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "cache_writes": 0,
+                "seconds": 0.0,
+            })
+            counts["calls"] += 1
+            counts["input_tokens"] += usage.get("input_tokens") or 0
+            counts["output_tokens"] += usage.get("output_tokens") or 0
+            counts["cached_tokens"] += details.get("cache_read") or 0
+            counts["cache_writes"] += details.get("cache_creation") or 0
+            counts["seconds"] += seconds
+
+    def total_tokens(self) -> int:
+        """Input plus output tokens across all stages"""
+        with self._lock:
+            return sum(counts["input_tokens"] + counts["output_tokens"] for counts in self.stages.values())
+
+    def summary(self) -> str:
+        """Cached-token ratio per stage, for the end-of-run report"""
+        if not self.stages:
+            return "Prompt cache: no LLM calls"
+        lines = ["Prompt cache (cached / input tokens):"]
+        for stage, counts in self.stages.items():
+            if not counts["input_tokens"] and not counts["output_tokens"]:
+                # Calls that report no usage, such as web searches
+                lines.append(f"  {stage:<16} {counts['calls']:>4} calls")
+                continue
+            ratio = counts["cached_tokens"] / counts["input_tokens"] if counts["input_tokens"] else 0.0
+            lines.append(
+                f"  {stage:<16} {counts['calls']:>4} calls  "
+                f"{counts['cached_tokens']:>8} / {counts['input_tokens']:<8} ({ratio:.0%})"
+            )
+        return "\n".join(lines)
+
+class PromptRunner:
+    def __init__(self, llm, provider: str, stats: PromptCacheStats = None):
+        """Send stage prompts to llm, recording cache usage in stats"""
+        self.llm = llm
+        self.provider = provider
+        self.stats = stats or PromptCacheStats()
+
+    def run(self, prompt: StagePrompt, **values) -> str:
+        """Run one stage prompt and return the response text"""
+        started = time.monotonic()
+        response = self.llm.invoke(prompt.to_messages(self.provider, **values))
+        self.stats.record(prompt.stage, getattr(response, "usage_metadata", None), time.monotonic() - started)
+        return response.content if isinstance(response.content, str) else "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in response.content
+        )
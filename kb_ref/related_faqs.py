@@ -0,0 +1,164 @@
+"""
+Batch job that materializes related FAQs for every rfp_qa and faq row.
+All questions and answers are embedded once, the top-k most similar FAQs for
+every row come out of one blockwise matrix product, and the results replace
+the related_faq lookup table. The API then serves related items with a single
+primary-key range read. FAQs explicitly linked to an RFP question (rfpQaId,
+metadata.source_rfp_id or metadata.source_rfp_ids) always rank first.
+"""
+
+import argparse
+import json
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+from rfp_faq_clusters import DEFAULT_MODEL, connect, embed_questions
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS related_faq (
+    source_type TEXT NOT NULL,
+    source_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    faq_id INTEGER NOT NULL REFERENCES faq(id) ON DELETE CASCADE,
+    score REAL NOT NULL,
+    PRIMARY KEY (source_type, source_id, rank)
+);
+CREATE INDEX IF NOT EXISTS related_faq_faq_id_idx ON related_faq (faq_id);
+"""
+
+# Minimum similarity for a FAQ to count as related, per similarity backend
+DEFAULT_MIN_SCORES = {"embedding": 0.5, "tfidf": 0.15}
+
+# Score recorded for explicit RFP -> FAQ links
+LINKED_SCORE = 1.0
+
+def _text(question: str, answer: str) -> str:
+    return f"{question or ''}\n{answer or ''}"
+
+def _metadata(value) -> dict:
+    """psycopg2 returns JSONB as a dict, SQLite as text"""
+    if isinstance(value, str):
+        try:
+            return json.loads(value) or {}
+        except json.JSONDecodeError:
+            return {}
+    return value or {}
+
+def load_rows(conn) -> Tuple[list, list]:
+    """Load (id, question, answer, metadata, rfpQaId) FAQ rows and (id, question, answer) RFP rows"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT id, question, answer, metadata, "rfpQaId" FROM faq ORDER BY id')
+        faqs = cursor.fetchall()
+        cursor.execute("SELECT id, question, answer FROM rfp_qa ORDER BY id")
+        rfps = cursor.fetchall()
+    finally:
+        cursor.close()
+    return faqs, rfps
+
+def explicit_links(faqs: list) -> Dict[int, List[int]]:
+    """Map RFP question ids to the FAQs explicitly created from them"""
+    links: Dict[int, List[int]] = {}
+    for faq_id, _, _, metadata, rfp_qa_id in faqs:
+        metadata = _metadata(metadata)
+        sources = [rfp_qa_id, metadata.get("source_rfp_id")] + list(metadata.get("source_rfp_ids") or [])
+        for source in sources:
+            if isinstance(source, int) and faq_id not in links.setdefault(source, []):
+                links[source].append(faq_id)
+    return links
+
+def top_k_related(queries: np.ndarray, faq_vectors: np.ndarray, k: int, min_score: float,
+                  exclude_self: bool = False, block_size: int = 1024) -> Iterator[List[Tuple[int, float]]]:
+    """Yield, per query row, up to k (faq position, score) pairs in descending score order
+
+    With exclude_self, query row i is FAQ i and never relates to itself.
+    """
+    n_faqs = len(faq_vectors)
+    k = min(k, n_faqs)
+    for start in range(0, len(queries), block_size):
+        scores = queries[start:start + block_size] @ faq_vectors.T
+        if exclude_self:
+            rows = np.arange(len(scores))
+            scores[rows, rows + start] = -np.inf
+        if k == 0:
+            for _ in range(len(scores)):
+                yield []
+            continue
+        # argpartition finds the top k in linear time; only those k get sorted
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+        for positions, row_scores in zip(candidates, candidate_scores):
+            yield [(int(position), float(score)) for position, score in zip(positions, row_scores)
+                   if score >= min_score]
+
+def build_related(faqs: list, rfps: list, k: int = 10, min_score: float = None,
+                  model_name: str = DEFAULT_MODEL) -> List[Tuple[str, int, int, int, float]]:
+    """Compute (source_type, source_id, rank, faq_id, score) rows for every RFP question and FAQ"""
+    if not faqs:
+        return []
+    texts = [_text(row[1], row[2]) for row in faqs] + [_text(row[1], row[2]) for row in rfps]
+    vectors, backend = embed_questions(texts, model_name)
+    if min_score is None:
+        min_score = DEFAULT_MIN_SCORES[backend]
+    faq_vectors, rfp_vectors = vectors[:len(faqs)], vectors[len(faqs):]
+    faq_ids = [row[0] for row in faqs]
+    links = explicit_links(faqs)
+
+    rows = []
+    for (rfp_id, _, _), related in zip(rfps, top_k_related(rfp_vectors, faq_vectors, k, min_score)):
+        linked = links.get(rfp_id, [])
+        ranked = [(faq_id, LINKED_SCORE) for faq_id in linked]
+        ranked += [(faq_ids[position], score) for position, score in related if faq_ids[position] not in linked]
+        rows += [("rfp_qa", rfp_id, rank, faq_id, score)
+                 for rank, (faq_id, score) in enumerate(ranked[:max(k, len(linked))], 1)]
+
+    for faq_id, related in zip(faq_ids, top_k_related(faq_vectors, faq_vectors, k, min_score, exclude_self=True)):
+        rows += [("faq", faq_id, rank, faq_ids[position], score)
+                 for rank, (position, score) in enumerate(related, 1)]
+    return rows
+
+def replace_related(conn, dialect: str, rows: List[tuple], batch_size: int = 1000):
+    """Swap the lookup table's contents for rows in one transaction"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM related_faq")
+        statement = "INSERT INTO related_faq (source_type, source_id, rank, faq_id, score) VALUES "
+        if dialect == "postgresql":
+            from psycopg2.extras import execute_values
+            execute_values(cursor, statement + "%s", rows, page_size=batch_size)
+        else:
+            cursor.executemany(statement + "(?, ?, ?, ?, ?)", rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute related FAQs for every RFP question and FAQ')
+    parser.add_argument('database_url', help='postgresql://... or sqlite:///path')
+    parser.add_argument('-k', '--top-k', type=int, default=10, help='Related FAQs kept per row (default: 10)')
+    parser.add_argument('--min-score', type=float,
+                       help='Minimum similarity to count as related (default: 0.5 with a model, 0.15 with TF-IDF)')
+    parser.add_argument('--model', default=DEFAULT_MODEL,
+                       help=f'sentence-transformers model for similarity (default: {DEFAULT_MODEL}); '
+                            'pass "" to use hashed TF-IDF')
+
+    args = parser.parse_args()
+
+    conn, dialect = connect(args.database_url)
+    try:
+        if dialect == "sqlite":
+            conn.executescript(SQLITE_SCHEMA)
+        faqs, rfps = load_rows(conn)
+        rows = build_related(faqs, rfps, args.top_k, args.min_score, args.model or None)
+        replace_related(conn, dialect, rows)
+        print(f"Wrote {len(rows)} related FAQ links for {len(rfps)} RFP questions and {len(faqs)} FAQs")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
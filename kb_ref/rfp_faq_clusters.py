@@ -0,0 +1,324 @@
+"""
+Batch job that drafts one FAQ per cluster of paraphrased RFP questions.
+All rfp_qa questions are embedded with a local similarity model and grouped by
+cosine similarity, with every pair in a group above the threshold. Each group
+gets a canonical representative and a single drafted FAQ, and that FAQ links
+the member questions the model was shown: rfpQaId points at the canonical row,
+and metadata.source_rfp_ids lists those members. Members beyond the prompt
+limit stay unlinked and are clustered again on the next run.
+"""
+
+import argparse
+import csv
+import json
+import re
+import sqlite3
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# SQLite stand-in for the app's rfp_qa and faq tables (see prisma/schema.prisma)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rfp_qa (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    record_id TEXT,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    metadata TEXT DEFAULT '{}',
+    company_name TEXT,
+    rfp_id TEXT
+);
+CREATE TABLE IF NOT EXISTS faq (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    metadata TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT NOT NULL,
+    visibility TEXT NOT NULL DEFAULT 'private',
+    status TEXT NOT NULL DEFAULT 'draft',
+    notes TEXT,
+    "rfpQaId" INTEGER REFERENCES rfp_qa(id)
+);
+"""
+
+# Default sentence-transformers model and the similarity each backend treats as a paraphrase
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_THRESHOLDS = {"embedding": 0.82, "tfidf": 0.6}
+
+# Member Q&A pairs shown to the LLM per cluster, most central first
+MAX_PROMPT_MEMBERS = 8
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "be", "by", "can", "do", "does", "for", "how", "in", "is",
+    "it", "of", "on", "or", "shall", "should", "that", "the", "this", "to", "what", "will",
+    "with", "you", "your",
+}
+
+CLUSTER_FAQ_PROMPT = """You are a helpful assistant that generates user-friendly, public-facing FAQs from RFP (Request for Proposal) documents. Several customers asked the same question in different words; write ONE FAQ entry that answers all of them.
+
+Important:
+- Do not include any customer-specific information or proprietary details. Focus on the general capabilities of the Hedgehog platform.
+- The audience is the public, including potential customers who may not know all the technical jargon. Explain concepts clearly.
+- Stay technically accurate: base the answer only on the RFP answers below. Where they differ, prefer the most recent and most specific one.
+
+Canonical question: {canonical_question}
+
+RFP questions and answers in this group:
+{members}
+
+Respond with only a JSON object: {{"question": "...", "answer": "..."}}"""
+
+@dataclass
+class RfpQuestion:
+    id: int
+    question: str
+    answer: str
+
+@dataclass
+class QuestionCluster:
+    canonical: RfpQuestion
+    members: List[RfpQuestion]  # Ordered by similarity to the canonical question, canonical first
+
+def connect(database_url: str):
+    """Connect to postgresql://... or sqlite:///path; returns (connection, dialect)"""
+    if database_url.startswith("sqlite:///"):
+        conn = sqlite3.connect(database_url[len("sqlite:///"):])
+        conn.executescript(SQLITE_SCHEMA)
+        return conn, "sqlite"
+    if database_url.startswith(("postgresql://", "postgres://")):
+        import psycopg2  # Only needed when talking to PostgreSQL
+        return psycopg2.connect(database_url), "postgresql"
+    raise ValueError(f"Unsupported database URL: {database_url}")
+
+def load_questions(conn, dialect: str, include_linked: bool = False) -> List[RfpQuestion]:
+    """Load rfp_qa rows, skipping ones a FAQ already covers unless include_linked"""
+    query = "SELECT id, question, answer FROM rfp_qa"
+    if not include_linked:
+        if dialect == "postgresql":
+            linked = """SELECT "rfpQaId" FROM faq WHERE "rfpQaId" IS NOT NULL
+                UNION SELECT (metadata->>'source_rfp_id')::int FROM faq
+                    WHERE jsonb_typeof(metadata->'source_rfp_id') = 'number'
+                UNION SELECT jsonb_array_elements_text(metadata->'source_rfp_ids')::int FROM faq
+                    WHERE jsonb_typeof(metadata->'source_rfp_ids') = 'array'"""
+        else:
+            linked = """SELECT "rfpQaId" FROM faq WHERE "rfpQaId" IS NOT NULL
+                UNION SELECT json_extract(metadata, '$.source_rfp_id') FROM faq
+                    WHERE json_type(metadata, '$.source_rfp_id') = 'integer'
+                UNION SELECT value FROM faq, json_each(faq.metadata, '$.source_rfp_ids')"""
+        query += f" WHERE id NOT IN ({linked})"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query + " ORDER BY id")
+        return [RfpQuestion(id=row[0], question=row[1] or "", answer=row[2] or "") for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def _features(text: str) -> List[str]:
+    """Word unigrams and bigrams, minus stopwords"""
+    words = [word for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+def tfidf_embeddings(texts: List[str], dimensions: int = 4096) -> np.ndarray:
+    """Hashed TF-IDF vectors; the dependency-free fallback similarity model"""
+    counts = np.zeros((len(texts), dimensions), dtype=np.float32)
+    for row, text in enumerate(texts):
+        # crc32 rather than hash(): stable across processes
+        columns = [zlib.crc32(feature.encode()) % dimensions for feature in _features(text)]
+        np.add.at(counts[row], columns, 1)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+    vectors = np.log1p(counts) * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def embed_questions(texts: List[str], model_name: Optional[str] = DEFAULT_MODEL) -> Tuple[np.ndarray, str]:
+    """Embed texts with a local sentence-transformers model, or hashed TF-IDF without one
+
+    Returns (unit-length vectors, backend name).
+    """
+    if model_name:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            print("sentence-transformers is not installed; falling back to TF-IDF similarity")
+        else:
+            model = SentenceTransformer(model_name)
+            vectors = model.encode(texts, batch_size=64, normalize_embeddings=True, show_progress_bar=False)
+            return np.asarray(vectors, dtype=np.float32), "embedding"
+    return tfidf_embeddings(texts), "tfidf"
+
+def cluster_questions(questions: List[RfpQuestion], vectors: np.ndarray, threshold: float,
+                      block_size: int = 1024) -> List[QuestionCluster]:
+    """Group questions whose similarity reaches threshold and pick each group's canonical question
+
+    Groups are merged along the most similar pairs first, and only when every
+    pair across the two groups reaches the threshold (complete linkage), so a
+    chain of near-paraphrases cannot pull unrelated questions together.
+    Candidate pairs are found a block of rows at a time so memory stays at
+    block_size x n. The canonical question is the medoid: the member most
+    similar on average to the rest of its group.
+    """
+    similarity_values, pair_rows, pair_columns = [], [], []
+    for start in range(0, len(questions), block_size):
+        similarities = vectors[start:start + block_size] @ vectors.T
+        # Each pair once: column > row
+        rows, columns = np.nonzero(np.triu(similarities >= threshold, k=start + 1))
+        similarity_values.append(similarities[rows, columns])
+        pair_rows.append(rows + start)
+        pair_columns.append(columns)
+
+    groups: Dict[int, List[int]] = {index: [index] for index in range(len(questions))}
+    group_of = list(range(len(questions)))
+    if similarity_values:
+        values, rows, columns = (np.concatenate(parts) for parts in (similarity_values, pair_rows, pair_columns))
+        # Most similar first; ties by position, keeping runs deterministic
+        for pair in np.lexsort((columns, rows, -values)):
+            group_a, group_b = sorted((group_of[rows[pair]], group_of[columns[pair]]))
+            if group_a == group_b:
+                continue
+            if (vectors[groups[group_a]] @ vectors[groups[group_b]].T).min() < threshold:
+                continue
+            for index in groups[group_b]:
+                group_of[index] = group_a
+            groups[group_a] = sorted(groups[group_a] + groups.pop(group_b))
+
+    clusters = []
+    for indices in groups.values():
+        group_vectors = vectors[indices]
+        similarities = group_vectors @ group_vectors.T
+        # Ties go to the earliest row, keeping runs deterministic
+        canonical_position = int(np.argmax(similarities.mean(axis=1)))
+        order = np.argsort(-similarities[canonical_position], kind="stable")
+        members = [questions[indices[position]] for position in order]
+        clusters.append(QuestionCluster(canonical=questions[indices[canonical_position]], members=members))
+
+    # Largest clusters first: they save the most generation calls
+    clusters.sort(key=lambda cluster: (-len(cluster.members), cluster.canonical.id))
+    return clusters
+
+def linked_members(cluster: QuestionCluster) -> List[RfpQuestion]:
+    """Members a drafted FAQ answers: the ones draft_faq puts in the prompt"""
+    return cluster.members[:MAX_PROMPT_MEMBERS]
+
+def draft_faq(llm, cluster: QuestionCluster) -> Optional[Dict[str, str]]:
+    """Draft one FAQ answering the cluster's linked questions"""
+    members = "\n\n".join(
+        f"Q: {member.question}\nA: {member.answer}" for member in linked_members(cluster)
+    )
+    prompt = CLUSTER_FAQ_PROMPT.format(canonical_question=cluster.canonical.question, members=members)
+    try:
+        response = llm.invoke(prompt).content
+        match = re.search(r"\{.*\}", response, re.DOTALL)
+        faq = json.loads(match.group(0) if match else response)
+        if not faq.get("question") or not faq.get("answer"):
+            raise ValueError("missing question or answer")
+        return {"question": faq["question"], "answer": faq["answer"]}
+    except Exception as e:
+        print(f"Error drafting FAQ for RFP question {cluster.canonical.id}: {str(e)}")
+        return None
+
+def save_faq(conn, dialect: str, cluster: QuestionCluster, faq: Dict[str, str]) -> int:
+    """Insert a draft FAQ linked to the cluster members it was drafted from; returns its id"""
+    linked = linked_members(cluster)
+    metadata = {
+        "source_rfp_id": cluster.canonical.id,
+        "source_rfp_ids": [member.id for member in linked],
+        "cluster_size": len(cluster.members),
+        "generated_by": "rfp_faq_clusters",
+    }
+    now = datetime.now().isoformat()
+    cursor = conn.cursor()
+    try:
+        if dialect == "postgresql":
+            cursor.execute(
+                """INSERT INTO faq (question, answer, metadata, created_at, updated_at, visibility, status, "rfpQaId")
+                   VALUES (%s, %s, CAST(%s AS JSONB), %s, %s, 'private', 'draft', %s) RETURNING id""",
+                (faq["question"], faq["answer"], json.dumps(metadata), now, now, cluster.canonical.id)
+            )
+            faq_id = cursor.fetchone()[0]
+        else:
+            cursor.execute(
+                """INSERT INTO faq (question, answer, metadata, created_at, updated_at, visibility, status, "rfpQaId")
+                   VALUES (?, ?, ?, ?, ?, 'private', 'draft', ?)""",
+                (faq["question"], faq["answer"], json.dumps(metadata), now, now, cluster.canonical.id)
+            )
+            faq_id = cursor.lastrowid
+        conn.commit()
+        return faq_id
+    finally:
+        cursor.close()
+
+def write_clusters_csv(path: str, clusters: List[QuestionCluster]):
+    """Write one row per cluster for review"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["cluster", "size", "canonical_rfp_id", "canonical_question", "member_rfp_ids"])
+        for number, cluster in enumerate(clusters, 1):
+            writer.writerow([
+                number, len(cluster.members), cluster.canonical.id, cluster.canonical.question,
+                " ".join(str(member.id) for member in cluster.members),
+            ])
+
+def main():
+    parser = argparse.ArgumentParser(description='Cluster paraphrased RFP questions and draft one FAQ per cluster')
+    parser.add_argument('database_url', help='postgresql://... or sqlite:///path')
+    parser.add_argument('--model', default=DEFAULT_MODEL,
+                       help=f'sentence-transformers model for similarity (default: {DEFAULT_MODEL}); '
+                            'pass "" to use hashed TF-IDF')
+    parser.add_argument('--threshold', type=float,
+                       help='Cosine similarity at which questions count as paraphrases '
+                            '(default: 0.82 with a model, 0.6 with TF-IDF)')
+    parser.add_argument('--min-size', type=int, default=1,
+                       help='Only draft FAQs for clusters with at least this many questions (default: 1)')
+    parser.add_argument('--include-linked', action='store_true',
+                       help='Also cluster RFP questions that already have a FAQ')
+    parser.add_argument('--clusters-csv', help='Write the clusters to this CSV for review')
+    parser.add_argument('--dry-run', action='store_true', help='Cluster only; draft and save no FAQs')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent FAQ drafting calls (default: 4)')
+
+    args = parser.parse_args()
+
+    conn, dialect = connect(args.database_url)
+    try:
+        questions = load_questions(conn, dialect, args.include_linked)
+        if not questions:
+            print("No unlinked RFP questions to cluster")
+            return
+
+        vectors, backend = embed_questions([question.question for question in questions], args.model or None)
+        threshold = args.threshold if args.threshold is not None else DEFAULT_THRESHOLDS[backend]
+        clusters = cluster_questions(questions, vectors, threshold)
+        selected = [cluster for cluster in clusters if len(cluster.members) >= args.min_size]
+        print(f"{len(questions)} questions -> {len(clusters)} clusters ({backend}, threshold {threshold}); "
+              f"drafting {len(selected)} FAQs instead of {sum(len(c.members) for c in selected)}")
+
+        if args.clusters_csv:
+            write_clusters_csv(args.clusters_csv, clusters)
+        if args.dry_run:
+            return
+
+        from dotenv import load_dotenv
+        from langchain_openai import ChatOpenAI
+
+        load_dotenv()
+        llm = ChatOpenAI(temperature=0.3, model="gpt-4o")
+
+        created, covered = 0, 0
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            # Drafting runs concurrently; inserts stay on this thread's connection
+            for cluster, faq in zip(selected, executor.map(lambda c: draft_faq(llm, c), selected)):
+                if faq:
+                    save_faq(conn, dialect, cluster, faq)
+                    created += 1
+                    covered += len(linked_members(cluster))
+        print(f"Created {created} draft FAQs covering {covered} RFP questions")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Priority scheduling for KB processing runs.
+Orders entries by a weighted score so the entries most in need of work go
+first. The score combines the local QC audit (lib/qc_audit.py), staleness of
+Last modified date, Status, body length, and whether a previous run already
+produced a fresh result. RunLimits stops a run cleanly before a deadline or
+token budget would be exceeded.
+"""
+
+import csv
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+# Bodies at or above this many words get no length priority
+TARGET_BODY_WORDS = 300
+
+# Entries this old or older get full staleness priority
+STALENESS_HORIZON_DAYS = 365
+
+# Priority of each Status; published entries are what readers see
+STATUS_PRIORITY = {"PUBLISHED": 1.0, "DRAFT": 0.5}
+
+@dataclass
+class PriorityWeights:
+    quality: float = 0.4     # Low local QC audit score
+    staleness: float = 0.25  # Old Last modified date
+    status: float = 0.15     # Published before draft
+    length: float = 0.1      # Thin bodies
+    cache: float = 0.1       # No fresh result from a previous run
+
+    @classmethod
+    def parse(cls, spec: str) -> "PriorityWeights":
+        """Parse 'quality=0.5,staleness=0.3'; unspecified weights keep their defaults"""
+        weights = cls()
+        names = {field.name for field in fields(cls)}
+        for part in filter(None, (part.strip() for part in (spec or "").split(","))):
+            name, _, value = part.partition("=")
+            if name not in names:
+                raise ValueError(f"Unknown priority weight '{name}', expected one of {', '.join(sorted(names))}")
+            setattr(weights, name, float(value))
+        return weights
+
+def load_audit_scores(path: str) -> Dict[str, float]:
+    """Read local_score per article URL from a qc_audit.py report"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["article_url"]: float(row["local_score"]) for row in csv.DictReader(f)}
+
+def load_fresh_results(path: str) -> Dict[str, str]:
+    """Map article URL to processing timestamp for entries a previous run processed"""
+    previous = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    processed = previous[previous["processing_status"] == "processed"]
+    return dict(zip(processed["Article URL"], processed["processing_timestamp"].astype(str)))
+
+def priority_scores(df: pd.DataFrame, weights: PriorityWeights,
+                    audit_scores: Optional[Dict[str, float]] = None,
+                    fresh_results: Optional[Dict[str, str]] = None,
+                    now: datetime = None) -> pd.Series:
+    """Score every row; higher means more valuable to process now
+
+    Each component is scaled to 0..1 and missing signals count as 0.5.
+    """
+    now = now or datetime.now(timezone.utc)
+    urls = df["Article URL"]
+
+    # QC audit scores run 0-10, higher is better
+    if audit_scores:
+        local = urls.map(audit_scores).astype(float)
+        quality = (1 - local / 10).clip(0, 1).fillna(0.5)
+    else:
+        quality = pd.Series(0.5, index=df.index)
+
+    modified = pd.to_datetime(df["Last modified date"], utc=True, errors="coerce")
+    age_days = (now - modified).dt.total_seconds() / 86400
+    staleness = (age_days / STALENESS_HORIZON_DAYS).clip(0, 1).fillna(0.5)
+
+    status = df["Status"].astype(str).str.upper().map(STATUS_PRIORITY).fillna(0.5)
+
+    words = df["Article body"].fillna("").astype(str).str.count(r"\S+")
+    length = (1 - words / TARGET_BODY_WORDS).clip(0, 1)
+
+    # A previous result is fresh when it is newer than the entry's last edit
+    if fresh_results:
+        processed_at = pd.to_datetime(urls.map(fresh_results), utc=True, errors="coerce")
+        fresh = processed_at.notna() & (modified.isna() | (processed_at >= modified))
+        cache = (~fresh).astype(float)
+    else:
+        cache = pd.Series(1.0, index=df.index)
+
+    return (weights.quality * quality + weights.staleness * staleness + weights.status * status
+            + weights.length * length + weights.cache * cache)
+
+def schedule(df: pd.DataFrame, weights: PriorityWeights, audit_scores: Optional[Dict[str, float]] = None,
+             fresh_results: Optional[Dict[str, str]] = None) -> List[int]:
+    """Row positions in processing order: highest priority first, file order breaking ties"""
+    scores = priority_scores(df, weights, audit_scores, fresh_results).to_numpy()
+    return np.argsort(-scores, kind="stable").tolist()
+
+class RunLimits:
+    def __init__(self, deadline_seconds: float = None, token_budget: int = None):
+        """Wall-clock and token limits for a run; either may be None"""
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.token_budget = token_budget
+        self.entries = 0
+        self.elapsed = 0.0
+        self.tokens = 0
+        self.stop_reason = None
+
+    def record(self, seconds: float, tokens: int):
+        """Account for one finished entry"""
+        self.entries += 1
+        self.elapsed += seconds
+        self.tokens += tokens
+
+    def allows_next(self) -> bool:
+        """Whether an average entry still fits inside both limits"""
+        average_seconds = self.elapsed / self.entries if self.entries else 0
+        average_tokens = self.tokens / self.entries if self.entries else 0
+        if self.deadline is not None and time.monotonic() + average_seconds > self.deadline:
+            self.stop_reason = "deadline"
+            return False
+        if self.token_budget is not None and self.tokens + average_tokens > self.token_budget:
+            self.stop_reason = "token budget"
+            return False
+        return True
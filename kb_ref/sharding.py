@@ -0,0 +1,89 @@
+"""
+Sharded execution support for the KB processor.
+Splits an input into N disjoint shards so separate processes or machines can
+each run `kb_processor.py --shard i/N`, and merges the shard outputs back into
+one file in the original row order.
+"""
+
+import argparse
+import hashlib
+from typing import List, Tuple
+import pandas as pd
+
+# Column recording each row's position in the unsharded input
+SOURCE_ROW_COLUMN = 'source_row'
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse an 'i/N' shard spec into (index, count)"""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected i/N such as 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}', need 0 <= i < N")
+    return index, count
+
+def stable_shard(key: str, count: int) -> int:
+    """Assign a key to a shard, identically in every process and on every machine"""
+    return int(hashlib.sha1(str(key).encode()).hexdigest(), 16) % count
+
+def select_shard(df: pd.DataFrame, index: int, count: int, by: str = 'hash') -> pd.DataFrame:
+    """Return this shard's rows, tagged with their position in the full input
+
+    by='hash' partitions on a stable hash of the article URL, which keeps an
+    entry in the same shard when rows are added or reordered; by='range'
+    splits the rows into N contiguous blocks.
+    """
+    df = df.copy()
+    df[SOURCE_ROW_COLUMN] = range(len(df))
+    if by == 'hash':
+        mask = df['Article URL'].map(lambda url: stable_shard(url, count) == index)
+    elif by == 'range':
+        start = index * len(df) // count
+        end = (index + 1) * len(df) // count
+        mask = (df[SOURCE_ROW_COLUMN] >= start) & (df[SOURCE_ROW_COLUMN] < end)
+    else:
+        raise ValueError(f"Unsupported shard strategy: {by}")
+    return df[mask].reset_index(drop=True)
+
+def _read(path: str) -> pd.DataFrame:
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+def _metadata_path(path: str) -> str:
+    return path[:-len('.parquet')] + '.metadata.parquet'
+
+def merge_shards(shard_files: List[str], output_file: str):
+    """Reassemble shard outputs into one file ordered by the original input rows"""
+    merged = pd.concat([_read(path) for path in shard_files], ignore_index=True)
+    if SOURCE_ROW_COLUMN not in merged.columns:
+        raise ValueError(f"Shard outputs have no '{SOURCE_ROW_COLUMN}' column; were they run with --shard?")
+
+    duplicates = merged[SOURCE_ROW_COLUMN].duplicated()
+    if duplicates.any():
+        rows = merged.loc[duplicates, SOURCE_ROW_COLUMN].tolist()
+        raise ValueError(f"Input rows appear in more than one shard: {rows[:10]}")
+
+    merged = merged.sort_values(SOURCE_ROW_COLUMN, kind='stable').drop(columns=[SOURCE_ROW_COLUMN])
+
+    if output_file.endswith('.parquet'):
+        merged.to_parquet(output_file, index=False, compression='snappy')
+        # Metadata follows the merged article order
+        metadata = pd.concat([pd.read_parquet(_metadata_path(path)) for path in shard_files], ignore_index=True)
+        order = {url: position for position, url in enumerate(merged['Article URL'])}
+        metadata = metadata.sort_values('Article URL', key=lambda urls: urls.map(order), kind='stable')
+        metadata.to_parquet(_metadata_path(output_file), index=False, compression='zstd')
+    else:
+        merged.to_csv(output_file, index=False, quoting=1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge kb_processor shard outputs into one file')
+    parser.add_argument('output_file', help='Merged output file (CSV, or Parquet when it ends in .parquet)')
+    parser.add_argument('shard_files', nargs='+', help='Shard output files produced with --shard')
+
+    args = parser.parse_args()
+    merge_shards(args.shard_files, args.output_file)
+
+if __name__ == "__main__":
+    main()
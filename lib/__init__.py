@@ -0,0 +1,5 @@
+"""
+Python research and quality control systems for KB content.
+Import modules as lib.<module> from the repository root; command-line tools
+run with python -m (e.g. python -m lib.qc_audit).
+"""
@@ -0,0 +1,241 @@
+"""
+Streaming HTML structure validation for KB entry bodies.
+Checks bodies in a single event-driven pass against the tags, attributes and
+styles HubSpot accepts, as captured in kb_ref/hubspot_field_formatting_reference.json.
+"""
+
+import csv
+import io
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+DEFAULT_REFERENCE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "kb_ref", "hubspot_field_formatting_reference.json"
+)
+
+# Position of "Article body" in a HubSpot KB export row
+ARTICLE_BODY_COLUMN = 5
+
+LIST_TAGS = {"ul", "ol"}
+HEADER_TAGS = {"h3", "h4"}
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "wbr"}
+# Elements whose end tag HTML lets authors omit; they close implicitly
+OPTIONAL_END_TAGS = {"p", "li"}
+# Start tags that implicitly close an open <p> (HTML spec, "in body" insertion mode)
+CLOSES_P = {
+    "address", "article", "aside", "blockquote", "center", "dd", "details", "dialog", "dir", "div",
+    "dl", "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5",
+    "h6", "header", "hgroup", "hr", "li", "main", "menu", "nav", "ol", "p", "pre", "section",
+    "summary", "table", "ul",
+}
+# Elements that bound the search for an open <p> ("button scope")
+P_SCOPE_BOUNDARIES = {"applet", "button", "caption", "html", "marquee", "object", "table", "td", "template", "th"}
+# Elements that stop the search for an open <li> to close
+LI_SCOPE_BOUNDARIES = LIST_TAGS | {"address", "div", "blockquote", "table", "td", "th"}
+# Line breaks come from the HubSpot editor (shift+enter) and appear throughout
+# real exports, but the reference entry doesn't happen to contain one
+IMPLICIT_TAGS = {"br"}
+
+@dataclass(frozen=True)
+class FormattingRules:
+    allowed_tags: FrozenSet[str]
+    allowed_attributes: Dict[str, FrozenSet[str]]  # Tag -> attribute names
+    allowed_styles: Dict[str, FrozenSet[str]]  # CSS property -> values
+
+@dataclass
+class StructureViolation:
+    line: int
+    column: int
+    tag: str
+    code: str  # Machine-readable violation type, e.g. "disallowed_tag"
+    issue: str
+
+@dataclass
+class StructureReport:
+    paragraphs: int = 0
+    headers: int = 0
+    lists: int = 0
+    empty_lists: int = 0
+    violations: List[StructureViolation] = field(default_factory=list)
+
+def _parse_style(style: str) -> List[Tuple[str, str]]:
+    """Split an inline style attribute into (property, value) pairs."""
+    declarations = []
+    for declaration in style.split(";"):
+        if ":" not in declaration:
+            continue
+        prop, value = declaration.split(":", 1)
+        declarations.append((prop.strip().lower(), value.strip().lower()))
+    return declarations
+
+class _RuleCollector(HTMLParser):
+    """Record every tag, attribute and style used in the reference body."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags: Set[str] = set()
+        self.attributes: Dict[str, Set[str]] = {}
+        self.styles: Dict[str, Set[str]] = {}
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag)
+        for name, value in attrs:
+            self.attributes.setdefault(tag, set()).add(name)
+            if name == "style" and value:
+                for prop, style_value in _parse_style(value):
+                    self.styles.setdefault(prop, set()).add(style_value)
+
+@lru_cache(maxsize=None)
+def load_formatting_rules(path: str = DEFAULT_REFERENCE_PATH) -> FormattingRules:
+    """Derive the allowed formatting from the HubSpot reference entry."""
+    with open(path, encoding="utf-8") as f:
+        raw = f.read().strip()
+
+    # The reference is a single export row wrapped in braces
+    if raw.startswith("{") and raw.endswith("}"):
+        raw = raw[1:-1]
+    row = next(csv.reader(io.StringIO(raw)))
+
+    collector = _RuleCollector()
+    collector.feed(row[ARTICLE_BODY_COLUMN])
+    collector.close()
+
+    return FormattingRules(
+        allowed_tags=frozenset(collector.tags | IMPLICIT_TAGS),
+        allowed_attributes={tag: frozenset(names) for tag, names in collector.attributes.items()},
+        allowed_styles={prop: frozenset(values) for prop, values in collector.styles.items()}
+    )
+
+class StructureValidator(HTMLParser):
+    """Single-pass validator; feed() may be called with partial chunks."""
+
+    def __init__(self, rules: Optional[FormattingRules] = None):
+        super().__init__(convert_charrefs=True)
+        self.rules = rules or load_formatting_rules()
+        self.report = StructureReport()
+        # Open elements as [tag, descendant list item count]
+        self._stack: List[list] = []
+
+    def _violation(self, tag: str, code: str, issue: str):
+        line, column = self.getpos()
+        self.report.violations.append(StructureViolation(line, column, tag, code, issue))
+
+    def _check_start(self, tag: str, attrs):
+        rules = self.rules
+        if tag not in rules.allowed_tags:
+            self._violation(tag, "disallowed_tag", f"Tag <{tag}> is not allowed")
+
+        allowed_attributes = rules.allowed_attributes.get(tag, frozenset())
+        for name, value in attrs:
+            if name not in allowed_attributes:
+                self._violation(tag, "disallowed_attribute",
+                                f"Attribute '{name}' is not allowed on <{tag}>")
+            elif name == "style" and value:
+                for prop, style_value in _parse_style(value):
+                    allowed_values = rules.allowed_styles.get(prop)
+                    if allowed_values is None:
+                        self._violation(tag, "disallowed_style",
+                                        f"Style property '{prop}' is not allowed")
+                    elif style_value not in allowed_values:
+                        self._violation(tag, "disallowed_style",
+                                        f"Style '{prop}: {style_value}' is not allowed")
+
+        if tag == "p":
+            self.report.paragraphs += 1
+        elif tag in HEADER_TAGS:
+            self.report.headers += 1
+        elif tag in LIST_TAGS:
+            self.report.lists += 1
+        elif tag == "li":
+            if not (self._stack and self._stack[-1][0] in LIST_TAGS):
+                self._violation(tag, "orphan_list_item", "List item outside of <ul> or <ol>")
+            # Any li inside a list counts for it, nested or not
+            for element in self._stack:
+                if element[0] in LIST_TAGS:
+                    element[1] += 1
+
+    def _find_open(self, tag: str, boundaries: Set[str]) -> Optional[int]:
+        """Stack position of the innermost open tag, unless a boundary element comes first."""
+        for position in range(len(self._stack) - 1, -1, -1):
+            open_tag = self._stack[position][0]
+            if open_tag == tag:
+                return position
+            if open_tag in boundaries:
+                return None
+        return None
+
+    def _close_implied(self, tag: str):
+        """Close elements a start tag ends implicitly: an open <p>, or the previous <li>."""
+        if tag == "li":
+            position = self._find_open("li", LI_SCOPE_BOUNDARIES)
+            if position is not None:
+                self._pop_to(position, tag)
+        if tag in CLOSES_P:
+            position = self._find_open("p", P_SCOPE_BOUNDARIES)
+            if position is not None:
+                self._pop_to(position, tag)
+
+    def _pop_to(self, position: int, closing_tag: str) -> list:
+        """Pop elements down to and including position; report any without an optional end tag."""
+        while len(self._stack) > position + 1:
+            open_tag, items = self._stack.pop()
+            self._finish(open_tag, items)
+            if open_tag not in OPTIONAL_END_TAGS:
+                self._violation(open_tag, "unclosed_tag", f"Unclosed <{open_tag}> inside <{closing_tag}>")
+        element = self._stack.pop()
+        self._finish(*element)
+        return element
+
+    def _finish(self, tag: str, items: int):
+        if tag in LIST_TAGS and items == 0:
+            self.report.empty_lists += 1
+            self._violation(tag, "empty_list", "List without list items")
+
+    def handle_starttag(self, tag, attrs):
+        self._close_implied(tag)
+        self._check_start(tag, attrs)
+        if tag not in VOID_TAGS:
+            self._stack.append([tag, 0])
+
+    def handle_startendtag(self, tag, attrs):
+        self._close_implied(tag)
+        self._check_start(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        position = self._find_open(tag, set())
+        if position is None:
+            self._violation(tag, "unmatched_closing_tag",
+                            f"Closing </{tag}> without matching opening tag")
+            return
+        # Anything opened after the matching tag was left unclosed, unless its end tag is optional
+        self._pop_to(position, tag)
+
+    def close(self) -> StructureReport:
+        """Finish parsing and return the report."""
+        super().close()
+        # The end of the body closes <p> and <li> implicitly
+        for open_tag, items in self._stack:
+            self._finish(open_tag, items)
+            if open_tag not in OPTIONAL_END_TAGS:
+                self._violation(open_tag, "unclosed_tag", f"Unclosed <{open_tag}>")
+        self._stack = []
+        return self.report
+
+def validate_structure(body: str, rules: Optional[FormattingRules] = None) -> StructureReport:
+    """Validate a complete body and return its structure report."""
+    validator = StructureValidator(rules)
+    validator.feed(body)
+    return validator.close()
+
+# Example usage:
+"""
+report = validate_structure(body)
+for violation in report.violations:
+    print(f"{violation.line}:{violation.column} <{violation.tag}> {violation.issue}")
+"""
@@ -0,0 +1,141 @@
+"""
+Shared async LLM client for the research and quality control systems.
+Provides a pooled, non-blocking chat completion client with timeouts,
+retries and concurrency limits.
+"""
+
+import asyncio
+import random
+import weakref
+from typing import Any, Dict, Optional, Tuple
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+# Errors worth retrying: the request may succeed if sent again later
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# Constructor settings a shared client is compared on
+CLIENT_SETTINGS = ("max_concurrency", "max_connections", "timeout",
+                   "max_retries", "backoff_base", "backoff_max")
+
+class AsyncLLMClient:
+    def __init__(self, api_key: str, max_concurrency: int = 8,
+                 max_connections: int = 20, timeout: float = 60.0,
+                 max_retries: int = 3, backoff_base: float = 1.0,
+                 backoff_max: float = 20.0):
+        """Initialize the client with a keep-alive connection pool."""
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # The semaphore and connection pool are bound to the event loop that
+        # first uses them, so each running loop gets its own
+        self._per_loop = weakref.WeakKeyDictionary()
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """Settings the client was created with."""
+        return {name: getattr(self, name) for name in CLIENT_SETTINGS}
+
+    def _loop_resources(self) -> Tuple[asyncio.Semaphore, httpx.AsyncClient, AsyncOpenAI]:
+        """Return the semaphore, HTTP pool and API client for the running loop."""
+        loop = asyncio.get_running_loop()
+        resources = self._per_loop.get(loop)
+        if resources is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=self.timeout
+            )
+            # Retries are handled here so backoff and timeouts stay in one place
+            client = AsyncOpenAI(
+                api_key=self.api_key,
+                http_client=http_client,
+                max_retries=0
+            )
+            resources = (asyncio.Semaphore(self.max_concurrency), http_client, client)
+            self._per_loop[loop] = resources
+        return resources
+
+    async def complete(self, prompt: str, model: str = "gpt-4",
+                       temperature: float = 0.3, max_tokens: int = 2000,
+                       timeout: Optional[float] = None) -> str:
+        """Run a single-message chat completion and return the reply text."""
+        timeout = timeout or self.timeout
+        semaphore, _, client = self._loop_resources()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    response = await asyncio.wait_for(
+                        client.chat.completions.create(
+                            model=model,
+                            messages=[{"role": "user", "content": prompt}],
+                            temperature=temperature,
+                            max_tokens=max_tokens
+                        ),
+                        timeout=timeout
+                    )
+                return response.choices[0].message.content
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                print(f"LLM call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def aclose(self) -> None:
+        """Close the running loop's HTTP connection pool."""
+        resources = self._per_loop.pop(asyncio.get_running_loop(), None)
+        if resources is not None:
+            await resources[1].aclose()
+
+_shared_clients: Dict[str, AsyncLLMClient] = {}
+
+def get_llm_client(api_key: str, **kwargs) -> AsyncLLMClient:
+    """Return the process-wide client for an API key, creating it on first use.
+
+    Settings passed after the first call must match the existing client's;
+    a mismatch raises ValueError rather than being silently ignored.
+    """
+    client = _shared_clients.get(api_key)
+    if client is None:
+        client = AsyncLLMClient(api_key, **kwargs)
+        _shared_clients[api_key] = client
+        return client
+    unknown = set(kwargs) - set(client.config)
+    if unknown:
+        raise TypeError(f"Unexpected client settings: {', '.join(sorted(unknown))}")
+    mismatched = {name: value for name, value in kwargs.items() if client.config[name] != value}
+    if mismatched:
+        raise ValueError(
+            "Shared LLM client already exists with different settings: "
+            + ", ".join(f"{name}={client.config[name]!r} (requested {value!r})"
+                        for name, value in mismatched.items())
+        )
+    return client
+
+# Example usage:
+"""
+llm = get_llm_client(os.getenv("OPENAI_API_KEY"), max_concurrency=16)
+replies = await asyncio.gather(*[
+    llm.complete(prompt, temperature=0.3, max_tokens=1000) for prompt in prompts
+])
+await llm.aclose()
+"""
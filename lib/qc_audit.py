@@ -0,0 +1,177 @@
+"""
+Offline quality audit for a whole KB corpus.
+Runs the local quality control checks (structure, formatting reference
+compliance, subtitle length and SEO) across a HubSpot export or kb_entries
+dump with a process pool, and ranks the entries that need the most work.
+No LLM calls are made. Run from the repository root: python -m lib.qc_audit
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Tuple
+from .quality_control import MIN_SCORES, check_structure
+from .seo_scoring import score_seo_batch
+
+# Source columns for each supported input layout
+HUBSPOT_COLUMNS = {
+    "url": "Article URL",
+    "title": "Article title",
+    "subtitle": "Article subtitle",
+    "body": "Article body",
+    "keywords": "Keywords",
+    "status": "Status",
+}
+KB_ENTRIES_COLUMNS = {
+    "url": "article_url",
+    "title": "article_title",
+    "subtitle": "article_subtitle",
+    "body": "article_body",
+    "keywords": "keywords",
+    "status": "status",
+}
+
+# Entry fields as (url, title, subtitle, body, keywords, status)
+Entry = Tuple[str, str, str, str, str, str]
+
+@dataclass
+class AuditRecord:
+    rank: int
+    article_url: str
+    article_title: str
+    status: str
+    local_score: float
+    structure_score: float
+    seo_score: float
+    subtitle_words: int
+    paragraphs: int
+    headers: int
+    formatting_violations: int
+    issues: str
+
+def _detect_columns(fieldnames: List[str]) -> Dict[str, str]:
+    """Pick the column mapping matching the input file's header."""
+    for columns in (HUBSPOT_COLUMNS, KB_ENTRIES_COLUMNS):
+        if columns["title"] in fieldnames and columns["body"] in fieldnames:
+            return columns
+    raise ValueError(f"Unrecognized input columns: {', '.join(fieldnames)}")
+
+def read_entries(input_file: str) -> Iterator[Entry]:
+    """Stream entries from a HubSpot export or kb_entries CSV dump."""
+    # Article bodies routinely exceed the csv module's default field limit
+    csv.field_size_limit(sys.maxsize)
+    with open(input_file, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        columns = _detect_columns(reader.fieldnames or [])
+        for row in reader:
+            yield tuple(row.get(columns[key]) or "" for key in
+                        ("url", "title", "subtitle", "body", "keywords", "status"))
+
+def _chunks(entries: Iterator[Entry], size: int) -> Iterator[List[Entry]]:
+    """Group entries into lists of at most size items."""
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def audit_chunk(entries: List[Entry]) -> List[AuditRecord]:
+    """Run every local check on a chunk of entries (executed in a worker)."""
+    keyword_lists = [
+        [k.strip() for k in keywords.split(",") if k.strip()]
+        for _, _, _, _, keywords, _ in entries
+    ]
+    seo_scores = score_seo_batch(
+        (title, subtitle, body, keywords)
+        for (_, title, subtitle, body, _, _), keywords in zip(entries, keyword_lists)
+    )
+
+    records = []
+    for (url, title, subtitle, body, _, status), seo_score in zip(entries, seo_scores):
+        structure = check_structure(subtitle, body)
+        issues = list(structure.deductions)
+        if seo_score < MIN_SCORES["seo_optimization"]:
+            issues.append("SEO optimization below minimum")
+
+        records.append(AuditRecord(
+            rank=0,
+            article_url=url,
+            article_title=title,
+            status=status,
+            # SEO and structure carry equal weight in the full QC score
+            local_score=round((structure.score + float(seo_score)) / 2, 2),
+            structure_score=round(structure.score, 2),
+            seo_score=round(float(seo_score), 2),
+            subtitle_words=structure.subtitle_words,
+            paragraphs=structure.report.paragraphs,
+            headers=structure.report.headers,
+            formatting_violations=sum(
+                1 for v in structure.report.violations if v.code != "empty_list"
+            ),
+            issues="; ".join(issues)
+        ))
+    return records
+
+def audit_corpus(input_file: str, workers: int = None,
+                 chunk_size: int = 200) -> List[AuditRecord]:
+    """Audit every entry in input_file, worst entries first."""
+    workers = workers or os.cpu_count() or 1
+    records = []
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep only a few chunks per worker queued so memory stays bounded
+        for chunk in _chunks(read_entries(input_file), chunk_size):
+            pending.add(executor.submit(audit_chunk, chunk))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    records.extend(future.result())
+        for future in pending:
+            records.extend(future.result())
+
+    records.sort(key=lambda r: (r.local_score, -r.formatting_violations, r.article_url))
+    for rank, record in enumerate(records, start=1):
+        record.rank = rank
+    return records
+
+def save_report(records: List[AuditRecord], output_file: str):
+    """Write the ranked audit report as CSV."""
+    with open(output_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(AuditRecord.__dataclass_fields__),
+                                quoting=csv.QUOTE_ALL)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(asdict(record))
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit KB entries with the local quality checks (no LLM calls)')
+    parser.add_argument('input_file', help='HubSpot export or kb_entries CSV dump')
+    parser.add_argument('-o', '--output', help='Write the full ranked report to this CSV file')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                        help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=200,
+                        help='Entries per worker task (default: 200)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='Number of worst entries to print (default: 20)')
+
+    args = parser.parse_args()
+
+    records = audit_corpus(args.input_file, args.workers, args.chunk_size)
+
+    if args.output:
+        save_report(records, args.output)
+
+    failing = sum(1 for r in records if r.issues)
+    print(f"Audited {len(records)} entries, {failing} with issues")
+    for record in records[:args.top]:
+        print(f"{record.rank:>5}  {record.local_score:5.2f}  {record.article_title}: "
+              f"{record.issues or 'no issues'}")
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,25 @@ Quality control system for KB entry content validation.
 Implements rubric-based evaluation and validation checks.
 """
 
+import asyncio
 import json
-from typing import Dict, List, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
-import openai
-from bs4 import BeautifulSoup
-import re
+from .llm_client import AsyncLLMClient, get_llm_client
+from .seo_scoring import score_seo
+from .html_structure import StructureReport, validate_structure
+from .score_cache import ScoreCache
+
+# Rubric dimensions scored by the LLM rather than by local checks
+LLM_RUBRIC_DIMENSIONS = ("technical_accuracy", "educational_value")
+
+MIN_SCORES = {
+    "technical_accuracy": 8.0,
+    "educational_value": 7.0,
+    "seo_optimization": 7.0,
+    "content_structure": 8.0,
+    "overall": 7.5
+}
 
 @dataclass
 class QualityMetrics:
@@ -21,33 +34,91 @@ class QualityMetrics:
     validation_status: str
     validation_details: str
 
+@dataclass
+class StructureCheck:
+    score: float
+    deductions: List[str]
+    subtitle_words: int
+    report: StructureReport
+
+def check_structure(subtitle: str, body: str) -> StructureCheck:
+    """Check content structure and formatting locally, without the LLM."""
+    score = 10.0
+    deductions = []
+    
+    # Check subtitle length (50-75 words ideal)
+    subtitle_words = len(subtitle.split())
+    if subtitle_words < 40 or subtitle_words > 85:
+        score -= 1
+        deductions.append("Subtitle length outside ideal range")
+    
+    # Check HTML formatting in a single streaming pass
+    report = validate_structure(body)
+    
+    # Check for required HTML elements
+    if not report.paragraphs:
+        score -= 2
+        deductions.append("Missing paragraph tags")
+    
+    if not report.headers:
+        score -= 1
+        deductions.append("Missing section headers")
+    
+    # Check for proper list formatting
+    for _ in range(report.empty_lists):
+        score -= 1
+        deductions.append("List without list items")
+    
+    # Check against the HubSpot formatting reference
+    formatting_violations = [
+        v for v in report.violations if v.code != "empty_list"
+    ]
+    if formatting_violations:
+        score -= 1
+        deductions.append(
+            "Formatting outside HubSpot reference: "
+            + "; ".join(f"line {v.line}: {v.issue}" for v in formatting_violations)
+        )
+    
+    return StructureCheck(
+        score=max(0, score),
+        deductions=deductions,
+        subtitle_words=subtitle_words,
+        report=report
+    )
+
 class QualityControl:
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str,
+                 llm_client: Optional[AsyncLLMClient] = None,
+                 combined_rubric: bool = False,
+                 score_cache: Optional[ScoreCache] = None):
         """Initialize the quality control system."""
         self.openai_api_key = openai_api_key
-        self.min_scores = {
-            "technical_accuracy": 8.0,
-            "educational_value": 7.0,
-            "seo_optimization": 7.0,
-            "content_structure": 8.0,
-            "overall": 7.5
-        }
+        self.llm = llm_client or get_llm_client(openai_api_key)
+        # Score all LLM rubric dimensions with a single call when enabled
+        self.combined_rubric = combined_rubric
+        # Reuse scores for dimensions whose inputs haven't changed
+        self.score_cache = score_cache
+        self.min_scores = dict(MIN_SCORES)
     
     async def evaluate_entry(self, title: str, subtitle: str, body: str, 
                            keywords: List[str], research_data: Dict) -> QualityMetrics:
         """Evaluate a KB entry against quality standards."""
-        # Run all evaluations
-        technical_score = await self._evaluate_technical_accuracy(
-            title, subtitle, body, research_data
-        )
-        educational_score = await self._evaluate_educational_value(
-            subtitle, body
-        )
-        seo_score = await self._evaluate_seo(
-            title, subtitle, body, keywords
-        )
-        structure_score = await self._evaluate_structure(
-            subtitle, body
+        # Run all evaluations concurrently. The local SEO and structure
+        # checks are CPU work and run in worker threads, so the LLM rubric
+        # requests keep going out on the event loop while they run.
+        (technical_score, educational_score), seo_score, structure_score = await asyncio.gather(
+            self._evaluate_llm_dimensions(
+                title, subtitle, body, research_data
+            ),
+            self._cached_score(
+                "seo_optimization", (title, subtitle, body, keywords),
+                lambda: self._evaluate_seo(title, subtitle, body, keywords)
+            ),
+            self._cached_score(
+                "content_structure", (subtitle, body),
+                lambda: self._evaluate_structure(subtitle, body)
+            )
         )
         
         # Calculate overall score
@@ -81,8 +152,119 @@ class QualityControl:
             validation_details=validation_details
         )
     
+    async def _evaluate_llm_dimensions(self, title: str, subtitle: str,
+                                       body: str, research_data: Dict) -> Tuple[float, float]:
+        """Score technical accuracy and educational value with the LLM."""
+        technical_inputs = (title, subtitle, body, research_data)
+        educational_inputs = (subtitle, body)
+        
+        # The combined call only pays off when neither dimension is cached
+        if self.combined_rubric and not self._has_cached_score(
+            "technical_accuracy", technical_inputs
+        ) and not self._has_cached_score("educational_value", educational_inputs):
+            scores = await self._evaluate_combined_rubric(
+                title, subtitle, body, research_data
+            )
+            if scores:
+                if self.score_cache:
+                    self.score_cache.set("technical_accuracy", technical_inputs,
+                                         scores["technical_accuracy"])
+                    self.score_cache.set("educational_value", educational_inputs,
+                                         scores["educational_value"])
+                return scores["technical_accuracy"], scores["educational_value"]
+            print("Combined rubric response invalid, falling back to per-dimension calls")
+        
+        technical_score, educational_score = await asyncio.gather(
+            self._cached_score(
+                "technical_accuracy", technical_inputs,
+                lambda: self._evaluate_technical_accuracy(
+                    title, subtitle, body, research_data
+                )
+            ),
+            self._cached_score(
+                "educational_value", educational_inputs,
+                lambda: self._evaluate_educational_value(subtitle, body)
+            )
+        )
+        return technical_score, educational_score
+    
+    def _has_cached_score(self, dimension: str, inputs: Any) -> bool:
+        """Check whether a dimension's score is cached for these inputs."""
+        return bool(self.score_cache) and self.score_cache.get(dimension, inputs) is not None
+    
+    async def _cached_score(self, dimension: str, inputs: Any,
+                            evaluate: Callable[[], Awaitable[Optional[float]]]) -> float:
+        """Return the cached score for a dimension, evaluating it on a miss.
+        
+        A None score marks a failed evaluation; it counts as 0 but isn't cached.
+        """
+        if self.score_cache:
+            cached = self.score_cache.get(dimension, inputs)
+            if cached is not None:
+                return cached
+        
+        score = await evaluate()
+        if score is None:
+            return 0.0
+        if self.score_cache:
+            self.score_cache.set(dimension, inputs, score)
+        return score
+    
+    async def _evaluate_combined_rubric(self, title: str, subtitle: str, body: str,
+                                        research_data: Dict) -> Optional[Dict[str, float]]:
+        """Evaluate every LLM-scored dimension in one call."""
+        evaluation_prompt = f"""
+        Evaluate this KB entry on two independent dimensions.
+        
+        Title: {title}
+        Subtitle: {subtitle}
+        Body: {body}
+        
+        Research Data: {json.dumps(research_data, separators=(',', ':'))}
+        
+        technical_accuracy - score from 0-10 based on:
+        1. Factual correctness
+        2. Industry standard alignment
+        3. Technical depth appropriateness
+        4. Verified Hedgehog claims (check against the research data)
+        
+        educational_value - score from 0-10 based on:
+        1. Concept clarity
+        2. Logical progression
+        3. Practical examples
+        4. Prerequisite handling
+        
+        Return ONLY this JSON object, with no other keys or text:
+        {{
+            "technical_accuracy": {{"score": float, "explanation": string}},
+            "educational_value": {{"score": float, "explanation": string}}
+        }}
+        """
+        
+        result = await self._get_gpt4_evaluation(evaluation_prompt)
+        return self._validate_rubric_result(result)
+    
+    def _validate_rubric_result(self, result: Optional[Dict]) -> Optional[Dict[str, float]]:
+        """Check a combined rubric response against its schema, returning scores."""
+        if not isinstance(result, dict) or set(result) != set(LLM_RUBRIC_DIMENSIONS):
+            return None
+        
+        scores = {}
+        for dimension in LLM_RUBRIC_DIMENSIONS:
+            entry = result[dimension]
+            if not isinstance(entry, dict) or not isinstance(entry.get("explanation"), str):
+                return None
+            score = entry.get("score")
+            # bool is an int subclass; reject it explicitly
+            if isinstance(score, bool) or not isinstance(score, (int, float)):
+                return None
+            if not 0 <= score <= 10:
+                return None
+            scores[dimension] = float(score)
+        return scores
+    
     async def _evaluate_technical_accuracy(self, title: str, subtitle: str, 
-                                         body: str, research_data: Dict) -> float:
+                                         body: str, research_data: Dict) -> Optional[float]:
         """Evaluate technical accuracy of the content."""
         evaluation_prompt = f"""
         Evaluate the technical accuracy of this KB entry:
@@ -107,9 +289,9 @@ class QualityControl:
         """
         
         result = await self._get_gpt4_evaluation(evaluation_prompt)
-        return float(result["score"]) if result else 0.0
+        return float(result["score"]) if result else None
     
-    async def _evaluate_educational_value(self, subtitle: str, body: str) -> float:
+    async def _evaluate_educational_value(self, subtitle: str, body: str) -> Optional[float]:
         """Evaluate educational value of the content."""
         evaluation_prompt = f"""
         Evaluate the educational value of this KB entry:
@@ -131,63 +313,17 @@ class QualityControl:
         """
         
         result = await self._get_gpt4_evaluation(evaluation_prompt)
-        return float(result["score"]) if result else 0.0
+        return float(result["score"]) if result else None
     
     async def _evaluate_seo(self, title: str, subtitle: str, 
                            body: str, keywords: List[str]) -> float:
         """Evaluate SEO optimization."""
-        # Check keyword density
-        text = f"{title} {subtitle} {body}"
-        word_count = len(text.split())
-        
-        keyword_scores = []
-        for keyword in keywords:
-            count = len(re.findall(rf'\b{re.escape(keyword)}\b', text, re.I))
-            density = (count / word_count) * 100
-            # Ideal density is between 0.5% and 2.5%
-            keyword_scores.append(min(10, max(0, 10 - abs(1.5 - density) * 4)))
-        
-        # Check content length (300-1000 words ideal)
-        length_score = 10
-        if word_count < 300:
-            length_score = word_count / 30  # Scales up to 10 at 300 words
-        elif word_count > 1000:
-            length_score = max(0, 10 - (word_count - 1000) / 100)
-        
-        # Average the scores
-        return sum(keyword_scores) / len(keyword_scores) * 0.7 + length_score * 0.3
+        # Keyword density and content length, all keywords counted in one pass
+        return await asyncio.to_thread(score_seo, title, subtitle, body, keywords)
     
     async def _evaluate_structure(self, subtitle: str, body: str) -> float:
         """Evaluate content structure and formatting."""
-        score = 10.0
-        deductions = []
-        
-        # Check subtitle length (50-75 words ideal)
-        subtitle_words = len(subtitle.split())
-        if subtitle_words < 40 or subtitle_words > 85:
-            score -= 1
-            deductions.append("Subtitle length outside ideal range")
-        
-        # Check HTML formatting
-        soup = BeautifulSoup(body, 'html.parser')
-        
-        # Check for required HTML elements
-        if not soup.find_all('p'):
-            score -= 2
-            deductions.append("Missing paragraph tags")
-        
-        if not soup.find_all(['h3', 'h4']):
-            score -= 1
-            deductions.append("Missing section headers")
-        
-        # Check for proper list formatting
-        lists = soup.find_all(['ul', 'ol'])
-        for lst in lists:
-            if not lst.find_all('li'):
-                score -= 1
-                deductions.append("List without list items")
-        
-        return max(0, score)
+        return (await asyncio.to_thread(check_structure, subtitle, body)).score
     
     async def _generate_recommendations(self, technical_score: float, 
                                      educational_score: float,
@@ -247,21 +383,23 @@ class QualityControl:
     async def _get_gpt4_evaluation(self, prompt: str) -> Dict:
         """Get GPT-4 evaluation for a given prompt."""
         try:
-            openai.api_key = self.openai_api_key
-            response = await openai.ChatCompletion.create(
+            response = await self.llm.complete(
+                prompt,
                 model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
                 max_tokens=1000
             )
-            return json.loads(response.choices[0].message.content)
+            return json.loads(response)
         except Exception as e:
             print(f"Error in GPT-4 evaluation: {e}")
             return None
 
 # Example usage:
 """
-qc = QualityControl(os.getenv("OPENAI_API_KEY"))
+qc = QualityControl(
+    os.getenv("OPENAI_API_KEY"),
+    score_cache=ScoreCache("qc_score_cache.sqlite")  # optional, persists across runs
+)
 metrics = await qc.evaluate_entry(
     title="Container Orchestration",
     subtitle="Container orchestration automates the deployment, management, scaling, and networking of containers...",
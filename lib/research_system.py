@@ -3,14 +3,16 @@ Research system for KB entry content generation.
 Implements multi-source research and analysis for high-quality content generation.
 """
 
+import asyncio
+import hashlib
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
 import requests
 from bs4 import BeautifulSoup
-import openai
 from dataclasses import dataclass
 from urllib.parse import urljoin
+from .llm_client import AsyncLLMClient, get_llm_client
 
 @dataclass
 class IntentAnalysis:
@@ -28,10 +30,21 @@ class ResearchResult:
     seo_insights: Dict[str, List[str]]  # Keywords and search patterns
     cross_links: List[Dict[str, str]]  # Related KB entries
 
+@dataclass
+class BatchResearchOutcome:
+    index: int  # Position of the item in the research_many input
+    title: str
+    result: Optional[ResearchResult]
+    error: Optional[str] = None
+
 class ResearchSystem:
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, branch_timeout: float = 60.0,
+                 llm_client: Optional[AsyncLLMClient] = None):
         """Initialize the research system with necessary API keys."""
         self.openai_api_key = openai_api_key
+        self.llm = llm_client or get_llm_client(openai_api_key)
+        # Per-branch time limit (seconds) for the concurrent research stages
+        self.branch_timeout = branch_timeout
         self.base_url = "https://githedgehog.com"
         self.github_repos = [
             "githedgehog/fabric",
@@ -40,6 +53,10 @@ class ResearchSystem:
             "githedgehog/docs",
             "githedgehog/lab"
         ]
+        # In-flight sub-queries shared across concurrent research calls, and
+        # the batch-scoped result cache used by research_many
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._query_cache: Optional[Dict[str, Any]] = None
     
     async def analyze_intent(self, title: str, category: str, 
                            subtitle: str, body: str) -> IntentAnalysis:
@@ -86,15 +103,14 @@ class ResearchSystem:
         """
 
         try:
-            openai.api_key = self.openai_api_key
-            response = await openai.ChatCompletion.create(
+            response = await self.llm.complete(
+                analysis_prompt,
                 model="gpt-4",
-                messages=[{"role": "user", "content": analysis_prompt}],
                 temperature=0.3,
                 max_tokens=2000
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(response)
             
             return IntentAnalysis(
                 primary_interpretation=result["primary_interpretation"],
@@ -112,20 +128,36 @@ class ResearchSystem:
                            subtitle: str = "", body: str = "") -> ResearchResult:
         """Conduct comprehensive research on a topic."""
         # First, analyze intent
-        intent_analysis = await self.analyze_intent(title, category, subtitle, body)
-        
-        # Use intent analysis to guide research
-        hedgehog_context = await self._research_hedgehog_sources(
-            title, intent_analysis
+        intent_analysis = await self._coalesce(
+            ("analyze_intent", title, category, subtitle, body),
+            lambda: self.analyze_intent(title, category, subtitle, body)
         )
-        technical_details = await self._research_technical_details(
-            title, intent_analysis
-        )
-        seo_insights = await self._analyze_seo(
-            title, category, intent_analysis
-        )
-        cross_links = await self._find_cross_links(
-            title, category, intent_analysis
+        
+        # Use intent analysis to guide research. The branches only depend on
+        # the intent analysis, so run them concurrently; a slow or failing
+        # branch falls back to an empty result instead of sinking the others.
+        hedgehog_context, technical_details, seo_insights, cross_links = await asyncio.gather(
+            self._run_branch(
+                "hedgehog sources",
+                self._research_hedgehog_sources(title, intent_analysis),
+                [],
+                bounded=False  # its site and GitHub searches are bounded individually
+            ),
+            self._run_branch(
+                "technical details",
+                self._research_technical_details(title, intent_analysis),
+                []
+            ),
+            self._run_branch(
+                "SEO analysis",
+                self._analyze_seo(title, category, intent_analysis),
+                self._empty_seo_results()
+            ),
+            self._run_branch(
+                "cross-links",
+                self._find_cross_links(title, category, intent_analysis),
+                []
+            )
         )
         
         return ResearchResult(
@@ -135,6 +167,47 @@ class ResearchSystem:
             cross_links=cross_links
         )
     
+    async def research_many(self, items: Iterable[Sequence[str]],
+                            concurrency: int = 8) -> AsyncIterator[BatchResearchOutcome]:
+        """Research a batch of (title, category, subtitle, body) items.
+
+        Items run with at most `concurrency` in flight. Identical sub-queries
+        across items are computed once for the batch, and outcomes are yielded
+        as each item finishes rather than in input order.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def limited(title: str, category: str, subtitle: str, body: str) -> ResearchResult:
+            async with semaphore:
+                return await self.research_topic(title, category, subtitle, body)
+        
+        async def run_item(index: int, item: Sequence[str]) -> BatchResearchOutcome:
+            title, category, subtitle, body = (tuple(item) + ("", ""))[:4]
+            try:
+                # Coalesce before taking a slot, so duplicates wait on the
+                # shared request without holding one
+                result = await self._coalesce(
+                    ("research_topic", title, category, subtitle, body),
+                    lambda: limited(title, category, subtitle, body)
+                )
+                return BatchResearchOutcome(index=index, title=title, result=result)
+            except Exception as e:
+                print(f"Error researching '{title}': {e}")
+                return BatchResearchOutcome(index=index, title=title, result=None, error=str(e))
+        
+        owns_cache = self._query_cache is None
+        if owns_cache:
+            self._query_cache = {}
+        tasks = [asyncio.ensure_future(run_item(i, item)) for i, item in enumerate(items)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+            if owns_cache:
+                self._query_cache = None
+    
     async def _research_hedgehog_sources(self, title: str, 
                                        intent: IntentAnalysis) -> List[Dict[str, str]]:
         """Research Hedgehog-specific information from official sources."""
@@ -143,27 +216,35 @@ class ResearchSystem:
         # Enhance search with intent context
         search_context = f"{title} {intent.primary_interpretation}"
         
-        # Search githedgehog.com with context
-        try:
-            site_content = await self._search_site(
-                search_context, 
-                intent.domain_context["technical_domain"]
+        # Search githedgehog.com and GitHub repos with context, concurrently
+        site_content, github_content = await asyncio.gather(
+            self._run_branch(
+                "githedgehog.com search",
+                self._coalesce(
+                    ("search_site", search_context, intent.domain_context["technical_domain"]),
+                    lambda: self._search_site(
+                        search_context, 
+                        intent.domain_context["technical_domain"]
+                    )
+                ),
+                None
+            ),
+            self._run_branch(
+                "GitHub repo search",
+                self._coalesce(
+                    ("search_github_repos", search_context, intent.research_guidance),
+                    lambda: self._search_github_repos(
+                        search_context,
+                        intent.research_guidance
+                    )
+                ),
+                None
             )
-            if site_content:
-                results.extend(site_content)
-        except Exception as e:
-            print(f"Error searching githedgehog.com: {e}")
-        
-        # Search GitHub repos with context
-        try:
-            github_content = await self._search_github_repos(
-                search_context,
-                intent.research_guidance
-            )
-            if github_content:
-                results.extend(github_content)
-        except Exception as e:
-            print(f"Error searching GitHub repos: {e}")
+        )
+        if site_content:
+            results.extend(site_content)
+        if github_content:
+            results.extend(github_content)
         
         return results
     
@@ -176,9 +257,12 @@ class ResearchSystem:
         search_query = f"{title} {intent.primary_interpretation} {intent.domain_context['technical_domain']}"
         
         try:
-            search_results = await self._search_duckduckgo(
-                search_query,
-                intent.concept_scope["included"]
+            search_results = await self._coalesce(
+                ("search_duckduckgo", search_query, intent.concept_scope["included"]),
+                lambda: self._search_duckduckgo(
+                    search_query,
+                    intent.concept_scope["included"]
+                )
             )
             if search_results:
                 results.extend(search_results)
@@ -190,12 +274,7 @@ class ResearchSystem:
     async def _analyze_seo(self, title: str, category: str, 
                           intent: IntentAnalysis) -> Dict[str, List[str]]:
         """Analyze SEO patterns and keywords with intent context."""
-        seo_results = {
-            "primary_keywords": [],
-            "related_terms": [],
-            "search_patterns": [],
-            "technical_phrases": []
-        }
+        seo_results = self._empty_seo_results()
         
         try:
             analysis_prompt = f"""
@@ -218,7 +297,10 @@ class ResearchSystem:
             - technical_phrases
             """
             
-            response = await self._get_gpt4_analysis(analysis_prompt)
+            response = await self._coalesce(
+                ("gpt4_analysis", analysis_prompt),
+                lambda: self._get_gpt4_analysis(analysis_prompt)
+            )
             if response:
                 seo_results.update(json.loads(response))
         except Exception as e:
@@ -233,7 +315,10 @@ class ResearchSystem:
         
         try:
             # Search existing KB entries
-            related_entries = await self._search_kb_entries(title, category, intent)
+            related_entries = await self._coalesce(
+                ("search_kb_entries", title, category, intent.primary_interpretation),
+                lambda: self._search_kb_entries(title, category, intent)
+            )
             if related_entries:
                 cross_links.extend(related_entries)
         except Exception as e:
@@ -241,6 +326,59 @@ class ResearchSystem:
         
         return cross_links
     
+    def _empty_seo_results(self) -> Dict[str, List[str]]:
+        """Return the SEO result skeleton used when no analysis is available."""
+        return {
+            "primary_keywords": [],
+            "related_terms": [],
+            "search_patterns": [],
+            "technical_phrases": []
+        }
+    
+    async def _run_branch(self, name: str, coro, default, bounded: bool = True):
+        """Await a research branch with a timeout, returning default on failure."""
+        timeout = self.branch_timeout if bounded else None
+        try:
+            return await asyncio.wait_for(coro, timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"Research branch '{name}' timed out after {timeout}s")
+        except Exception as e:
+            print(f"Error in research branch '{name}': {e}")
+        return default
+    
+    async def _coalesce(self, key_parts: tuple,
+                        factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory once per identical sub-query, sharing the result.
+
+        Concurrent callers with the same key await a single in-flight request
+        (singleflight). During research_many, completed results are also kept
+        for the rest of the batch.
+        """
+        key = hashlib.sha256(
+            json.dumps(key_parts, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        
+        if self._query_cache is not None and key in self._query_cache:
+            return self._query_cache[key]
+        
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._settle(key, done))
+        
+        # Shield the shared request so one caller's timeout doesn't cancel it
+        # for everyone else waiting on the same key
+        return await asyncio.shield(future)
+    
+    def _settle(self, key: str, future: asyncio.Future) -> None:
+        """Drop a finished request from the in-flight table, caching successes."""
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        if self._query_cache is not None:
+            self._query_cache[key] = future.result()
+    
     async def _search_site(self, query: str, technical_domain: str) -> List[Dict[str, str]]:
         """Search githedgehog.com for relevant content."""
         # Implement site search logic
@@ -264,14 +402,12 @@ class ResearchSystem:
     async def _get_gpt4_analysis(self, prompt: str) -> Optional[str]:
         """Get GPT-4 analysis for a given prompt."""
         try:
-            openai.api_key = self.openai_api_key
-            response = await openai.ChatCompletion.create(
+            return await self.llm.complete(
+                prompt,
                 model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
                 max_tokens=2000
             )
-            return response.choices[0].message.content
         except Exception as e:
             print(f"Error in GPT-4 analysis: {e}")
             return None
@@ -286,4 +422,12 @@ results = await research_system.research_topic(
 
 # Use results in content generation:
 print(json.dumps(results, indent=2))
+
+# Research a batch, handling each entry as soon as it finishes:
+async for outcome in research_system.research_many(
+    [("Container Orchestration", "Cloud Infrastructure"),
+     ("back-end network", "Glossary", subtitle, body)],
+    concurrency=8
+):
+    print(outcome.index, outcome.title, outcome.error or outcome.result)
 """
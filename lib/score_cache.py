@@ -0,0 +1,62 @@
+"""
+Persistent cache for quality control scores.
+Scores are keyed per rubric dimension by a hash of that dimension's inputs, so
+editing one field only invalidates the dimensions that actually read it.
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from typing import Any, Optional
+
+DEFAULT_CACHE_PATH = "qc_score_cache.sqlite"
+
+# Bump when a rubric prompt or scoring formula changes so stale scores miss
+SCORE_CACHE_VERSION = "1"
+
+class ScoreCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """Open (or create) the SQLite-backed score cache."""
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS qc_scores (
+                dimension TEXT NOT NULL,
+                input_hash TEXT NOT NULL,
+                score REAL NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (dimension, input_hash)
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def input_hash(dimension: str, inputs: Any) -> str:
+        """Hash a dimension's inputs into a stable cache key."""
+        payload = json.dumps(
+            [SCORE_CACHE_VERSION, dimension, inputs],
+            sort_keys=True, default=str, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, dimension: str, inputs: Any) -> Optional[float]:
+        """Return the cached score for these inputs, if any."""
+        row = self.conn.execute(
+            "SELECT score FROM qc_scores WHERE dimension = ? AND input_hash = ?",
+            (dimension, self.input_hash(dimension, inputs))
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, dimension: str, inputs: Any, score: float) -> None:
+        """Store the score computed for these inputs."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO qc_scores (dimension, input_hash, score, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (dimension, self.input_hash(dimension, inputs), score, datetime.now().isoformat())
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        """Close the cache database."""
+        self.conn.close()
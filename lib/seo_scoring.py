@@ -0,0 +1,146 @@
+"""
+SEO scoring for KB entries.
+Counts every keyword in a single pass over the text and scores keyword
+density and content length, for one entry or a whole corpus at once.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+
+# Words and individual punctuation marks; keywords and text are tokenized the
+# same way so matches always fall on word boundaries
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Ideal keyword density is between 0.5% and 2.5%, centred on 1.5%
+IDEAL_DENSITY = 1.5
+DENSITY_PENALTY = 4
+# Content length between 300 and 1000 words is ideal
+MIN_WORDS = 300
+MAX_WORDS = 1000
+
+KEYWORD_WEIGHT = 0.7
+LENGTH_WEIGHT = 0.3
+
+class KeywordMatcher:
+    def __init__(self, keywords: Sequence[str]):
+        """Build a token trie over the keywords for single-pass matching."""
+        self.keywords = list(keywords)
+        self._trie: Dict = {}
+        self._max_depth = 0
+
+        for keyword_id, keyword in enumerate(self.keywords):
+            tokens = TOKEN_PATTERN.findall(keyword.lower())
+            if not tokens:
+                continue
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(None, []).append(keyword_id)
+            self._max_depth = max(self._max_depth, len(tokens))
+
+    def count(self, text: str) -> List[int]:
+        """Count case-insensitive occurrences of every keyword in text."""
+        counts = [0] * len(self.keywords)
+        if not self._trie:
+            return counts
+
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        trie = self._trie
+        for start in range(len(tokens)):
+            node = trie.get(tokens[start])
+            position = start + 1
+            # Walk the trie from each token; overlapping keywords all count,
+            # matching independent per-keyword searches
+            while node is not None:
+                for keyword_id in node.get(None, ()):
+                    counts[keyword_id] += 1
+                if position == len(tokens) or position - start == self._max_depth:
+                    break
+                node = node.get(tokens[position])
+                position += 1
+        return counts
+
+@lru_cache(maxsize=1024)
+def _get_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """Reuse matchers across entries that share a keyword list."""
+    return KeywordMatcher(keywords)
+
+def _length_score(word_count: int) -> float:
+    """Score content length, scaling up to 10 at the ideal range."""
+    if word_count < MIN_WORDS:
+        return word_count / (MIN_WORDS / 10)
+    if word_count > MAX_WORDS:
+        return max(0, 10 - (word_count - MAX_WORDS) / 100)
+    return 10
+
+def score_seo(title: str, subtitle: str, body: str, keywords: Sequence[str]) -> float:
+    """Score keyword density and content length for a single entry (0-10)."""
+    text = f"{title} {subtitle} {body}"
+    word_count = len(text.split())
+    counts = _get_matcher(tuple(keywords)).count(text)
+
+    keyword_scores = []
+    for count in counts:
+        density = (count / word_count) * 100 if word_count else 0.0
+        keyword_scores.append(min(10, max(0, 10 - abs(IDEAL_DENSITY - density) * DENSITY_PENALTY)))
+
+    # An entry without keywords gets no keyword credit
+    keyword_score = sum(keyword_scores) / len(keyword_scores) if keyword_scores else 0.0
+    return keyword_score * KEYWORD_WEIGHT + _length_score(word_count) * LENGTH_WEIGHT
+
+def score_seo_batch(entries: Iterable[Tuple[str, str, str, Sequence[str]]]) -> np.ndarray:
+    """Score many (title, subtitle, body, keywords) entries at once.
+
+    Keyword counting is one pass per entry; the density and length scoring
+    for the whole batch is done with array operations.
+    """
+    word_counts = []
+    keyword_counts = []
+    entry_ids = []
+    hits = []
+
+    for entry_id, (title, subtitle, body, keywords) in enumerate(entries):
+        text = f"{title} {subtitle} {body}"
+        word_counts.append(len(text.split()))
+        counts = _get_matcher(tuple(keywords)).count(text)
+        keyword_counts.append(len(counts))
+        entry_ids.extend([entry_id] * len(counts))
+        hits.extend(counts)
+
+    word_counts = np.asarray(word_counts, dtype=float)
+    keyword_counts = np.asarray(keyword_counts, dtype=float)
+    entry_ids = np.asarray(entry_ids, dtype=np.intp)
+    hits = np.asarray(hits, dtype=float)
+
+    # Per-keyword density against its entry's word count
+    keyword_words = word_counts[entry_ids]
+    density = np.divide(hits * 100, keyword_words,
+                        out=np.zeros_like(hits), where=keyword_words > 0)
+    keyword_scores = np.clip(10 - np.abs(IDEAL_DENSITY - density) * DENSITY_PENALTY, 0, 10)
+
+    # Mean keyword score per entry; entries without keywords score 0
+    keyword_totals = np.bincount(entry_ids, weights=keyword_scores,
+                                 minlength=len(word_counts)).astype(float)
+    keyword_means = np.divide(keyword_totals, keyword_counts,
+                              out=np.zeros_like(keyword_totals), where=keyword_counts > 0)
+
+    length_scores = np.where(
+        word_counts < MIN_WORDS,
+        word_counts / (MIN_WORDS / 10),
+        np.where(word_counts > MAX_WORDS,
+                 np.maximum(0, 10 - (word_counts - MAX_WORDS) / 100),
+                 10.0)
+    )
+
+    return keyword_means * KEYWORD_WEIGHT + length_scores * LENGTH_WEIGHT
+
+# Example usage:
+"""
+scores = score_seo_batch(
+    (row.article_title, row.article_subtitle or "", row.article_body,
+     [k.strip() for k in (row.keywords or "").split(",") if k.strip()])
+    for row in kb_entries
+)
+"""
@@ -0,0 +1,16 @@
+-- CreateTable
+CREATE TABLE "related_faq" (
+    "source_type" TEXT NOT NULL,
+    "source_id" INTEGER NOT NULL,
+    "rank" INTEGER NOT NULL,
+    "faq_id" INTEGER NOT NULL,
+    "score" DOUBLE PRECISION NOT NULL,
+
+    CONSTRAINT "related_faq_pkey" PRIMARY KEY ("source_type","source_id","rank")
+);
+
+-- CreateIndex
+CREATE INDEX "related_faq_faq_id_idx" ON "related_faq"("faq_id");
+
+-- AddForeignKey
+ALTER TABLE "related_faq" ADD CONSTRAINT "related_faq_faq_id_fkey" FOREIGN KEY ("faq_id") REFERENCES "faq"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# lib/ is imported as a package from the repository root; kb_ref/ modules
+# import their siblings directly, as when run from that directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "kb_ref"))
@@ -0,0 +1,55 @@
+from blob_store import REF_KEY, BlobStore
+
+
+def search_result(domain, content, query="q", timestamp="2025-02-08T10:00:00"):
+    return {"query": query, "domain": domain, "content": content, "timestamp": timestamp,
+            "source_type": "documentation"}
+
+
+def research(summary, *results):
+    return {
+        "status": "success",
+        "sections": {"connection_summary": summary, "technical_value": {"benefits": ["fast"]}},
+        "docs_results": list(results),
+        "blog_results": [],
+        "additional_results": [],
+    }
+
+
+def test_search_results_stored_once_and_resolved(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite"))
+    shared = search_result("docs.githedgehog.com", "Hedgehog fabric overview")
+    first = research("one", shared, search_result("github.com/hedgehog", "fabricator"))
+    second = research("two", shared)
+
+    interned = [store.intern_research(first), store.intern_research(second)]
+
+    assert interned[0]["docs_results"][0][REF_KEY] == interned[1]["docs_results"][0][REF_KEY]
+    assert "content" not in interned[0]["docs_results"][0]
+    # Two distinct search results and one shared section
+    assert store.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 3
+    assert store.resolve(interned[0]) == first
+    assert store.resolve(interned[1]) == second
+    store.close()
+
+
+def test_shared_content_keeps_each_rows_query_and_timestamp(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite"))
+    content = "Hedgehog fabric overview"
+    first = research("one", search_result("docs.githedgehog.com", content, "VXLAN", "2025-02-08T10:00:00"))
+    second = research("two", search_result("docs.githedgehog.com", content, "EVPN overlay", "2025-02-09T11:30:00"))
+
+    interned = [store.intern_research(first), store.intern_research(second)]
+
+    assert store.conn.execute("SELECT COUNT(*) FROM blobs WHERE id LIKE 'docs.%'").fetchone()[0] == 1
+    assert store.get(interned[1]["docs_results"][0][REF_KEY]) == {"domain": "docs.githedgehog.com",
+                                                                   "content": content}
+    assert store.resolve(interned[0]) == first
+    assert store.resolve(interned[1]) == second
+    store.close()
+
+
+def test_non_dict_research_passes_through(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite"))
+    assert store.intern_research("Failed to gather research") == "Failed to gather research"
+    store.close()
@@ -0,0 +1,39 @@
+import json
+
+from context_budget import SEARCH_RESULT_KEYS, budget_research, count_tokens
+
+INTENT = {"term_classification": {"primary_domain": "networking"}}
+
+
+def raw_results(count):
+    return [{"query": "VXLAN", "domain": "docs.githedgehog.com", "content": f"Result {n}: " + "fabric " * 400}
+            for n in range(count)]
+
+
+def test_fallback_drops_raw_results_and_fits_budget():
+    research = {"status": "parse_error", "raw_response": "x " * 5000}
+    research.update({key: raw_results(10) for key in SEARCH_RESULT_KEYS})
+
+    budgeted = budget_research(research, INTENT, max_tokens=200)
+
+    assert count_tokens(budgeted) <= 200
+    assert budgeted.startswith('{"status":"parse_error"')
+    assert not any(key in budgeted for key in SEARCH_RESULT_KEYS)
+
+
+def test_fallback_for_failed_research_is_unchanged_when_small():
+    research = {"error": "timeout", "status": "research_failed", "docs_results": raw_results(1)}
+    assert json.loads(budget_research(research, INTENT)) == {"error": "timeout", "status": "research_failed"}
+
+
+def test_sections_fit_budget_and_ignore_raw_results():
+    research = {
+        "status": "success",
+        "sections": {"connection_summary": "Hedgehog networking " * 20,
+                     "evolution_context": ["history " * 50 for _ in range(20)]},
+        "docs_results": raw_results(10),
+    }
+    budgeted = json.loads(budget_research(research, INTENT, max_tokens=300))
+    assert set(budgeted) == {"sections"}
+    assert "connection_summary" in budgeted["sections"]
+    assert count_tokens(json.dumps(budgeted, separators=(",", ":"))) <= 300
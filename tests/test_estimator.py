@@ -0,0 +1,84 @@
+import pandas as pd
+
+import kb_processor
+from estimator import estimate_run, load_run_stats
+from prompt_assembly import SEARCH_STAGE, PromptCacheStats, PromptRunner
+
+PROMPTS = {prompt.stage: prompt for prompt in (
+    kb_processor.INTENT_ANALYSIS_PROMPT, kb_processor.RESEARCH_PROMPT,
+    kb_processor.CONTENT_GENERATION_PROMPT, kb_processor.QUALITY_CONTROL_PROMPT,
+)}
+
+
+class Response:
+    content = "<research_results><connection_summary>ok</connection_summary></research_results>"
+    usage_metadata = {"input_tokens": 100, "output_tokens": 10}
+
+
+class FakeLLM:
+    def invoke(self, messages):
+        return Response()
+
+
+class FakeSearch:
+    def __init__(self):
+        self.queries = []
+
+    def run(self, query):
+        self.queries.append(query)
+        return f"Hedgehog results for {query}"
+
+
+def entries(count):
+    return pd.DataFrame({"Article title": ["VXLAN"] * count, "Article subtitle": [""] * count,
+                         "Article body": ["<p>Overlay</p>"] * count})
+
+
+def estimate(history, count=3):
+    return estimate_run(entries(count), PROMPTS, "openai", history, kb_processor.SEARCHES_PER_ENTRY,
+                        search_pause=0.5, context_budget=2000, search_budget=3000, max_iterations=3)
+
+
+def test_research_records_every_search(monkeypatch):
+    monkeypatch.setattr(kb_processor.time, "sleep", lambda seconds: None)
+    stats = PromptCacheStats()
+    agent = kb_processor.ResearchAgent(PromptRunner(FakeLLM(), "openai", stats))
+    agent._search = FakeSearch()
+
+    result = agent.research("VXLAN", {"research_guidance": {"primary_focus": "overlay"},
+                                      "term_classification": {"primary_domain": "networking"}})
+
+    assert result["status"] == "success"
+    assert len(agent._search.queries) == kb_processor.SEARCHES_PER_ENTRY
+    assert stats.stages[SEARCH_STAGE]["calls"] == kb_processor.SEARCHES_PER_ENTRY
+    assert stats.stages[SEARCH_STAGE]["input_tokens"] == 0
+
+
+def test_search_estimate_without_history_uses_configured_count():
+    result = estimate(load_run_stats(None))
+    assert result.search_calls == 3 * kb_processor.SEARCHES_PER_ENTRY
+    assert result.search_seconds == result.search_calls * 1.5
+
+
+def test_search_estimate_uses_observed_searches():
+    history = {"runs": 1, "entries": 4, "errors": 0,
+               "stages": {SEARCH_STAGE: {"calls": 8, "seconds": 0.8}}}
+    result = estimate(history)
+    assert result.search_calls == 6
+    assert result.search_seconds == 6 * (0.1 + 0.5)
+
+
+def test_sampled_estimate_scales_to_all_entries():
+    df = pd.DataFrame({"Article title": [f"Term {n}" for n in range(40)],
+                       "Article subtitle": [""] * 40,
+                       "Article body": ["<p>" + "word " * (10 * n) + "</p>" for n in range(40)]})
+    history = load_run_stats(None)
+    args = (PROMPTS, "openai", history, kb_processor.SEARCHES_PER_ENTRY, 0.5, 2000, 3000, 3)
+    full = estimate_run(df, *args)
+    sampled = estimate_run(df.iloc[::4], *args, entries=len(df))
+
+    assert sampled.entries == full.entries == 40
+    assert sampled.search_calls == full.search_calls
+    assert sampled.stages["generation"].calls == full.stages["generation"].calls
+    ratio = sampled.stages["intent_analysis"].input_tokens / full.stages["intent_analysis"].input_tokens
+    assert 0.9 < ratio < 1.1
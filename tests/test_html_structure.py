@@ -0,0 +1,61 @@
+import csv
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from lib.html_structure import validate_structure
+
+EXPORTS = [
+    os.path.join(os.path.dirname(__file__), os.pardir, "kb_ref", "hubspot-2025-01-15.csv"),
+    os.path.join(os.path.dirname(__file__), os.pardir, "kb-export-2025-02-08.csv"),
+]
+
+
+def codes(body):
+    return [(violation.code, violation.tag) for violation in validate_structure(body).violations]
+
+
+@pytest.mark.parametrize("body", [
+    "<p>a<p>b",
+    "<p>a</p><p>b",
+    "<ul><li>a<li>b</ul>",
+    "<ol><li><p>a<li>b</ol>",
+    "<p>intro<ul><li>item</li></ul>",
+    "<blockquote><p>quote</blockquote>",
+    "<ul><li>a<ul><li>nested</ul></ul>",
+])
+def test_optional_end_tags_are_valid(body):
+    assert codes(body) == []
+
+
+def test_paragraphs_counted_with_omitted_end_tags():
+    assert validate_structure("<p>a<p>b<h3>c</h3><p>d").paragraphs == 3
+
+
+def test_required_end_tags_still_reported():
+    assert codes("<p><strong>bold</p>") == [("unclosed_tag", "strong")]
+    assert codes("<h3>title") == [("unclosed_tag", "h3")]
+    assert codes("<p>a</div>") == [("unmatched_closing_tag", "div")]
+
+
+def test_list_item_outside_list():
+    assert codes("<li>item</li>") == [("orphan_list_item", "li")]
+
+
+def test_empty_lists_count_any_descendant_item():
+    assert validate_structure("<ul></ul><ol> </ol>").empty_lists == 2
+    # As with the BeautifulSoup check, a nested item makes the outer list non-empty
+    assert validate_structure("<ul><ul><li>x</li></ul></ul>").empty_lists == 0
+
+
+def test_counts_match_beautifulsoup_on_exports():
+    for path in EXPORTS:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                body = row["Article body"]
+                soup = BeautifulSoup(body, "html.parser")
+                report = validate_structure(body)
+                assert bool(report.paragraphs) == bool(soup.find_all("p"))
+                assert bool(report.headers) == bool(soup.find_all(["h3", "h4"]))
+                assert report.empty_lists == sum(1 for lst in soup.find_all(["ul", "ol"]) if not lst.find_all("li"))
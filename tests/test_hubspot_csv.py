@@ -0,0 +1,97 @@
+import csv
+import os
+
+import pytest
+
+from hubspot_csv import HUBSPOT_HEADERS, KB_ENTRIES_HEADERS, convert
+
+EXPORT = os.path.join(os.path.dirname(__file__), "..", "kb_ref", "hubspot-2025-01-15.csv")
+
+BODY = '<p>VXLAN, the "overlay":</p>\r\n<ul>\r\n  <li>line one</li>\n  <li>line, two</li>\r\n</ul>'
+
+
+def hubspot_row(title, url, **fields):
+    row = dict.fromkeys(HUBSPOT_HEADERS, "")
+    row.update({"Knowledge base name": "KB", "Article title": title, "Article language": "English",
+                "Article URL": url, "Article body": f"<p>{title}</p>", "Category": "Glossary",
+                "Status": "PUBLISHED", "Archived": "false"})
+    row.update(fields)
+    return row
+
+
+def write_csv(path, headers, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=headers, quoting=csv.QUOTE_ALL, lineterminator="\r\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {name: str(tmp_path / f"{name}.csv") for name in ("hubspot", "kb_entries", "exported")}
+
+
+def test_round_trip_keeps_multiline_bodies_and_keyword_lists(paths):
+    rows = [
+        hubspot_row("VXLAN", "https://kb/vxlan", **{"Article body": BODY,
+                                                   "Keywords": 'VXLAN, overlay, "EVPN" type-5, BGP'}),
+        hubspot_row("EVPN", "https://kb/evpn", **{"Keywords": "EVPN", "Status": "DRAFT",
+                                                 "Archived": "true", "Subcategory": "Routing"}),
+    ]
+    write_csv(paths["hubspot"], HUBSPOT_HEADERS, rows)
+
+    assert convert("import", paths["hubspot"], paths["kb_entries"]) == (2, [])
+    entries = read_csv(paths["kb_entries"])
+    assert list(entries[0]) == KB_ENTRIES_HEADERS
+    assert entries[0]["article_body"] == BODY
+    # Keywords stay one comma-separated field; the converter never splits them into columns
+    assert entries[0]["keywords"] == 'VXLAN, overlay, "EVPN" type-5, BGP'
+    assert (entries[0]["internal_status"], entries[0]["visibility"]) == ("Approved", "Public")
+    assert (entries[1]["internal_status"], entries[1]["visibility"]) == ("Draft", "Private")
+
+    assert convert("export", paths["kb_entries"], paths["exported"]) == (2, [])
+    assert read_csv(paths["exported"]) == rows
+    with open(paths["exported"], "rb") as f:
+        assert f.readline() == b'"' + b'","'.join(header.encode() for header in HUBSPOT_HEADERS) + b'"\r\n'
+
+
+def test_invalid_rows_are_reported_at_their_first_line(paths):
+    rows = [
+        hubspot_row("Multi-line", "https://kb/a", **{"Article body": "<p>one</p>\n<p>two</p>\n<p>three</p>"}),
+        hubspot_row("Bad category", "https://kb/b", Category="Misc"),
+        hubspot_row("Duplicate", "https://kb/a"),
+        hubspot_row("Language code", "https://kb/c", **{"Article language": "pt_BR", "Status": "published"}),
+        hubspot_row("Unknown language", "https://kb/d", **{"Article language": "xx"}),
+        dict.fromkeys(HUBSPOT_HEADERS, ""),
+    ]
+    write_csv(paths["hubspot"], HUBSPOT_HEADERS, rows)
+
+    written, errors = convert("import", paths["hubspot"], paths["kb_entries"])
+
+    assert written == 2
+    assert [(error.line, error.title) for error in errors] == [
+        (5, "Bad category"), (6, "Duplicate"), (8, "Unknown language"),
+    ]
+    assert "invalid category" in errors[0].error
+    assert "duplicate article URL" in errors[1].error
+    entries = read_csv(paths["kb_entries"])
+    assert (entries[1]["article_language"], entries[1]["status"]) == ("Portuguese", "PUBLISHED")
+
+
+def test_export_file_round_trips(paths):
+    written, errors = convert("import", EXPORT, paths["kb_entries"])
+    assert written + len(errors) == len(read_csv(EXPORT))
+    assert convert("export", paths["kb_entries"], paths["exported"]) == (written, [])
+
+    rejected = {error.title for error in errors}
+    originals = [row for row in read_csv(EXPORT) if row["Article title"].strip() not in rejected]
+    exported = read_csv(paths["exported"])
+    assert len(exported) == len(originals)
+    for original, row in zip(originals, exported):
+        for header in ("Article title", "Article URL", "Article body", "Category", "Keywords"):
+            assert row[header] == original[header].strip()
@@ -0,0 +1,140 @@
+import pytest
+
+import job_queue
+from job_queue import DEAD, DONE, LEASED, QUEUED, JobQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = JobQueue(str(tmp_path / "queue.sqlite"), retry_backoff=10, max_backoff=15)
+    yield queue
+    queue.close()
+
+
+def test_enqueue_deduplicates_pending_jobs(queue):
+    first = queue.enqueue("https://kb/a", payload={"article_title": "A"})
+    assert queue.enqueue("https://kb/a", priority=5) == first
+    job = queue.lease("w1")
+    assert job.priority == 5
+    assert job.payload == {"article_title": "A"}
+
+
+def test_lease_order_and_completion(queue):
+    queue.enqueue("https://kb/low")
+    queue.enqueue("https://kb/high", priority=10)
+    job = queue.lease("w1")
+    assert job.article_url == "https://kb/high"
+    assert queue.complete(job, "w1")
+    assert not queue.complete(job, "w1")
+    assert queue.stats() == {QUEUED: 1, LEASED: 0, DONE: 1, DEAD: 0}
+
+
+def test_expired_lease_is_taken_over(queue, clock):
+    queue.enqueue("https://kb/a")
+    job = queue.lease("w1", lease_seconds=60)
+    assert queue.lease("w2") is None
+
+    clock.now += 61
+    retried = queue.lease("w2")
+    assert retried.id == job.id
+    assert retried.attempts == 2
+    # The first worker lost its lease and can no longer finish the job
+    assert not queue.complete(job, "w1")
+    assert queue.complete(retried, "w2")
+
+
+def test_failures_back_off_then_dead_letter(queue, clock):
+    queue.enqueue("https://kb/a", max_attempts=3)
+
+    job = queue.lease("w1")
+    assert queue.fail(job, "w1", "boom")
+    assert queue.lease("w1") is None  # Backing off for 10 s
+    clock.now += 10
+    job = queue.lease("w1")
+    assert job.attempts == 2
+    assert queue.fail(job, "w1", "boom")
+    clock.now += 14
+    assert queue.lease("w1") is None  # 20 s backoff, capped at 15
+    clock.now += 1
+    job = queue.lease("w1")
+    assert job.attempts == 3
+    assert queue.fail(job, "w1", "boom")
+    assert queue.stats()[DEAD] == 1
+    assert queue.lease("w1") is None
+
+
+def test_expired_lease_out_of_attempts_is_dead_lettered(queue, clock):
+    queue.enqueue("https://kb/a", max_attempts=1)
+    queue.lease("w1", lease_seconds=5)
+    clock.now += 6
+    assert queue.lease("w2") is None
+    assert queue.stats()[DEAD] == 1
+
+
+def test_requeue_dead(queue):
+    queue.enqueue("https://kb/a", max_attempts=1)
+    job = queue.lease("w1")
+    queue.fail(job, "w1", "boom")
+    assert queue.requeue_dead() == 1
+    assert queue.requeue_dead() == 0
+    job = queue.lease("w1")
+    assert job.attempts == 1
+
+
+def test_unknown_operation(queue):
+    with pytest.raises(ValueError):
+        queue.enqueue("https://kb/a", operation="delete")
+
+
+def test_enqueue_while_running_adds_a_follow_up(queue):
+    first = queue.enqueue("https://kb/a", payload={"article_body": "old"})
+    job = queue.lease("w1")
+
+    follow_up = queue.enqueue("https://kb/a", payload={"article_body": "new"})
+    assert follow_up != first
+    # Further edits merge into the waiting follow-up
+    assert queue.enqueue("https://kb/a", payload={"article_body": "newest"}) == follow_up
+    # The follow-up waits while the first job is still leased
+    assert queue.lease("w2") is None
+
+    assert queue.complete(job, "w1")
+    again = queue.lease("w2")
+    assert again.id == follow_up
+    assert again.payload == {"article_body": "newest"}
+
+
+def test_follow_up_replaces_retry_of_the_running_job(queue, clock):
+    queue.enqueue("https://kb/a", payload={"article_body": "old"})
+    job = queue.lease("w1")
+    follow_up = queue.enqueue("https://kb/a", payload={"article_body": "new"})
+
+    assert queue.fail(job, "w1", "boom")
+    assert queue.stats() == {QUEUED: 1, LEASED: 0, DONE: 1, DEAD: 0}
+    assert queue.lease("w1").id == follow_up
+
+
+def test_follow_up_replaces_expired_lease(queue, clock):
+    queue.enqueue("https://kb/a", payload={"article_body": "old"})
+    queue.lease("w1", lease_seconds=60)
+    follow_up = queue.enqueue("https://kb/a", payload={"article_body": "new"})
+
+    clock.now += 61
+    job = queue.lease("w2")
+    assert job.id == follow_up
+    assert job.payload == {"article_body": "new"}
+    assert queue.lease("w3") is None
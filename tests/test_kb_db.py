@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from kb_db import KB_ENTRY_COLUMNS, KbDatabase
+
+
+def entry(url, title="Title", body="<p>Body</p>", **fields):
+    row = {header: None for header in KB_ENTRY_COLUMNS.values()}
+    row.update({"Article URL": url, "Article title": title, "Article body": body, "Category": "Glossary"})
+    row.update(fields)
+    return row
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = KbDatabase(f"sqlite:///{tmp_path / 'kb.db'}")
+    yield database
+    database.close()
+
+
+def stored(db, url, column):
+    return db.conn.execute(f"SELECT {column} FROM kb_entries WHERE article_url = ?", (url,)).fetchone()[0]
+
+
+def test_upsert_then_read(db):
+    written = db.upsert_entries([
+        (entry("https://kb/a", "A", **{"Article subtitle": "sub", "Keywords": "x, y"}), {"run": 1}),
+        (entry("https://kb/b", "B"), {"run": 1}),
+    ])
+    assert written == 2
+
+    entries = list(db.read_entries(batch_size=1))
+    assert [e["Article title"] for e in entries] == ["A", "B"]
+    assert entries[0]["Article subtitle"] == "sub"
+    assert entries[0]["Keywords"] == "x, y"
+    assert entries[1]["Article subtitle"] is None
+
+
+def test_upsert_updates_content_and_merges_metadata(db):
+    db.upsert_entries([(entry("https://kb/a", body="<p>old</p>"), {"first": 1})])
+    db.upsert_entries([(entry("https://kb/a", body="<p>new</p>"), {"second": 2})])
+
+    assert [e["Article body"] for e in db.read_entries()] == ["<p>new</p>"]
+    assert json.loads(stored(db, "https://kb/a", "metadata")) == {"first": 1, "second": 2}
+
+
+def test_unchanged_content_keeps_last_modified_date(db):
+    db.upsert_entries([(entry("https://kb/a"), {"run": 1})])
+    db.conn.execute("UPDATE kb_entries SET last_modified_date = '2025-01-01', updated_at = '2025-01-01'")
+    db.conn.commit()
+
+    # New processing results but the same content: only metadata and updated_at move
+    db.upsert_entries([(entry("https://kb/a"), {"run": 2})])
+    assert stored(db, "https://kb/a", "last_modified_date") == "2025-01-01"
+    assert stored(db, "https://kb/a", "updated_at") != "2025-01-01"
+
+    # Identical content and metadata: the row is left alone
+    db.conn.execute("UPDATE kb_entries SET updated_at = '2025-01-01'")
+    db.conn.commit()
+    db.upsert_entries([(entry("https://kb/a"), {"run": 2})])
+    assert stored(db, "https://kb/a", "updated_at") == "2025-01-01"
+
+    db.upsert_entries([(entry("https://kb/a", body="<p>edited</p>"), {"run": 3})])
+    assert stored(db, "https://kb/a", "last_modified_date") != "2025-01-01"
+
+
+def test_archived_entries_skipped_unless_requested(db):
+    db.upsert_entries([(entry("https://kb/a"), {}), (entry("https://kb/b"), {})])
+    db.conn.execute("UPDATE kb_entries SET archived = 1 WHERE article_url = 'https://kb/b'")
+    db.conn.commit()
+    assert [e["Article URL"] for e in db.read_entries()] == ["https://kb/a"]
+    assert len(list(db.read_entries(include_archived=True))) == 2
+
+
+def test_unsupported_url():
+    with pytest.raises(ValueError):
+        KbDatabase("mysql://localhost/kb")
@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import kb_processor
+from kb_service import KbServiceServer
+
+MAX_CONCURRENT = 3
+
+
+class Agent:
+    """Stands in for all four pipeline agents; records which instance ran each step"""
+    calls = []
+    lock = threading.Lock()
+
+    def __init__(self, runner, *args):
+        self.runner = runner
+
+    def _record(self):
+        with self.lock:
+            self.calls.append(id(self))
+        time.sleep(0.2)
+
+    def analyze(self, *args):
+        self._record()
+        return {"term_classification": {"primary_domain": "networking"}}
+
+    def research(self, *args):
+        return {"status": "success", "sections": {"connection_summary": "ok"}}
+
+    def generate(self, **kwargs):
+        return "subtitle", "<p>body</p>", ["keyword"]
+
+    def evaluate(self, **kwargs):
+        self.runner.stats.record("quality_control", {"input_tokens": 10, "output_tokens": 1})
+        return {"status": "pass", "evaluation": {}, "notes": ""}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    for name in ("IntentAnalysisAgent", "ResearchAgent", "ContentGenerationAgent", "QualityControlAgent"):
+        monkeypatch.setattr(kb_processor, name, Agent)
+    monkeypatch.setattr(kb_processor.KnowledgeBaseProcessor, "_initialize_llm", lambda self, provider: object())
+    Agent.calls = []
+    server = KbServiceServer(("127.0.0.1", 0), kb_processor.KnowledgeBaseProcessor(), "openai", MAX_CONCURRENT)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, title):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}/process",
+                                     data=json.dumps({"title": title}).encode())
+    with urllib.request.urlopen(request) as response:
+        return [json.loads(line)["event"] for line in response]
+
+
+def test_concurrent_requests_use_separate_processors(server):
+    events = {}
+    threads = [threading.Thread(target=lambda n=n: events.__setitem__(n, post(server, f"entry {n}")))
+               for n in range(MAX_CONCURRENT + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result[-1] == "result" for result in events.values())
+    # One request waited for a free processor
+    assert sum("queued" in result for result in events.values()) == 1
+    assert len(set(Agent.calls)) == MAX_CONCURRENT
+    # Stats are shared across the pool
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/health") as response:
+        health = json.load(response)
+    assert health["prompt_cache"]["quality_control"]["calls"] == MAX_CONCURRENT + 1
+    assert health["stage_times"]["intent_analysis"]["calls"] == MAX_CONCURRENT + 1
+
+
+def test_stats_serve_the_live_profile(monkeypatch):
+    from profiler import SamplingProfiler
+
+    for name in ("IntentAnalysisAgent", "ResearchAgent", "ContentGenerationAgent", "QualityControlAgent"):
+        monkeypatch.setattr(kb_processor, name, Agent)
+    monkeypatch.setattr(kb_processor.KnowledgeBaseProcessor, "_initialize_llm", lambda self, provider: object())
+    processor = kb_processor.KnowledgeBaseProcessor()
+    profiler = SamplingProfiler(0.001, processor.stage_times)
+    profiler.start()
+    server = KbServiceServer(("127.0.0.1", 0), processor, "openai", 1, profiler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        post(server, "entry")
+        with urllib.request.urlopen(f"{base}/stats") as response:
+            stats = json.load(response)
+        with urllib.request.urlopen(f"{base}/stats/flamegraph.svg") as response:
+            svg = response.read().decode()
+    finally:
+        profiler.stop()
+        server.shutdown()
+        server.server_close()
+
+    assert stats["stage_times"]["intent_analysis"]["calls"] == 1
+    assert stats["profile"]["samples"] > 0
+    assert "[intent_analysis]" in stats["profile"]["folded"]
+    assert svg.startswith("<svg")
+
+
+def test_stats_without_profiler(server):
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/stats") as response:
+        assert "profile" not in json.load(response)
+    with pytest.raises(urllib.error.HTTPError):
+        urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/stats/flamegraph.svg")
@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+import pytest
+
+from lib import llm_client
+from lib.llm_client import AsyncLLMClient, get_llm_client
+
+
+def completion_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "ok"},
+            "finish_reason": "stop",
+        }],
+    })
+
+
+class OfflineAsyncClient(httpx.AsyncClient):
+    def __init__(self, **kwargs):
+        super().__init__(transport=httpx.MockTransport(completion_handler), **kwargs)
+
+
+@pytest.fixture
+def offline_http(monkeypatch):
+    monkeypatch.setattr(llm_client.httpx, "AsyncClient", OfflineAsyncClient)
+    monkeypatch.setattr(llm_client, "_shared_clients", {})
+
+
+def test_shared_client_works_across_event_loops(offline_http):
+    client = get_llm_client("test-key", max_concurrency=2)
+
+    async def run_batch():
+        replies = await asyncio.gather(*[client.complete("hi") for _ in range(4)])
+        await client.aclose()
+        return replies
+
+    assert asyncio.run(run_batch()) == ["ok"] * 4
+    # A second event loop in the same process reuses the shared client
+    assert get_llm_client("test-key") is client
+    assert asyncio.run(run_batch()) == ["ok"] * 4
+
+
+def test_shared_client_rejects_different_settings(offline_http):
+    client = get_llm_client("test-key", timeout=30.0)
+    assert get_llm_client("test-key", timeout=30.0) is client
+    with pytest.raises(ValueError, match="timeout"):
+        get_llm_client("test-key", timeout=5.0)
+    with pytest.raises(TypeError):
+        get_llm_client("test-key", max_concurency=4)
+
+
+def test_clients_are_per_api_key(offline_http):
+    assert get_llm_client("key-a") is not get_llm_client("key-b")
+    assert isinstance(get_llm_client("key-a"), AsyncLLMClient)
@@ -0,0 +1,38 @@
+import asyncio
+import json
+import time
+
+from lib import quality_control
+from lib.quality_control import QualityControl
+
+LOCAL_CHECK_SECONDS = 0.3
+
+
+class FakeLLM:
+    def __init__(self):
+        self.started = []
+
+    async def complete(self, prompt, **kwargs):
+        self.started.append(time.monotonic())
+        await asyncio.sleep(0.01)
+        return json.dumps({"score": 8, "explanation": "ok"})
+
+
+def test_llm_requests_start_while_local_checks_run(monkeypatch):
+    score_seo = quality_control.score_seo
+
+    def slow_score_seo(*args):
+        time.sleep(LOCAL_CHECK_SECONDS)
+        return score_seo(*args)
+
+    monkeypatch.setattr(quality_control, "score_seo", slow_score_seo)
+    llm = FakeLLM()
+    qc = QualityControl("test-key", llm_client=llm)
+
+    started = time.monotonic()
+    metrics = asyncio.run(qc.evaluate_entry("VXLAN", "Overlay networks", "<p>VXLAN overlay</p>",
+                                            ["VXLAN"], {}))
+
+    assert metrics.technical_accuracy == metrics.educational_value == 8
+    assert len(llm.started) == 2
+    assert max(llm.started) - started < LOCAL_CHECK_SECONDS / 2
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+
+from related_faqs import LINKED_SCORE, build_related, explicit_links, top_k_related
+
+
+def unit(*angles):
+    radians = np.radians(angles)
+    return np.stack([np.cos(radians), np.sin(radians)], axis=1).astype(np.float32)
+
+
+def test_top_k_orders_by_score_and_applies_min_score():
+    faqs = unit(0, 10, 50, 90)
+    related = list(top_k_related(unit(5, 85), faqs, k=3, min_score=0.5, block_size=1))
+    assert [position for position, _ in related[0]] == [0, 1, 2]
+    assert [position for position, _ in related[1]] == [3, 2]
+    assert all(a[1] >= b[1] for row in related for a, b in zip(row, row[1:]))
+
+
+def test_top_k_excludes_self():
+    faqs = unit(0, 5, 90)
+    related = list(top_k_related(faqs, faqs, k=2, min_score=-1.0, exclude_self=True, block_size=2))
+    assert [[position for position, _ in row] for row in related] == [[1, 2], [0, 2], [1, 0]]
+
+
+def test_top_k_with_k_larger_than_faq_count():
+    related = list(top_k_related(unit(0), unit(0, 30), k=10, min_score=-1.0))
+    assert [position for position, _ in related[0]] == [0, 1]
+    assert list(top_k_related(unit(0), unit(0, 30), k=0, min_score=-1.0)) == [[]]
+
+
+def test_explicit_links_from_every_source():
+    faqs = [
+        (1, "q", "a", json.dumps({"source_rfp_id": 7}), None),
+        (2, "q", "a", {"source_rfp_ids": [7, 8]}, None),
+        (3, "q", "a", None, 8),
+        (4, "q", "a", "not json", 7),
+    ]
+    assert explicit_links(faqs) == {7: [1, 2, 4], 8: [2, 3]}
+
+
+def test_build_related_ranks_linked_faqs_first():
+    faqs = [
+        (1, "How do I configure BGP EVPN?", "Use the fabric CLI.", None, None),
+        (2, "What is the pricing model?", "Per switch.", json.dumps({"source_rfp_id": 10}), None),
+        (3, "Does the fabric support BGP EVPN?", "Yes, BGP EVPN is supported.", None, None),
+    ]
+    rfps = [(10, "Is BGP EVPN supported by the fabric?", "Yes.")]
+
+    rows = build_related(faqs, rfps, k=2, min_score=0.0, model_name=None)
+
+    rfp_rows = [row for row in rows if row[0] == "rfp_qa"]
+    assert rfp_rows[0] == ("rfp_qa", 10, 1, 2, LINKED_SCORE)
+    assert [row[2] for row in rfp_rows] == [1, 2]
+    assert rfp_rows[1][3] == 3
+    faq_rows = [row for row in rows if row[0] == "faq"]
+    assert all(row[1] != row[3] for row in faq_rows)
@@ -0,0 +1,56 @@
+import numpy as np
+
+from rfp_faq_clusters import (
+    MAX_PROMPT_MEMBERS, QuestionCluster, RfpQuestion, cluster_questions, connect, load_questions, save_faq,
+    tfidf_embeddings,
+)
+
+
+def unit(*angles):
+    """Unit vectors in the plane at the given angles, in degrees"""
+    radians = np.radians(angles)
+    return np.stack([np.cos(radians), np.sin(radians)], axis=1).astype(np.float32)
+
+
+def make_questions(count):
+    return [RfpQuestion(id=n + 1, question=f"question {n}", answer=f"answer {n}") for n in range(count)]
+
+
+def test_chained_paraphrases_do_not_merge():
+    # Neighbours are 20 degrees apart (cos 0.94); the ends of the chain are 80 apart (cos 0.17)
+    questions = make_questions(5)
+    clusters = cluster_questions(questions, unit(0, 20, 40, 60, 80), threshold=0.9, block_size=2)
+    for cluster in clusters:
+        ids = [member.id - 1 for member in cluster.members]
+        assert max(ids) - min(ids) <= 1
+    assert sum(len(cluster.members) for cluster in clusters) == 5
+
+
+def test_tight_groups_cluster_with_medoid_first():
+    questions = make_questions(5)
+    clusters = cluster_questions(questions, unit(0, 2, 4, 90, 92), threshold=0.9, block_size=2)
+    assert [sorted(member.id for member in cluster.members) for cluster in clusters] == [[1, 2, 3], [4, 5]]
+    assert clusters[0].canonical.id == clusters[0].members[0].id == 2
+
+
+def test_tfidf_paraphrases():
+    texts = ["Do you support BGP EVPN?", "Is BGP EVPN supported?", "What is your pricing model?"]
+    questions = [RfpQuestion(id=n, question=text, answer="") for n, text in enumerate(texts)]
+    clusters = cluster_questions(questions, tfidf_embeddings(texts), threshold=0.3)
+    assert sorted(len(cluster.members) for cluster in clusters) == [1, 2]
+
+
+def test_only_prompted_members_are_linked(tmp_path):
+    conn, dialect = connect(f"sqlite:///{tmp_path / 'faq.db'}")
+    count = MAX_PROMPT_MEMBERS + 3
+    conn.executemany("INSERT INTO rfp_qa (question, answer) VALUES (?, ?)",
+                     [(f"question {n}", f"answer {n}") for n in range(count)])
+    questions = load_questions(conn, dialect)
+    cluster = QuestionCluster(canonical=questions[0], members=questions)
+
+    save_faq(conn, dialect, cluster, {"question": "Q", "answer": "A"})
+
+    remaining = load_questions(conn, dialect)
+    assert [question.id for question in remaining] == [question.id for question in questions[MAX_PROMPT_MEMBERS:]]
+    assert len(load_questions(conn, dialect, include_linked=True)) == count
+    conn.close()
@@ -0,0 +1,58 @@
+import csv
+import os
+import re
+
+import pytest
+
+from lib.seo_scoring import KeywordMatcher, score_seo, score_seo_batch
+
+EXPORT = os.path.join(os.path.dirname(__file__), os.pardir, "kb_ref", "hubspot-2025-01-15.csv")
+
+
+def baseline_seo(title, subtitle, body, keywords):
+    """QualityControl._evaluate_seo before the single-pass scorer"""
+    text = f"{title} {subtitle} {body}"
+    word_count = len(text.split())
+    keyword_scores = []
+    for keyword in keywords:
+        count = len(re.findall(rf'\b{re.escape(keyword)}\b', text, re.I))
+        density = (count / word_count) * 100
+        keyword_scores.append(min(10, max(0, 10 - abs(1.5 - density) * 4)))
+    length_score = 10
+    if word_count < 300:
+        length_score = word_count / 30
+    elif word_count > 1000:
+        length_score = max(0, 10 - (word_count - 1000) / 100)
+    return sum(keyword_scores) / len(keyword_scores) * 0.7 + length_score * 0.3
+
+
+def export_entries():
+    with open(EXPORT, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            # Most entries have no keywords; their title makes a realistic one.
+            # The baseline's \b only matches keywords that start and end with a word character
+            candidates = [k.strip() for k in row["Keywords"].split(",")] + [row["Article title"].strip()]
+            keywords = [k for k in candidates if re.match(r"\w", k) and re.search(r"\w$", k)]
+            if keywords:
+                yield row["Article title"], row["Article subtitle"], row["Article body"], keywords
+
+
+def test_scores_match_baseline_on_export():
+    entries = list(export_entries())
+    assert entries
+    expected = [baseline_seo(*entry) for entry in entries]
+    assert [score_seo(*entry) for entry in entries] == pytest.approx(expected)
+    assert list(score_seo_batch(entries)) == pytest.approx(expected)
+
+
+def test_batch_without_keywords_scores_length_only():
+    body = " ".join(["word"] * 150)
+    scores = score_seo_batch([("Title", "", body, []), ("Title", "", "", [])])
+    assert list(scores) == pytest.approx([score_seo("Title", "", body, []), score_seo("Title", "", "", [])])
+    assert scores[0] == pytest.approx((151 / 30) * 0.3)
+
+
+def test_overlapping_and_punctuated_keywords():
+    matcher = KeywordMatcher(["fabric", "hedgehog fabric", "Quality of Service (QoS)"])
+    text = "Hedgehog Fabric supports Quality of Service (QoS); the fabric is open."
+    assert matcher.count(text) == [2, 1, 1]
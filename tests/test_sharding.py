@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+import pytest
+
+from sharding import SOURCE_ROW_COLUMN, merge_shards, parse_shard, select_shard, stable_shard
+
+EXPORT = os.path.join(os.path.dirname(__file__), os.pardir, "kb_ref", "hubspot-2025-01-15.csv")
+
+
+@pytest.fixture(scope="module")
+def export():
+    return pd.read_csv(EXPORT)
+
+
+def test_parse_shard():
+    assert parse_shard("0/4") == (0, 4)
+    assert parse_shard("3/4") == (3, 4)
+    for spec in ["4/4", "-1/2", "1", "a/b", "0/0"]:
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_stable_shard_is_deterministic():
+    assert stable_shard("https://kb/a", 8) == stable_shard("https://kb/a", 8)
+    assert 0 <= stable_shard("https://kb/a", 8) < 8
+
+
+@pytest.mark.parametrize("by", ["hash", "range"])
+def test_shards_partition_the_input(export, by):
+    shards = [select_shard(export, index, 3, by) for index in range(3)]
+    rows = sorted(row for shard in shards for row in shard[SOURCE_ROW_COLUMN])
+    assert rows == list(range(len(export)))
+    assert all(list(shard.index) == list(range(len(shard))) for shard in shards)
+
+
+@pytest.mark.parametrize("by", ["hash", "range"])
+def test_csv_round_trip(export, tmp_path, by):
+    paths = []
+    for index in range(3):
+        path = str(tmp_path / f"shard{index}.csv")
+        select_shard(export, index, 3, by).to_csv(path, index=False)
+        paths.append(path)
+
+    merge_shards(paths, str(tmp_path / "merged.csv"))
+    merged = pd.read_csv(tmp_path / "merged.csv")
+    pd.testing.assert_frame_equal(merged, export)
+
+
+def test_overlapping_shards_rejected(export, tmp_path):
+    path = str(tmp_path / "shard.csv")
+    select_shard(export, 0, 2).to_csv(path, index=False)
+    with pytest.raises(ValueError, match="more than one shard"):
+        merge_shards([path, path], str(tmp_path / "merged.csv"))
+
+
+def test_unsharded_outputs_rejected(export, tmp_path):
+    path = str(tmp_path / "plain.csv")
+    export.to_csv(path, index=False)
+    with pytest.raises(ValueError, match="--shard"):
+        merge_shards([path], str(tmp_path / "merged.csv"))
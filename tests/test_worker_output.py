@@ -0,0 +1,78 @@
+import json
+import multiprocessing
+from types import SimpleNamespace
+
+import pandas as pd
+
+from estimator import load_run_stats, record_run_stats
+from kb_processor import KnowledgeBaseProcessor
+from prompt_assembly import PromptCacheStats
+
+WRITES_PER_PROCESS = 10
+
+
+def append_rows(output_file, worker):
+    df = pd.DataFrame({"Article URL": [f"https://kb/{worker}-{n}" for n in range(WRITES_PER_PROCESS)],
+                       "Article body": ["x" * 5000] * WRITES_PER_PROCESS})
+    processor = SimpleNamespace(df=df)
+    for idx in range(WRITES_PER_PROCESS):
+        KnowledgeBaseProcessor.append_result(processor, output_file, idx)
+
+
+def record_stats(path, worker):
+    stats = PromptCacheStats()
+    stats.record("generation", {"input_tokens": 100, "output_tokens": 10}, 1.0)
+    for _ in range(WRITES_PER_PROCESS):
+        record_run_stats(path, stats, entries=1, errors=0)
+
+
+def run_processes(target, *args):
+    processes = [multiprocessing.Process(target=target, args=args + (worker,)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+
+def test_workers_append_to_shared_output(tmp_path):
+    output_file = str(tmp_path / "out.csv")
+    run_processes(append_rows, output_file)
+    rows = pd.read_csv(output_file)
+    assert len(rows) == 4 * WRITES_PER_PROCESS
+    assert rows["Article URL"].is_unique
+    assert (rows["Article body"].str.len() == 5000).all()
+
+
+def test_concurrent_run_stats_are_all_counted(tmp_path):
+    path = str(tmp_path / "stats.json")
+    run_processes(record_stats, path)
+    history = load_run_stats(path)
+    assert history["runs"] == history["entries"] == 4 * WRITES_PER_PROCESS
+    assert history["stages"]["generation"]["calls"] == 4 * WRITES_PER_PROCESS
+    assert json.loads(open(path).read()) == history
+
+
+def test_payload_jobs_reuse_one_row(tmp_path, monkeypatch):
+    from job_queue import JobQueue
+
+    monkeypatch.setattr(KnowledgeBaseProcessor, "_initialize_llm", lambda self, provider: object())
+    processor = KnowledgeBaseProcessor()
+
+    def process_batch(start, count):
+        processor.df.at[start, "Article body"] = f"<p>{processor.df.at[start, 'Article title']}</p>"
+        processor.df.at[start, "processing_status"] = "processed"
+
+    monkeypatch.setattr(processor, "process_batch", process_batch)
+    queue = JobQueue(str(tmp_path / "queue.sqlite"))
+    for n in range(5):
+        queue.enqueue(f"https://kb/{n}", payload={"article_title": f"Entry {n}"})
+    output_file = str(tmp_path / "out.csv")
+
+    assert processor.run_worker(queue, "w1", output_file, poll_interval=0, max_jobs=5) == 5
+
+    assert len(processor.df) == 1
+    assert processor.job_statuses == {"processed": 5}
+    rows = pd.read_csv(output_file)
+    assert rows["Article body"].tolist() == [f"<p>Entry {n}</p>" for n in range(5)]
+    queue.close()